@@ -0,0 +1,243 @@
+"""
+탑다운 THRESHOLDS / WEIGHTS 그리드 서치 백테스터
+- 지표 입력 행렬(임계값 무관)은 한 번만 계산 (signal_engine.history_inputs)
+- King/Queen/Context 신호는 임계값 축으로 브로드캐스팅 → 조합 전체를 한 번에 계산
+- 가중치 조합을 프로세스 풀에 분배, 조합별 지표는 행렬곱으로 집계
+- 결과: 적중률, 신호 상태별 SPY 선행수익률, 연간 신호 전환 횟수 → 랭킹 CSV
+
+사용: python backtest.py [--horizon 20] [--workers N] [--top 20] [--out backtest_results.csv]
+"""
+
+import os
+import csv
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import signal_engine
+from timeseries import TimeSeries
+from wdklab_monitor import FRED_SERIES, THRESHOLDS, WEIGHTS, BACKFILL_START, FRED_TIMEOUT, fetch_fred_all
+
+# ===== 탐색 공간 =====
+GRID = {
+    'king':    [5, 7.5, 10, 12.5, 15, 20],           # bp
+    'pce_yoy': [2.2, 2.4, 2.6, 2.8, 3.0],            # %
+    'pce_3m':  [1.8, 2.0, 2.2, 2.4, 2.6, 2.8],       # %
+    'vix':     [15, 16, 17, 18, 19, 20, 22, 24],
+}
+WEIGHT_STEP = 10    # fed/inflation/context 가중치 (각 ≥ STEP, 합 100)
+
+OUTPUT_FILE = 'backtest_results.csv'
+
+# 워커 프로세스 공유 데이터 (fork 시 복사 없이 상속)
+_SHARED = {}
+
+
+# ===== 데이터 준비 =====
+
+def weight_grid(step=WEIGHT_STEP):
+    """합이 100인 (fed, inflation, context) 조합"""
+    return [(f, i, 100 - f - i)
+            for f in range(step, 100, step)
+            for i in range(step, 100 - f, step)]
+
+
+def load_spy(start):
+    """SPY 수정종가 → TimeSeries"""
+    import yfinance as yf
+    hist = yf.Ticker('SPY').history(start=start, auto_adjust=True)
+    closes = hist['Close'].dropna()
+    dates = np.array([d.strftime('%Y-%m-%d') for d in closes.index], dtype='datetime64[D]')
+    return TimeSeries(dates, closes.to_numpy(dtype=np.float64))
+
+
+def forward_returns(spy, grid, horizon):
+    """grid 각 날짜의 SPY 종가 → horizon 거래일 후 종가 수익률 (끝 구간 NaN)"""
+    idx, valid = spy._lookup(grid)
+    fwd_idx = idx + horizon
+    ok = valid & (fwd_idx < len(spy))
+    out = np.full(len(grid), np.nan)
+    out[ok] = spy.values[fwd_idx[ok]] / spy.values[idx[ok]] - 1
+    return out
+
+
+def signal_tensors(inputs, grid=GRID):
+    """
+    임계값 축별 신호 (브로드캐스팅)
+    반환: fed (K, T), infl (Y, M, T), ctx (V, T)
+    """
+    king  = np.array(grid['king'])[:, None]
+    yoy   = np.array(grid['pce_yoy'])[:, None, None]
+    m3    = np.array(grid['pce_3m'])[None, :, None]
+    vix   = np.array(grid['vix'])[:, None]
+    fed   = signal_engine.fed_signal(inputs['dgs2_change_bp'][None, :], king)
+    infl  = signal_engine.inflation_signal(inputs['pce_yoy'], inputs['pce_3m_ann'], yoy, m3)
+    ctx   = signal_engine.context_signal(inputs['vix'][None, :], inputs['spread'], inputs['baa'], vix)
+    return fed.astype(np.int8), infl.astype(np.int8), ctx.astype(np.int8)
+
+
+# ===== 조합 평가 =====
+
+def score_labels(green, red, fwd, years):
+    """
+    green/red: (C, T) bool — 조합별 신호 상태
+    반환: {지표: (C,) 배열}
+    """
+    valid = np.isfinite(fwd)
+    f0    = np.where(valid, fwd, 0.0)
+    up    = (valid & (fwd > 0)).astype(np.float32)
+    down  = (valid & (fwd < 0)).astype(np.float32)
+    validf = valid.astype(np.float32)
+    yellow = ~(green | red)
+
+    out = {}
+    for name, mask in (('green', green), ('yellow', yellow), ('red', red)):
+        m = mask.astype(np.float32)
+        n = m @ validf
+        out[f'n_{name}'] = n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[f'ret_{name}'] = (m @ f0) / n
+        if name == 'green':
+            hits_g = m @ up
+        elif name == 'red':
+            hits_r = m @ down
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['hit_rate'] = (hits_g + hits_r) / (out['n_green'] + out['n_red'])
+    out['edge'] = out['ret_green'] - out['ret_red']
+
+    state = green.astype(np.int8) - red.astype(np.int8)
+    out['turnover'] = (state[:, 1:] != state[:, :-1]).sum(axis=1) / years
+    return out
+
+
+def _evaluate_weights(weight_chunk):
+    """워커: 가중치 조합 묶음 → 레코드 리스트"""
+    fed, infl, ctx = _SHARED['fed'], _SHARED['infl'], _SHARED['ctx']
+    fwd, years, grid = _SHARED['fwd'], _SHARED['years'], _SHARED['grid']
+    K, (Y, M), V, T = fed.shape[0], infl.shape[:2], ctx.shape[0], fed.shape[-1]
+
+    records = []
+    for wf, wi, wc in weight_chunk:
+        comp = signal_engine.composite_score(
+            fed[:, None, None, None, :], infl[None, :, :, None, :], ctx[None, None, None, :, :],
+            {'fed': wf, 'inflation': wi, 'context': wc}
+        ).reshape(-1, T)
+        res = score_labels(comp > 0.2, comp < -0.2, fwd, years)
+        for c, (k, y, m, v) in enumerate(itertools.product(range(K), range(Y), range(M), range(V))):
+            rec = {'king': grid['king'][k], 'pce_yoy': grid['pce_yoy'][y],
+                   'pce_3m': grid['pce_3m'][m], 'vix': grid['vix'][v],
+                   'w_fed': wf, 'w_inflation': wi, 'w_context': wc}
+            rec.update({key: float(val[c]) for key, val in res.items()})
+            records.append(rec)
+    return records
+
+
+def _init_worker(shared):
+    _SHARED.update(shared)
+
+
+def run_grid(inputs, fwd, workers=None, grid=GRID, step=WEIGHT_STEP):
+    """전체 그리드 평가 → 레코드 리스트 (프로세스 풀)"""
+    fed, infl, ctx = signal_tensors(inputs, grid)
+    days  = inputs['date']
+    years = max((days[-1] - days[0]).astype(int) / 365.25, 1e-9)
+    shared = {'fed': fed, 'infl': infl, 'ctx': ctx, 'fwd': fwd, 'years': years, 'grid': grid}
+
+    weights = weight_grid(step)
+    workers = workers or os.cpu_count() or 1
+    chunks  = [weights[i::workers] for i in range(workers) if weights[i::workers]]
+
+    if workers == 1:
+        _init_worker(shared)
+        return _evaluate_weights(weights)
+
+    records = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(shared,)) as pool:
+        for part in pool.map(_evaluate_weights, chunks):
+            records.extend(part)
+    return records
+
+
+def evaluate_current(inputs, fwd):
+    """현재 THRESHOLDS/WEIGHTS 1개 조합 (비교 기준선)"""
+    fed  = signal_engine.fed_signal(inputs['dgs2_change_bp'], THRESHOLDS['king'])
+    infl = signal_engine.inflation_signal(inputs['pce_yoy'], inputs['pce_3m_ann'],
+                                          THRESHOLDS['pce_yoy'], THRESHOLDS['pce_3m'])
+    ctx  = signal_engine.context_signal(inputs['vix'], inputs['spread'], inputs['baa'], THRESHOLDS['vix'])
+    comp = signal_engine.composite_score(fed, infl, ctx, WEIGHTS)[None, :]
+    days  = inputs['date']
+    years = max((days[-1] - days[0]).astype(int) / 365.25, 1e-9)
+    res = score_labels(comp > 0.2, comp < -0.2, fwd, years)
+    return {key: float(val[0]) for key, val in res.items()}
+
+
+# ===== 메인 =====
+
+def main():
+    parser = argparse.ArgumentParser(description='탑다운 임계값/가중치 그리드 백테스트')
+    parser.add_argument('--horizon', type=int, default=20, help='선행수익률 기간 (거래일)')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--top', type=int, default=20, help='출력할 상위 조합 수')
+    parser.add_argument('--min-coverage', type=float, default=0.2,
+                        help='GREEN+RED 비중 최소값 (너무 드문 신호 조합 제외)')
+    parser.add_argument('--out', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    keys = ['DGS2', 'DGS10', 'VIXCLS', 'BAMLC0A0CM', 'PCEPILFE', 'M2SL']
+    fred_start = str(np.datetime64(BACKFILL_START, 'Y') - 2) + '-01-01'
+    data = fetch_fred_all({k: FRED_SERIES[k] for k in keys}, deadline=FRED_TIMEOUT * 2,
+                          start=fred_start)
+    if not len(data['DGS2']):
+        print("[BT] ❌ DGS2 없음 — 중단")
+        return
+    inputs = signal_engine.history_inputs(data, BACKFILL_START)
+    spy    = load_spy(BACKFILL_START)
+    fwd    = forward_returns(spy, inputs['date'], args.horizon)
+    t1 = time.perf_counter()
+    print(f"[BT] 입력 {len(inputs['date'])}거래일, SPY {len(spy)}일 준비 ({t1 - t0:.1f}s)")
+
+    n_combos = len(weight_grid()) * int(np.prod([len(v) for v in GRID.values()]))
+    print(f"[BT] {n_combos:,}개 조합 평가 중 (horizon={args.horizon}d)...")
+    records = run_grid(inputs, fwd, workers=args.workers)
+    t2 = time.perf_counter()
+    print(f"[BT] ✅ 평가 완료 ({t2 - t1:.1f}s)")
+
+    # 커버리지 필터 + 랭킹 (적중률 → GREEN-RED 수익률 차)
+    n_valid = np.isfinite(fwd).sum()
+    ranked = [r for r in records
+              if (r['n_green'] + r['n_red']) >= args.min_coverage * n_valid and np.isfinite(r['hit_rate'])]
+    ranked.sort(key=lambda r: (r['hit_rate'], np.nan_to_num(r['edge'])), reverse=True)
+    for i, r in enumerate(ranked, 1):
+        r['rank'] = i
+
+    out_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), args.out)
+    fields = ['rank', 'king', 'pce_yoy', 'pce_3m', 'vix', 'w_fed', 'w_inflation', 'w_context',
+              'hit_rate', 'edge', 'ret_green', 'ret_yellow', 'ret_red',
+              'n_green', 'n_yellow', 'n_red', 'turnover']
+    with open(out_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(ranked)
+    print(f"[BT] {len(ranked):,}개 조합 → {args.out}")
+
+    base = evaluate_current(inputs, fwd)
+    print(f"\n📏 현재 설정 {THRESHOLDS} {WEIGHTS}")
+    print(f"   적중률 {base['hit_rate']:.1%}  G {base['ret_green']:+.2%}  Y {base['ret_yellow']:+.2%}"
+          f"  R {base['ret_red']:+.2%}  전환 {base['turnover']:.1f}회/년")
+
+    print(f"\n🏆 TOP {args.top}:")
+    for r in ranked[:args.top]:
+        print(f"  {r['rank']:>3}. king={r['king']:<4} yoy={r['pce_yoy']} 3m={r['pce_3m']} vix={r['vix']:<2}"
+              f"  w={r['w_fed']}/{r['w_inflation']}/{r['w_context']}"
+              f"  적중 {r['hit_rate']:.1%}  G {r['ret_green']:+.2%}  R {r['ret_red']:+.2%}"
+              f"  전환 {r['turnover']:.1f}/yr")
+
+
+if __name__ == '__main__':
+    main()
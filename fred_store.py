@@ -0,0 +1,175 @@
+"""
+FRED 관측치 로컬 저장소 — 시리즈별 JSON 파일 + 증분(delta) 수집
+- 저장된 마지막 날짜 이후만 요청 (observation_start)
+- 겹치는 구간 값이 바뀌면(수정치 발표) 전체 재수집
+- 메타데이터(last_updated) 프로브가 저장값과 같으면 관측치 요청 생략
+- 네트워크 실패 시 저장된 데이터로 graceful fallback
+"""
+
+import os
+import json
+import http_client
+from datetime import datetime, timezone, timedelta
+
+FRED_URL = 'https://api.stlouisfed.org/fred/series/observations'
+FRED_SERIES_URL = 'https://api.stlouisfed.org/fred/series'
+
+# 저장 위치 (Actions에서는 actions/cache로 보존)
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'fred')
+
+# 전체 수집 시 최소 관측치 수 (monitor/generator가 같은 파일을 공유하도록)
+DEFAULT_LIMIT = 252
+
+# 수정치 감지용으로 다시 받는 마지막 관측치 수
+OVERLAP = 3
+
+# 이 기간이 지나면 깊은 과거 수정치(연례 개정 등) 반영을 위해 전체 재수집
+FULL_REFRESH_DAYS = 7
+
+
+def _path(series_id):
+    return os.path.join(STORE_DIR, f'{series_id}.json')
+
+
+def load(series_id):
+    """저장된 시리즈 로드 (없으면 None)"""
+    try:
+        with open(_path(series_id), encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def save(entry):
+    """시리즈 저장 (임시 파일 → rename으로 원자적 교체)"""
+    try:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        path = _path(entry['series_id'])
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, separators=(',', ':'))
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[FRED] 저장소 쓰기 실패 {entry.get('series_id')}: {e}")
+
+
+def _request(series_id, api_key, timeout, **params):
+    """FRED observations 호출 → [[date, value], ...] (oldest first, 결측 '.' 제외)"""
+    query = {
+        'series_id': series_id,
+        'api_key': api_key,
+        'file_type': 'json',
+    }
+    query.update(params)
+    resp = http_client.get(FRED_URL, 'fred', params=query, timeout=timeout)
+    resp.raise_for_status()
+    observations = resp.json().get('observations', [])
+    result = [[o['date'], float(o['value'])] for o in observations if o['value'] not in ['.', '']]
+    result.sort(key=lambda x: x[0])
+    return result
+
+
+def probe(series_id, api_key, timeout=10):
+    """
+    시리즈 메타데이터만 조회 (관측치 없음, 수백 바이트)
+    반환: last_updated 문자열 (예: '2024-01-26 15:17:02-06'), 실패 시 None
+    """
+    try:
+        resp = http_client.get(FRED_SERIES_URL, 'fred_probe', params={
+            'series_id': series_id,
+            'api_key': api_key,
+            'file_type': 'json',
+        }, timeout=timeout)
+        resp.raise_for_status()
+        seriess = resp.json().get('seriess', [])
+        return seriess[0].get('last_updated') if seriess else None
+    except Exception as e:
+        print(f"[FRED] 프로브 실패 {series_id}: {e}")
+        return None
+
+
+def _full_pull(series_id, api_key, limit, timeout, start=None):
+    """최근 limit개 또는 (start가 있으면) start 이후 전체"""
+    if start:
+        obs = _request(series_id, api_key, timeout, sort_order='asc', observation_start=start)
+    else:
+        obs = _request(series_id, api_key, timeout, sort_order='desc', limit=limit)
+    print(f"[FRED] {series_id}: 전체 수집 {len(obs)}건" + (f" (since {start})" if start else ''))
+    return obs
+
+
+def _delta_pull(series_id, api_key, stored, timeout):
+    """
+    마지막 OVERLAP개 관측치부터 재요청
+    반환: 병합된 관측치, 수정치가 감지되면 None
+    """
+    start = stored[-min(OVERLAP, len(stored))][0]
+    fresh = _request(series_id, api_key, timeout, sort_order='asc', observation_start=start)
+
+    stored_tail = {d: v for d, v in stored if d >= start}
+    fresh_map   = {d: v for d, v in fresh}
+    for d, v in stored_tail.items():
+        if d not in fresh_map or abs(fresh_map[d] - v) > 1e-9:
+            print(f"[FRED] {series_id}: {d} 수정치 감지 ({v} → {fresh_map.get(d)})")
+            return None
+
+    last = stored[-1][0]
+    new = [[d, v] for d, v in fresh if d > last]
+    print(f"[FRED] {series_id}: 증분 수집 +{len(new)}건 (since {start})")
+    return stored + new
+
+
+def sync(series_id, api_key, limit=DEFAULT_LIMIT, timeout=30, last_updated=None, start=None):
+    """
+    저장소 갱신 후 최근 limit개 관측치 반환 ([[date, value], ...], oldest first)
+    - start('YYYY-MM-DD')를 주면 limit 대신 start 이후 전체 히스토리 (백필용)
+    - last_updated(probe 결과)가 저장값과 같으면: 요청 없이 저장분 반환
+    - 저장분이 부족하거나 FULL_REFRESH_DAYS 경과 시: 전체 수집 (저장된 히스토리 깊이 유지)
+    - 그 외: observation_start 기준 증분 수집
+    - 실패 시: 저장된 데이터 (없으면 [])
+    """
+    entry  = load(series_id)
+    stored = entry['observations'] if entry else []
+    now    = datetime.now(timezone.utc)
+
+    # 전체 수집 시 시작일: 요청된 start와 이미 저장된 히스토리 중 더 깊은 쪽
+    stored_start = entry.get('start') if entry else None
+    full_start   = min(d for d in (start, stored_start) if d) if (start or stored_start) else None
+
+    if start:
+        need_full = not stored or not stored_start or stored_start > start
+    else:
+        need_full = len(stored) < limit
+    if last_updated and not need_full and entry.get('last_updated') == last_updated:
+        print(f"[FRED] {series_id}: 변경 없음 (last_updated {last_updated}) — 저장분 사용")
+        return [o for o in stored if o[0] >= start] if start else stored[-limit:]
+    if entry and not need_full:
+        try:
+            full_at = datetime.fromisoformat(entry.get('full_pulled_at', ''))
+            need_full = now - full_at > timedelta(days=FULL_REFRESH_DAYS)
+        except ValueError:
+            need_full = True
+
+    try:
+        obs = None
+        if not need_full:
+            obs = _delta_pull(series_id, api_key, stored, timeout)
+        if obs is None:
+            obs = _full_pull(series_id, api_key, max(limit, DEFAULT_LIMIT), timeout, full_start)
+            entry = {'series_id': series_id, 'full_pulled_at': now.isoformat()}
+            if full_start:
+                entry['start'] = full_start
+        entry['observations'] = obs
+        entry['synced_at'] = now.isoformat()
+        if last_updated:
+            entry['last_updated'] = last_updated
+        save(entry)
+    except Exception as e:
+        print(f"[FRED] Error fetching {series_id}: {e}")
+        if stored:
+            print(f"[FRED] {series_id}: 저장된 데이터 사용 ({stored[-1][0]}까지)")
+        obs = stored
+
+    if start:
+        return [o for o in obs if o[0] >= start]
+    return obs[-limit:]
@@ -0,0 +1,250 @@
+"""
+yfinance .info 동시 수집기 — 고정 sleep 대신 토큰 버킷 속도 제한
+- 워커 수 제한 (YF_WORKERS) + 초당 요청 수 제한 (YF_RATE)
+- 429(Too Many Requests) 감지 시 속도를 절반으로 낮추고 재시도, 성공이 이어지면 서서히 복구
+- 종목별 지연시간/실패 리포트
+- 필드 그룹별 TTL 디스크 캐시: 장중 재실행은 가격만 갱신, 펀더멘탈은 캐시 재사용
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ===== 설정 =====
+FETCH_WORKERS = int(os.environ.get('YF_WORKERS', 4))
+RATE_PER_SEC  = float(os.environ.get('YF_RATE', 4))     # 초당 .info 요청 수 (상한)
+MIN_RATE      = 0.5                                      # 429 반복 시 하한
+MAX_RETRIES   = 3
+
+# ===== TTL 캐시 =====
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'fundamentals.json')
+
+# 필드 그룹 → (TTL 초, 필드) — TTL None이면 만료 없음
+FIELD_GROUPS = {
+    'static': (None, [
+        'shortName', 'longName', 'sector', 'industry', 'currency', 'exchange', 'quoteType',
+    ]),
+    'fundamental': (24 * 3600, [
+        'earningsQuarterlyGrowth', 'revenueGrowth', 'profitMargins', 'returnOnEquity',
+        'freeCashflow', 'totalRevenue', 'beta',
+        'trailingPE', 'forwardPE', 'pegRatio', 'priceToBook',
+    ]),
+    # 52주 수익률·이동평균은 generate_bottomup_data가 일봉으로 직접 계산 (.info 불필요)
+}
+
+# 가격 비율 지표 — 캐시 시점 가격 대비 현재가로 재환산 (이익/자본은 분기 단위로만 변함)
+PRICE_RATIO_FIELDS = ('trailingPE', 'forwardPE', 'pegRatio', 'priceToBook')
+
+# 점수 계산에 쓰는 .info 필드 전체 (체크포인트 등 경량 저장용)
+INFO_FIELDS = ('regularMarketPrice',) + tuple(f for _, fields in FIELD_GROUPS.values() for f in fields)
+
+
+class TokenBucket:
+    """
+    스레드 안전 토큰 버킷 (AIMD)
+    - acquire(): 토큰 1개가 생길 때까지 대기
+    - throttle(): 429 → 속도 절반 + 버킷 비움
+    - success(): 성공마다 속도 소폭 회복 (최대 max_rate)
+    """
+
+    def __init__(self, rate=RATE_PER_SEC, burst=None, min_rate=MIN_RATE):
+        self.max_rate = rate
+        self.rate     = rate
+        self.min_rate = min_rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens   = self.capacity
+        self.updated  = time.monotonic()
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+            self.updated = time.monotonic()
+            self.throttled += 1
+
+    def success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.1)
+
+
+def _is_rate_limited(exc):
+    text = f'{type(exc).__name__} {exc}'
+    return 'RateLimit' in text or 'Too Many Requests' in text or '429' in text
+
+
+def fetch_info(ticker, bucket, retries=MAX_RETRIES, deadline=None):
+    """
+    단일 종목 .info (429 시 버킷 감속 후 재시도)
+    deadline(time.monotonic 기준)이 지났으면 요청하지 않고 'deadline' 반환
+    반환: (info 또는 None, 소요초, 오류 문자열 또는 None)
+    """
+    import yfinance as yf
+
+    t0 = time.perf_counter()
+    error = None
+    for _ in range(retries + 1):
+        if deadline is not None and time.monotonic() > deadline:
+            return None, 0.0, 'deadline'
+        bucket.acquire()
+        try:
+            info = yf.Ticker(ticker).info
+            if not info or 'regularMarketPrice' not in info:
+                return None, time.perf_counter() - t0, 'no data'
+            bucket.success()
+            return info, time.perf_counter() - t0, None
+        except Exception as e:
+            error = str(e)[:80]
+            if not _is_rate_limited(e):
+                break
+            bucket.throttle()
+            print(f"  [RATE] {ticker}: 429 — 속도 {bucket.rate:.2f}/s로 감속 후 재시도")
+    return None, time.perf_counter() - t0, error
+
+
+# ── 캐시 ─────────────────────────────────────────────────────────
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_cache(cache):
+    """임시 파일 → rename (원자적 교체)"""
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        tmp = CACHE_FILE + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, separators=(',', ':'))
+        os.replace(tmp, CACHE_FILE)
+    except Exception as e:
+        print(f"[INFO] 캐시 쓰기 실패: {e}")
+
+
+def _store(cache, ticker, info, now):
+    """.info에서 그룹별 필드 + 수집 시점 가격 저장"""
+    entry = cache.setdefault(ticker, {})
+    for group, (_, fields) in FIELD_GROUPS.items():
+        entry[group] = {'at': now, 'fields': {k: info.get(k) for k in fields}}
+    entry['price'] = info.get('regularMarketPrice')
+
+
+def _from_cache(entry, price, now):
+    """
+    캐시 + 현재가 → .info 호환 dict (만료 그룹이 있으면 None)
+    가격 비율 지표는 price / 캐시 가격으로 재환산
+    """
+    if not entry or not price or not entry.get('price'):
+        return None
+    info = {}
+    for group, (ttl, _) in FIELD_GROUPS.items():
+        g = entry.get(group)
+        if not g or (ttl is not None and now - g['at'] > ttl):
+            return None
+        info.update(g['fields'])
+    info['regularMarketPrice'] = entry['price']
+    return reprice(info, price)
+
+
+def slim(info):
+    """.info → INFO_FIELDS만 남긴 dict"""
+    return {k: info.get(k) for k in INFO_FIELDS}
+
+
+def reprice(info, price):
+    """가격 비율 지표를 price 기준으로 재환산한 사본 (price 없으면 그대로)"""
+    old = info.get('regularMarketPrice')
+    if not price or not old:
+        return info
+    info = dict(info)
+    scale = price / old
+    for k in PRICE_RATIO_FIELDS:
+        if isinstance(info.get(k), (int, float)):
+            info[k] = info[k] * scale
+    info['regularMarketPrice'] = price
+    return info
+
+
+def fetch_all(tickers, workers=FETCH_WORKERS, rate=RATE_PER_SEC, prices=None,
+              on_result=None, deadline=None):
+    """
+    유니버스 .info 수집 (TTL 캐시 → 만료/미보유 종목만 동시 요청)
+    prices: {ticker: 현재가} — 주어진 종목만 캐시 사용 가능 (없으면 전부 새로 요청)
+    on_result(ticker, info, error): 종목 하나가 끝날 때마다 호출 (워커 스레드에서, 체크포인트용)
+    deadline: time.monotonic 기준 — 지나면 남은 종목은 요청하지 않음 (error='deadline')
+    반환: {ticker: info 또는 None} (입력 순서 유지)
+    """
+    prices = prices or {}
+    cache  = load_cache()
+    now    = time.time()
+
+    cached = {t: _from_cache(cache.get(t), prices.get(t), now) for t in tickers}
+    todo   = [t for t in tickers if cached[t] is None]
+    if len(todo) < len(tickers):
+        print(f"[INFO] 캐시 재사용 {len(tickers) - len(todo)}종목 (가격만 갱신) · 요청 {len(todo)}종목")
+
+    results = {t: (info, 0.0, None) for t, info in cached.items() if info is not None}
+    if on_result:
+        for t, (info, _, _) in results.items():
+            on_result(t, info, None)
+    if not todo:
+        return {t: results[t][0] for t in tickers}
+
+    bucket = TokenBucket(rate)
+    cache_lock = threading.Lock()
+
+    def _one(t):
+        res = fetch_info(t, bucket, deadline=deadline)
+        if res[0]:
+            with cache_lock:
+                _store(cache, t, res[0], now)
+        if on_result:
+            on_result(t, res[0], res[2])
+        return res
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        fetched = dict(zip(todo, pool.map(_one, todo)))
+    total = time.perf_counter() - t0
+
+    save_cache(cache)
+    results.update(fetched)
+
+    skipped = [t for t, (_, _, err) in fetched.items() if err == 'deadline']
+    fetched = {t: r for t, r in fetched.items() if r[2] != 'deadline'}
+    failed = {t: err for t, (info, _, err) in fetched.items() if info is None}
+    latencies = sorted(sec for _, sec, _ in fetched.values())
+    if len(fetched) <= 50:
+        for t, (info, sec, err) in fetched.items():
+            print(f"  {'✅' if info else '❌'} {t:<6} {sec:5.2f}s" + (f"  ({err})" if err else ''))
+    if latencies:
+        print(f"[INFO] {len(fetched) - len(failed)}/{len(fetched)} 성공 · {total:.1f}s "
+              f"(workers={workers}, rate≤{rate:g}/s, 중앙값 {latencies[len(latencies) // 2]:.2f}s, "
+              f"최대 {latencies[-1]:.2f}s, 429 감속 {bucket.throttled}회)")
+    if failed:
+        print(f"[INFO] 실패: {', '.join(failed)}")
+    if skipped:
+        print(f"[INFO] ⏱ 시간 예산 초과 — {len(skipped)}종목 미수집 (다음 실행에서 이어서)")
+
+    return {t: results[t][0] for t in tickers}
@@ -9,27 +9,24 @@
 import json
 import time
 import os
-import requests
+import threading
+import http_client
 from datetime import datetime, timezone, timedelta
 
-import yfinance as yf
-try:
-    import pandas_ta as ta
-    HAS_PANDAS_TA = True
-except ImportError:
-    HAS_PANDAS_TA = False
-    print("[WARNING] pandas_ta not installed — 단기 지표 비활성화. pip install pandas_ta")
+import numpy as np
+
+import fred_store
+import signal_engine
+import fundamentals
+import indicators
+import price_store
+import scoring
+import universe
+from timeseries import TimeSeries, finite_or
 
 # ===== 설정 =====
-TICKERS = [
-    'MSFT', 'AAPL', 'GOOGL', 'AMZN', 'META', 'TSLA',  # Big Tech
-    'NVDA', 'TSM', 'ASML',                              # Semiconductors
-    'LLY',                                              # Healthcare
-    'JPM', 'V',                                         # Financials
-    'XOM',                                              # Energy
-    'WMT', 'COST',                                      # Consumer Staples
-    'GE', 'CAT'                                         # Industrials
-]
+# 유니버스: universes/<이름>.txt|.csv (--universe 또는 BOTTOMUP_UNIVERSE, 기본 default)
+DEFAULT_UNIVERSE_NAME, TICKERS = universe.load_universe(universe.DEFAULT_UNIVERSE)
 
 WEIGHTS = {
     'momentum': 0.25,
@@ -46,6 +43,16 @@ GIST_TOKEN = os.environ.get('GIST_TOKEN', '')
 # FRED API (탑다운 데이터용 — Secrets로 주입됨)
 FRED_API_KEY = os.environ.get('FRED_API_KEY', '')
 
+# 수집 체크포인트 (종목 단위 JSONL — 중단된 실행은 같은 날 다음 실행에서 이어서)
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'bottomup_checkpoint')
+
+# .info 수집 시간 예산 (초, 0 = 무제한) — 넘으면 남은 종목은 다음 실행으로
+TIME_BUDGET_SEC = int(os.environ.get('BOTTOMUP_TIME_BUDGET_SEC', 0))
+
+# 장중 증분 재계산 상태 (마지막 전체 실행의 펀더멘탈/밸류에이션 점수 + 모멘텀 입력)
+RESCORE_STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'bottomup_state.json')
+INCREMENTAL_MAX_AGE_H = 12   # 이보다 오래된 전체 실행 결과면 증분 대신 전체 실행
+
 
 # ===== 유틸리티 =====
 
@@ -57,117 +64,142 @@ def safe_get(info, key, default=None):
     return value
 
 
-def minmax_normalize(values, inverse=False):
-    """
-    Min-Max 정규화 → -1 ~ +1 범위
-    inverse=True: 낮은 값이 좋음 (PE, PEG 등)
-    """
-    valid = [v for v in values if v is not None]
-    if not valid or len(valid) < 2:
-        return [0.0] * len(values)
+# ===== 가격 지표 계산 (유니버스 일괄) =====
 
-    min_val = min(valid)
-    max_val = max(valid)
+# 가격 지표에 필요한 일봉 행 수 (52주 수익률 252행 + 여유)
+PRICE_ROWS = 260
 
-    if max_val == min_val:
-        return [0.0] * len(values)
+# 지표별 기본값 (히스토리 부족 시) — 이동평균은 None이면 현재가로 대체
+PRICE_DEFAULTS = {'rsi': 50.0, 'macd_cross': 0.0, 'perf_5d': 0.0,
+                  'perf_52w': 0.0, 'sma50': None, 'sma200': None}
 
-    result = []
-    for v in values:
-        if v is None:
-            result.append(0.0)
-        else:
-            normalized = (v - min_val) / (max_val - min_val)
-            if inverse:
-                normalized = 1 - normalized
-            scaled = (normalized * 2) - 1  # 0~1 → -1~+1
-            result.append(scaled)
-    return result
 
+def download_closes(tickers, rows=PRICE_ROWS):
+    """유니버스 일봉 종가 — 로컬 저장소 증분 갱신 후 마지막 rows행(≈1년) 뷰 (날짜 × 종목)"""
+    return price_store.load(tickers, 'close', rows=rows)
 
-# ===== 단기 지표 계산 (pandas_ta 사용) =====
 
-def calc_short_term_indicators(ticker):
+def calc_price_indicators(close):
     """
-    yfinance 3개월 일봉으로 단기 지표 산출
-    반환: {'rsi': float, 'macd_cross': float, 'perf_5d': float}
-    실패 시: None 반환
+    종가 프레임 전체에서 가격 기반 모멘텀 지표를 한 번에 산출 (.info 불필요)
+    반환: {ticker: {'rsi', 'macd_cross', 'perf_5d', 'perf_52w', 'sma50', 'sma200'} 또는 None(20일 미만)}
     """
-    if not HAS_PANDAS_TA:
-        return None
-
-    try:
-        hist = yf.Ticker(ticker).history(period='3mo')
-        if len(hist) < 20:
-            return None
-
-        close = hist['Close']
-
-        # RSI (14일)
-        rsi_series = ta.rsi(close, length=14)
-        latest_rsi = float(rsi_series.dropna().iloc[-1]) if not rsi_series.dropna().empty else 50.0
-
-        # MACD (12, 26, 9) → 골든크로스: MACD > Signal이면 +1, 아니면 -1
-        macd_df = ta.macd(close, fast=12, slow=26, signal=9)
-        if macd_df is not None and len(macd_df.dropna()) > 0:
-            last = macd_df.dropna().iloc[-1]
-            macd_val   = last['MACD_12_26_9']
-            signal_val = last['MACDs_12_26_9']
-            macd_cross = 1.0 if macd_val > signal_val else -1.0
-        else:
-            macd_cross = 0.0
-
-        # 5일 수익률
-        if len(close) >= 6:
-            perf_5d = float((close.iloc[-1] / close.iloc[-5]) - 1)
-        else:
-            perf_5d = 0.0
+    # RSI (14일) + MACD (12, 26, 9) — 저장된 재귀 상태에 새 봉만 반영 (공백/수정주가 종목만 전체 재계산)
+    # 골든크로스: MACD > Signal이면 +1, 아니면 -1
+    warm = indicators.warm_values(np.asarray(close.index, dtype='datetime64[D]'),
+                                  close.to_numpy().T, list(close.columns))
+    cross = np.where(np.isfinite(warm['signal']), np.where(warm['macd'] > warm['signal'], 1.0, -1.0), np.nan)
+
+    # 5일 수익률
+    perf_5d = close / close.shift(4) - 1
+
+    # 52주(252거래일) 수익률 + 이동평균 — 마지막 행만 필요 (휴장/결측은 직전 종가로)
+    filled = close.ffill()
+    last = {name: dict(zip(close.columns, y)) for name, y in (('rsi', warm['rsi']), ('macd_cross', cross))}
+    last['perf_5d'] = perf_5d.ffill().iloc[-1]
+    year_ago = filled.iloc[-253] if len(filled) > 252 else np.nan
+    last['perf_52w'] = filled.iloc[-1] / year_ago - 1
+    last['sma50']  = filled.rolling(50).mean().iloc[-1]
+    last['sma200'] = filled.rolling(200).mean().iloc[-1]
+
+    counts = close.count()
+    result = {}
+    for ticker in close.columns:
+        if counts[ticker] < 20:
+            result[ticker] = None
+            continue
+        result[ticker] = {name: finite_or(last[name][ticker], default) for name, default in PRICE_DEFAULTS.items()}
+    return result
 
-        return {'rsi': latest_rsi, 'macd_cross': macd_cross, 'perf_5d': perf_5d}
 
-    except Exception as e:
-        print(f"  [SHORT_TERM_ERROR] {ticker}: {e}")
-        return None
+# ===== 데이터 수집 =====
 
+def _checkpoint_path(universe_name):
+    return os.path.join(CHECKPOINT_DIR, f'{universe_name}.jsonl')
 
-# ===== 장기 데이터 수집 =====
 
-def fetch_stock_data(ticker):
-    """yfinance .info로 장기 지표 수집"""
+def load_checkpoint(universe_name, run_date):
+    """오늘(run_date) 수집 완료된 종목 → {ticker: slim info}"""
+    done = {}
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        if not info or 'regularMarketPrice' not in info:
-            return None
-        return info
-    except Exception as e:
-        print(f"  [ERROR] {ticker}: {e}")
-        return None
+        with open(_checkpoint_path(universe_name), encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # 중단 시점에 잘린 마지막 줄
+                if rec.get('d') == run_date and rec.get('info'):
+                    done[rec['ticker']] = rec['info']
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def clear_checkpoint(universe_name):
+    try:
+        os.remove(_checkpoint_path(universe_name))
+    except FileNotFoundError:
+        pass
 
 
-def collect_all_data():
-    """모든 종목 장기 + 단기 데이터 수집"""
+def collect_all_data(tickers=None, universe_name=DEFAULT_UNIVERSE_NAME, run_date=None):
+    """
+    모든 종목 장기 + 단기 데이터 수집
+    - 종목별 .info 완료 즉시 체크포인트에 append → 같은 날 재실행 시 완료 종목은 건너뜀
+    - TIME_BUDGET_SEC 초과 시 남은 종목은 pending 처리
+    반환: (all_data, complete)
+    """
+    tickers  = tickers or TICKERS
+    run_date = run_date or datetime.now(timezone(timedelta(hours=9))).strftime('%Y-%m-%d')
     all_data = []
 
-    for i, ticker in enumerate(TICKERS, 1):
-        print(f"[{i}/{len(TICKERS)}] {ticker}...", end=" ")
-
-        info = fetch_stock_data(ticker)
-        if not info:
-            print("❌ Failed (info)")
-            all_data.append({'ticker': ticker, 'info': None, 'short_term': None, 'error': True})
-            time.sleep(0.5)
-            continue
-
-        # 단기 지표 별도 수집 (history API 사용)
-        short = calc_short_term_indicators(ticker)
-        rsi_str = f"RSI:{short['rsi']:.0f}" if short else "RSI:N/A"
-        print(f"✅ ({rsi_str})")
-
-        all_data.append({'ticker': ticker, 'info': info, 'short_term': short, 'error': False})
-        time.sleep(0.3)
+    # 가격 지표: 유니버스 일봉 1회 배치 다운로드
+    t0 = time.perf_counter()
+    try:
+        close = download_closes(tickers)
+        price_all = calc_price_indicators(close)
+        prices = {t: finite_or(v, None) for t, v in close.ffill().iloc[-1].items()}
+        print(f"[PRICE] {len(tickers)}개 종목 일봉 일괄 수집 ({time.perf_counter() - t0:.1f}s)")
+    except Exception as e:
+        print(f"[SHORT_TERM_ERROR] 일봉 일괄 수집 실패: {e}")
+        price_all, prices = {}, {}
+
+    # 체크포인트 재개
+    done = load_checkpoint(universe_name, run_date)
+    if done:
+        print(f"[CHECKPOINT] {len(done)}/{len(tickers)}종목 이어받기 ({universe_name}, {run_date})")
+    todo = [t for t in tickers if t not in done]
+
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    lock = threading.Lock()
+    errors = {}
+    with open(_checkpoint_path(universe_name), 'a', encoding='utf-8') as ckpt:
+        def _on_result(ticker, info, error):
+            if not info:
+                errors[ticker] = error
+                return
+            line = json.dumps({'d': run_date, 'ticker': ticker, 'info': fundamentals.slim(info)})
+            with lock:
+                ckpt.write(line + '\n')
+                ckpt.flush()
+
+        # 장기 지표: .info (TTL 캐시 + 현재가 재환산, 만료 종목만 동시 수집)
+        deadline = time.monotonic() + TIME_BUDGET_SEC if TIME_BUDGET_SEC else None
+        infos = fundamentals.fetch_all(todo, prices=prices, on_result=_on_result, deadline=deadline)
+
+    complete = True
+    for ticker in tickers:
+        if ticker in done:
+            info = fundamentals.reprice(done[ticker], prices.get(ticker))
+        else:
+            info = infos.get(ticker)
+        pending = errors.get(ticker) == 'deadline'
+        complete &= not pending
+        ind = price_all.get(ticker) if info else None
+        all_data.append({'ticker': ticker, 'info': info, 'price_ind': ind,
+                         'error': info is None, 'pending': pending})
 
-    return all_data
+    return all_data, complete
 
 
 # ===== 지표 추출 =====
@@ -181,19 +213,19 @@ def calculate_raw_metrics(all_data):
             metrics.append(None)
             continue
 
-        info  = item['info']
-        short = item['short_term']  # None 가능
+        info = item['info']
+        ind  = item['price_ind'] or PRICE_DEFAULTS  # 일봉 부족 시 중립
 
-        # 장기 모멘텀
-        perf_52w      = safe_get(info, 'fiftyTwoWeekChange', 0) or 0
+        # 장기 모멘텀 (일봉 기반)
         current_price = safe_get(info, 'regularMarketPrice', 0) or 0
-        sma200        = safe_get(info, 'twoHundredDayAverage', current_price) or current_price
-        sma50         = safe_get(info, 'fiftyDayAverage', current_price) or current_price
+        perf_52w      = ind['perf_52w']
+        sma200        = ind['sma200'] or current_price
+        sma50         = ind['sma50'] or current_price
 
-        # 단기 모멘텀 (short_term이 없으면 중립)
-        rsi       = short['rsi']       if short else 50.0
-        macd_cross = short['macd_cross'] if short else 0.0
-        perf_5d   = short['perf_5d']   if short else 0.0
+        # 단기 모멘텀
+        rsi        = ind['rsi']
+        macd_cross = ind['macd_cross']
+        perf_5d    = ind['perf_5d']
 
         # 펀더멘탈
         eps_growth     = safe_get(info, 'earningsQuarterlyGrowth', 0) or 0
@@ -248,99 +280,22 @@ def calculate_raw_metrics(all_data):
 # ===== 정규화 및 점수 계산 =====
 
 def normalize_and_score(metrics):
+    """유효 종목 지표 → scoring 행렬 엔진 → 종목별 결과 dict"""
     valid_metrics = [m for m in metrics if m is not None]
 
     if len(valid_metrics) < 2:
         return []
 
-    # --- 장기 모멘텀 정규화 ---
-    perf_52w_norm  = minmax_normalize([m['perf_52w']  for m in valid_metrics])
-
-    # --- 단기 모멘텀 정규화 (NEW) ---
-    perf_5d_norm   = minmax_normalize([m['perf_5d']   for m in valid_metrics])
-
-    # RSI 정규화: 30~70이 정상 구간. 70 초과(과매수) → 패널티, 30 미만(과매도) → 보너스
-    def rsi_to_score(rsi):
-        if rsi >= 70:   return -0.5              # 과매수 패널티
-        elif rsi <= 30: return  0.5              # 과매도 보너스 (대칭)
-        else:           return (rsi - 50) / 20 * 0.5  # 30~70 선형: -0.5 ~ +0.5
-
-    rsi_scores = [rsi_to_score(m['rsi']) for m in valid_metrics]
-
-    # MACD: 이미 -1 or +1 (골든/데드크로스)
-    macd_scores = [m['macd_cross'] for m in valid_metrics]
-
-    # --- 펀더멘탈 정규화 ---
-    eps_norm    = minmax_normalize([m['eps_growth']     for m in valid_metrics])
-    rev_norm    = minmax_normalize([m['revenue_growth'] for m in valid_metrics])
-    margin_norm = minmax_normalize([m['profit_margin']  for m in valid_metrics])
-    roe_norm    = minmax_normalize([m['roe']            for m in valid_metrics])
-    fcf_norm    = minmax_normalize([m['fcf_margin']     for m in valid_metrics])
-
-    # --- 밸류에이션 정규화 (낮을수록 좋음) ---
-    pe_norm  = minmax_normalize([m['pe']         for m in valid_metrics], inverse=True)
-    fpe_norm = minmax_normalize([m['forward_pe'] for m in valid_metrics], inverse=True)
-    peg_norm = minmax_normalize([m['peg']        for m in valid_metrics], inverse=True)
-
-    # --- 리스크: Beta 1 근처가 좋음 ---
-    def beta_score(beta):
-        if beta < 0.5:   return -0.3
-        elif beta <= 1.5: return  0.5
-        else:             return -0.5
-
-    beta_scores = [beta_score(m['beta']) for m in valid_metrics]
+    _, x = scoring.metric_matrix(valid_metrics)
+    scores = scoring.score_matrix(x, WEIGHTS)
+    rounded = {k: [round(v, 2) for v in arr.tolist()] for k, arr in scores.items()}
 
     results = []
     for i, m in enumerate(valid_metrics):
-
-        # 모멘텀 점수 (장기 40% + 단기 60%)
-        momentum = (
-            perf_52w_norm[i] * 0.40    # 52주 수익률 (장기 추세)
-            + perf_5d_norm[i]  * 0.30  # 5일 수익률  (주간 모멘텀)
-            + rsi_scores[i]    * 0.20  # RSI         (과매수/과매도)
-            + macd_scores[i]   * 0.10  # MACD 크로스 (단기 방향성)
-        )
-        momentum = max(-1.0, min(1.0, momentum))
-
-        # 펀더멘탈 점수
-        fundamental = (
-            eps_norm[i]    * 0.25
-            + rev_norm[i]    * 0.20
-            + margin_norm[i] * 0.20
-            + roe_norm[i]    * 0.20
-            + fcf_norm[i]    * 0.15
-        )
-        fundamental = max(-1.0, min(1.0, fundamental))
-
-        # 밸류에이션 점수
-        valuation = (
-            fpe_norm[i] * 0.40
-            + peg_norm[i] * 0.35
-            + pe_norm[i]  * 0.25
-        )
-        valuation = max(-1.0, min(1.0, valuation))
-
-        # 리스크
-        risk = beta_scores[i]
-
-        # 최종 점수
-        final = (
-            WEIGHTS['momentum']    * momentum
-            + WEIGHTS['fundamental'] * fundamental
-            + WEIGHTS['valuation']   * valuation
-        )
-        final = max(-1.0, min(1.0, final))
-
         results.append({
             'ticker': m['ticker'],
             'error': False,
-            'scores': {
-                'momentum':    round(momentum, 2),
-                'fundamental': round(fundamental, 2),
-                'valuation':   round(valuation, 2),
-                'risk':        round(risk, 2),
-                'final':       round(final, 2),
-            },
+            'scores': {k: rounded[k][i] for k in ('momentum', 'fundamental', 'valuation', 'risk', 'final')},
             'raw': {
                 'price':          m['price'],
                 'sma200':         m['sma200'],
@@ -363,87 +318,218 @@ def normalize_and_score(metrics):
     return results
 
 
+# ===== 장중 증분 재계산 (가격 입력만) =====
+
+def load_rescore_state():
+    try:
+        with open(RESCORE_STATE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_rescore_state(state):
+    try:
+        os.makedirs(os.path.dirname(RESCORE_STATE_FILE), exist_ok=True)
+        tmp = RESCORE_STATE_FILE + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, RESCORE_STATE_FILE)
+    except Exception as e:
+        print(f"[INCR] 상태 저장 실패: {e}")
+
+
+def save_rescore_state(output, metrics, universe_name, tickers, complete):
+    """
+    전체 실행 결과 → 증분 재계산 상태 (종목 순서 = normalize_and_score 입력 순서)
+    그룹 점수는 반올림 전 값으로 저장 → 증분 최종 점수가 전체 실행과 같은 값
+    """
+    valid = [m for m in metrics if m is not None]
+    by_ticker = {r['ticker']: r for r in output['data'] if not r.get('error')}
+    if len(valid) < 2:
+        return
+    _, x = scoring.metric_matrix(valid)
+    scores = scoring.score_matrix(x, WEIGHTS)
+    now = datetime.now(timezone.utc).isoformat()
+    _write_rescore_state({
+        'universe': universe_name,
+        'tickers': tickers,
+        'weights': WEIGHTS,
+        'complete': complete,
+        'full_at': now,
+        'checked_at': now,
+        'valid': [m['ticker'] for m in valid],
+        'fundamental': scores['fundamental'].tolist(),
+        'valuation': scores['valuation'].tolist(),
+        'risk': scores['risk'].tolist(),
+        'raw': {m['ticker']: by_ticker[m['ticker']]['raw'] for m in valid},
+        'errors': [r for r in output['data'] if r.get('error')],
+    })
+
+
+def last_checked():
+    """마지막으로 바텀업 랭킹을 확인한 시각 (전체/증분 실행 모두, 없으면 None)"""
+    state = load_rescore_state()
+    try:
+        return datetime.fromisoformat(state['checked_at'])
+    except Exception:
+        return None
+
+
+def rescore_prices(universe_name, tickers):
+    """
+    가격 입력(52주/5일 수익률, RSI, MACD, 이동평균, 현재가)만 다시 받아 모멘텀 블록과 최종 점수만 재계산
+    펀더멘탈/밸류에이션/리스크 점수는 마지막 전체 실행 값 유지
+    반환: (results, state) — 전체 실행이 필요하면 (None, None)
+    """
+    state = load_rescore_state()
+    reason = None
+    if not state:
+        reason = '상태 없음'
+    elif state.get('universe') != universe_name or state.get('tickers') != tickers:
+        reason = '유니버스 변경'
+    elif state.get('weights') != WEIGHTS:
+        reason = '가중치 변경'
+    elif not state.get('complete'):
+        reason = '직전 전체 실행이 부분 결과'
+    else:
+        age_h = (datetime.now(timezone.utc) - datetime.fromisoformat(state['full_at'])).total_seconds() / 3600
+        if age_h > INCREMENTAL_MAX_AGE_H:
+            reason = f'전체 실행 {age_h:.0f}시간 경과'
+    if reason:
+        print(f"[INCR] 증분 불가 ({reason}) — 전체 실행")
+        return None, None
+
+    valid = state['valid']
+    try:
+        close = download_closes(tickers)
+        price_all = calc_price_indicators(close)
+        prices = {t: finite_or(v, None) for t, v in close.ffill().iloc[-1].items()}
+    except Exception as e:
+        print(f"[INCR] 가격 갱신 실패: {e} — 전체 실행")
+        return None, None
+
+    ind = [price_all.get(t) or PRICE_DEFAULTS for t in valid]
+    x = np.full((len(valid), len(scoring.METRICS)), np.nan)
+    col = {k: i for i, k in enumerate(scoring.METRICS)}
+    for k in ('perf_52w', 'perf_5d', 'rsi', 'macd_cross'):
+        x[:, col[k]] = [d[k] for d in ind]
+
+    groups = {
+        'momentum': scoring.momentum_scores(x),
+        'fundamental': state['fundamental'],
+        'valuation': state['valuation'],
+    }
+    final = scoring.blend(groups, WEIGHTS)
+
+    results = []
+    for i, t in enumerate(valid):
+        raw = dict(state['raw'][t])
+        price = prices.get(t) or raw['price']
+        raw.update({
+            'price': price,
+            'sma200': ind[i]['sma200'] or price,
+            '52w_change': round(ind[i]['perf_52w'], 4),
+            '5d_change': round(ind[i]['perf_5d'], 4),
+            'rsi': round(ind[i]['rsi'], 1),
+            'macd_cross': ind[i]['macd_cross'],
+        })
+        results.append({
+            'ticker': t,
+            'error': False,
+            'scores': {
+                'momentum': round(float(groups['momentum'][i]), 2),
+                'fundamental': round(state['fundamental'][i], 2),
+                'valuation': round(state['valuation'][i], 2),
+                'risk': round(state['risk'][i], 2),
+                'final': round(float(final[i]), 2),
+            },
+            'raw': raw,
+        })
+    return results, state
+
+
+def ranking_changed(output):
+    """기존 bottomup_data.json과 순위/반올림 점수가 다르면 True"""
+    output_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), OUTPUT_FILE)
+    try:
+        with open(output_path, encoding='utf-8') as f:
+            prev = json.load(f)
+    except Exception:
+        return True
+
+    def _key(out):
+        return out.get('universe'), [(r['ticker'], r.get('rank'), r.get('scores')) for r in out.get('data', [])]
+
+    return _key(prev) != _key(output)
+
+
 # ===== 탑다운 스냅샷 (Gist td 필드용) =====
 
 def fetch_topdown_snapshot():
     """
-    Gist td 필드용 — VIX, Composite, Spread, PCE만 미니 조회
+    Gist td 필드 — wdklab_monitor.calculate_signal()이 남긴 topdown_snapshot.json 재사용
+    스냅샷이 없거나 오래됐으면 FRED 로컬 저장소로 같은 규칙(signal_engine)을 직접 계산
     실패해도 None 반환 (Gist 저장 자체를 막지 않음)
     """
+    snap = signal_engine.load_snapshot()
+    if snap:
+        td = signal_engine.snapshot_to_td(snap)
+        print(f"[TD] ✅ 스냅샷 재사용 ({snap['computed_at'][:16]} 계산, {snap['source']}) "
+              f"Composite:{td['comp']:.3f}")
+        return td
+
     if not FRED_API_KEY:
         print("[TD] FRED_API_KEY 없음 — td 스냅샷 건너뜀")
         return None
 
     def _fred(series_id, limit=30):
-        try:
-            r = requests.get(
-                'https://api.stlouisfed.org/fred/series/observations',
-                params={
-                    'series_id': series_id,
-                    'api_key': FRED_API_KEY,
-                    'file_type': 'json',
-                    'sort_order': 'desc',
-                    'limit': limit
-                },
-                timeout=15
-            )
-            obs = r.json().get('observations', [])
-            vals = [float(o['value']) for o in obs if o['value'] not in ['.', '']]
-            return list(reversed(vals))  # oldest first
-        except:
-            return []
+        # 로컬 저장소 공유 (wdklab_monitor와 같은 파일) — 새 관측치만 증분 수집
+        obs = fred_store.sync(series_id, FRED_API_KEY, limit=limit, timeout=15)
+        return TimeSeries.from_pairs(obs)  # oldest first
 
     try:
+        from wdklab_monitor import THRESHOLDS, WEIGHTS
+
         dgs2  = _fred('DGS2', 25)
         dgs10 = _fred('DGS10', 5)
         vix   = _fred('VIXCLS', 5)
         pce   = _fred('PCEPILFE', 14)
         baa   = _fred('BAMLC0A0CM', 5)
 
-        vix_val = vix[-1] if vix else 20.0
-        spread  = (dgs10[-1] - dgs2[-1]) if dgs10 and dgs2 else 0.0
-        pce_yoy = ((pce[-1] / pce[-13]) - 1) * 100 if len(pce) >= 13 else 2.5
-        dgs2_change_bp = (dgs2[-1] - dgs2[-21]) * 100 if len(dgs2) >= 21 else 0.0
-
-        # King 신호 (Fed, 2Y 20일 변화량)
-        if dgs2_change_bp <= -10:  fed = 1
-        elif dgs2_change_bp >= 10: fed = -1
-        else:                      fed = 0
-
-        # Queen 신호 (PCE YoY + 3m)
-        pce_3m = ((pce[-1] / pce[-4]) ** 4 - 1) * 100 if len(pce) >= 4 else 2.5
-        if pce_yoy <= 2.6 and pce_3m <= 2.2:   infl = 1
-        elif pce_yoy > 2.6 and pce_3m > 2.2:   infl = -1
-        else:                                    infl = 0
-
-        # Context 신호 (VIX + Spread + BAA)
-        ctx_scores = []
-        if vix_val <= 18:    ctx_scores.append(1)
-        elif vix_val >= 30:  ctx_scores.append(-1)
-        else:                ctx_scores.append(0)
-        if spread >= 0.25:   ctx_scores.append(1)
-        elif spread <= -0.25: ctx_scores.append(-1)
-        else:                ctx_scores.append(0)
-        baa_val = baa[-1] if baa else 2.0
-        if baa_val <= 2.0:   ctx_scores.append(1)
-        elif baa_val >= 3.0: ctx_scores.append(-1)
-        else:                ctx_scores.append(0)
-        ctx_mean = sum(ctx_scores) / len(ctx_scores)
-        ctx = 1 if ctx_mean > 0.33 else (-1 if ctx_mean < -0.33 else 0)
-
-        # Composite (wdklab_monitor.py와 동일 가중치)
-        composite = round(0.50 * fed + 0.30 * infl + 0.20 * ctx, 3)
-
-        print(f"[TD] ✅ VIX:{vix_val:.1f} Spread:{spread:.2f} PCE:{pce_yoy:.1f}% Composite:{composite:.3f}")
-        return {
-            'comp': composite,
-            'vix':  round(vix_val, 1),
-            'sp':   round(spread, 3),
-            'pce':  round(pce_yoy, 2),
-            'fed':  fed,
-            'infl': infl,
-            'ctx':  ctx
+        vix_val = vix.last(20.0)
+        spread  = (dgs10.last() - dgs2.last()) if len(dgs10) and len(dgs2) else 0.0
+        baa_val = baa.last(2.0)
+        pce_yoy = finite_or(pce.yoy(), 2.5)
+        pce_3m  = finite_or(pce.annualized(3), 2.5)
+        dgs2_change_bp = finite_or(dgs2.change(20), 0.0) * 100
+
+        fed  = int(signal_engine.fed_signal(dgs2_change_bp, THRESHOLDS['king']))
+        infl = int(signal_engine.inflation_signal(pce_yoy, pce_3m, THRESHOLDS['pce_yoy'], THRESHOLDS['pce_3m']))
+        ctx  = int(signal_engine.context_signal(vix_val, spread, baa_val, THRESHOLDS['vix']))
+        composite = float(signal_engine.composite_score(fed, infl, ctx, WEIGHTS))
+
+        result = {
+            'signal': str(signal_engine.signal_label(composite)),
+            'composite': composite,
+            'fed_signal': fed,
+            'inflation_signal': infl,
+            'context_signal': ctx,
+            'dgs2_change_bp': dgs2_change_bp,
+            'pce_yoy': pce_yoy,
+            'pce_3m_ann': pce_3m,
+            'vix': vix_val,
+            'spread': spread,
+            'baa': baa_val,
         }
+        snap = signal_engine.build_snapshot(
+            result, THRESHOLDS, WEIGHTS, source='generate_bottomup_data',
+            observations={sid: ts.last_date() for sid, ts in
+                          (('DGS2', dgs2), ('DGS10', dgs10), ('VIXCLS', vix), ('PCEPILFE', pce), ('BAMLC0A0CM', baa))})
+        signal_engine.save_snapshot(snap)
+
+        print(f"[TD] ✅ FRED 직접 계산 VIX:{vix_val:.1f} Spread:{spread:.2f} PCE:{pce_yoy:.1f}% Composite:{composite:.3f}")
+        return signal_engine.snapshot_to_td(snap)
 
     except Exception as e:
         print(f"[TD] ❌ 실패: {e}")
@@ -462,7 +548,7 @@ def push_to_gist(snapshot):
         headers = {'Authorization': f'token {GIST_TOKEN}'}
 
         # 기존 Gist 읽기
-        r = requests.get(f'https://api.github.com/gists/{GIST_ID}', headers=headers, timeout=15)
+        r = http_client.get(f'https://api.github.com/gists/{GIST_ID}', 'gist', headers=headers)
         r.raise_for_status()
 
         raw_content = r.json()['files'].get('history_data.json', {}).get('content', '{"snapshots":[]}')
@@ -476,8 +562,8 @@ def push_to_gist(snapshot):
 
         # Gist 업데이트
         payload = {'files': {'history_data.json': {'content': json.dumps(history, ensure_ascii=False)}}}
-        r2 = requests.patch(f'https://api.github.com/gists/{GIST_ID}', headers=headers,
-                            json=payload, timeout=15)
+        r2 = http_client.patch(f'https://api.github.com/gists/{GIST_ID}', 'gist',
+                               headers=headers, json=payload)
         r2.raise_for_status()
 
         print(f"[GIST] ✅ 히스토리 업데이트 완료 (총 {len(history['snapshots'])}일)")
@@ -488,53 +574,83 @@ def push_to_gist(snapshot):
 
 # ===== 메인 =====
 
-def main():
+def main(universe_name=None, incremental=False):
     kst = timezone(timedelta(hours=9))
     now_kst = datetime.now(kst)
     today_str = now_kst.strftime('%Y-%m-%d')
+    universe_name, tickers = universe.load_universe(universe_name)
 
     print("=" * 55)
     print("WDK LAB 바텀업 데이터 생성기 v3.0")
     print("📊 단기 민감도 개선 (RSI + MACD + 5일 모멘텀)")
+    print(f"🌐 유니버스: {universe_name} ({len(tickers)}종목)")
     print("=" * 55)
 
-    # 1. 데이터 수집
-    print("\n📡 데이터 수집 중...")
-    all_data = collect_all_data()
-
-    # 2. 지표 추출
-    print("\n📈 지표 분석 중...")
-    metrics = calculate_raw_metrics(all_data)
-
-    # 3. 정규화 및 점수 계산
-    print("🔢 점수 계산 중...")
-    results = normalize_and_score(metrics)
-
-    # 4. 정렬 및 순위
+    # 0. 장중 증분: 가격 입력만 갱신 → 모멘텀 + 최종 점수만 재계산
+    results, state = rescore_prices(universe_name, tickers) if incremental else (None, None)
+    if results is not None:
+        print(f"[INCR] 가격 기반 재계산 (펀더멘탈: {state['full_at'][:16]} 전체 실행 값)")
+        errors = state['errors']
+        complete = True
+    else:
+        # 1. 데이터 수집
+        print("\n📡 데이터 수집 중...")
+        all_data, complete = collect_all_data(tickers, universe_name, today_str)
+
+        # 2. 지표 추출
+        print("\n📈 지표 분석 중...")
+        metrics = calculate_raw_metrics(all_data)
+
+        # 3. 정규화 및 점수 계산
+        print("🔢 점수 계산 중...")
+        results = normalize_and_score(metrics)
+
+        # 5. 에러 종목 (시간 예산 초과로 미수집된 종목은 pending 표시)
+        errors = [dict({'ticker': d['ticker'], 'error': True, 'scores': None},
+                       **({'pending': True} if d.get('pending') else {}))
+                  for d in all_data if d['error']]
+
+    # 4. 정렬 및 순위 (에러 종목은 뒤에 같은 순위로)
     results.sort(key=lambda x: x['scores']['final'], reverse=True)
     for i, r in enumerate(results, 1):
         r['rank'] = i
+    n_valid = len(results)
+    for r in errors:
+        results.append(dict(r, rank=n_valid + 1))
 
-    # 5. 에러 종목 추가
-    error_tickers = [d['ticker'] for d in all_data if d['error']]
-    for ticker in error_tickers:
-        results.append({'ticker': ticker, 'error': True, 'scores': None, 'rank': len(results) + 1})
-
-    # 6. bottomup_data.json 저장 (기존 방식)
+    # 6. bottomup_data.json 저장 (증분 실행은 순위/점수가 바뀐 경우만)
     output = {
         'version': '3.0',
         'updated': now_kst.isoformat(),
         'updated_display': now_kst.strftime('%Y. %m. %d. %p %I:%M:%S'),
+        'universe': universe_name,
+        'complete': complete,
+        'rescored': 'price' if state else 'full',
         'count': len([r for r in results if not r.get('error', False)]),
-        'total': len(TICKERS),
+        'total': len(tickers),
         'weights': WEIGHTS,
         'data': results
     }
+    if state:
+        state['checked_at'] = datetime.now(timezone.utc).isoformat()
+        _write_rescore_state(state)
+        if not ranking_changed(output):
+            print(f"\n[INCR] 순위/점수 변화 없음 — {OUTPUT_FILE} 유지")
+            return output
+
     output_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), OUTPUT_FILE)
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(output, f, ensure_ascii=False, indent=2)
     print(f"\n✅ {OUTPUT_FILE} 저장 완료")
 
+    if not state:
+        save_rescore_state(output, metrics, universe_name, tickers, complete)
+        # 전 종목 수집이 끝났을 때만 체크포인트 정리 (부분 실행이면 다음 실행에서 이어서)
+        if complete:
+            clear_checkpoint(universe_name)
+        else:
+            print(f"[CHECKPOINT] 부분 결과 — 미수집 종목은 다음 실행에서 이어서 수집")
+
     # 7. 탑다운 스냅샷 (Gist td 필드)
     print("\n🚦 탑다운 데이터 조회 중...")
     td_snapshot = fetch_topdown_snapshot()
@@ -580,4 +696,13 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description='WDK LAB 바텀업 데이터 생성기')
+    parser.add_argument('--universe', default=None,
+                        help=f"universes/ 이름 또는 파일 경로 (기본: BOTTOMUP_UNIVERSE 또는 default, "
+                             f"사용 가능: {', '.join(universe.available())})")
+    parser.add_argument('--incremental', action='store_true',
+                        help='장중 증분: 가격 입력만 갱신해 모멘텀/최종 점수 재계산 (상태 없으면 전체 실행)')
+    args = parser.parse_args()
+    main(args.universe, incremental=args.incremental)
+    http_client.report()
@@ -1,8 +1,11 @@
 import os
+import sys
 import json
-import requests
 from datetime import datetime, timezone, timedelta
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client  # noqa: E402  (저장소 루트 공용 모듈)
+
 # ===== 설정 =====
 # data.go.kr API 키 (사전규격, 입찰공고 모두 동일)
 API_KEY = os.environ.get('NARAJANGTEO_API_KEY', '')
@@ -62,7 +65,7 @@ def search_bid_announcements():
     
     try:
         print(f"[입찰공고] 조회: {start_date} ~ {end_date}")
-        resp = requests.get(url, params=params, timeout=30)
+        resp = http_client.get(url, 'data.go.kr', params=params)
         resp.raise_for_status()
         data = resp.json()
         
@@ -95,7 +98,7 @@ def search_pre_specifications():
     
     try:
         print(f"[사전규격 공사] 조회: {start_date[:8]} ~ {end_date[:8]}")
-        resp = requests.get(url, params=params, timeout=30)
+        resp = http_client.get(url, 'data.go.kr', params=params)
         resp.raise_for_status()
         data = resp.json()
         
@@ -127,7 +130,7 @@ def search_pre_specifications_servc():
     
     try:
         print(f"[사전규격 용역] 조회...")
-        resp = requests.get(url, params=params, timeout=30)
+        resp = http_client.get(url, 'data.go.kr', params=params)
         resp.raise_for_status()
         data = resp.json()
         
@@ -277,7 +280,7 @@ def send_telegram(message):
     }
     
     try:
-        resp = requests.post(url, json=payload, timeout=10)
+        resp = http_client.post(url, 'telegram', json=payload)
         resp.raise_for_status()
         print("[Telegram] 발송 성공!")
         return True
@@ -404,3 +407,4 @@ if __name__ == '__main__':
     import sys
     mode = sys.argv[1] if len(sys.argv) > 1 else 'bid'
     main(mode)
+    http_client.report()
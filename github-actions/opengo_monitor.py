@@ -3,10 +3,14 @@
 Playwright 사용 - JavaScript 렌더링 지원
 """
 import os
+import sys
 import json
 import asyncio
 from datetime import datetime, timezone, timedelta
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client  # noqa: E402  (저장소 루트 공용 모듈)
+
 # 텔레그램 설정
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '8209005017:AAH1IOr7h49dI3lX2TSBNOrvMsQEIcHCouM')
 TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '1489387702')
@@ -160,7 +164,6 @@ def save_state(state):
 
 
 def send_telegram(message):
-    import requests
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
         'chat_id': TELEGRAM_CHAT_ID,
@@ -169,7 +172,7 @@ def send_telegram(message):
         'disable_web_page_preview': True
     }
     try:
-        resp = requests.post(url, json=payload, timeout=10)
+        resp = http_client.post(url, 'telegram', json=payload)
         resp.raise_for_status()
         print("[Telegram] 발송 성공!")
         return True
@@ -257,3 +260,4 @@ if __name__ == '__main__':
     import sys
     mode = sys.argv[1] if len(sys.argv) > 1 else 'opengo'
     main(mode)
+    http_client.report()
@@ -0,0 +1,142 @@
+"""
+공용 HTTP 클라이언트 — 모든 수집기/알림 스크립트가 하나의 Session 공유
+- 호스트별 keep-alive 커넥션 풀 (TCP/TLS 핸드셰이크 재사용)
+- 429/5xx·연결 오류 시 지터 백오프 재시도 (Retry-After 우선)
+- 엔드포인트별 기본 타임아웃 (TIMEOUTS)
+- 호스트별 요청/재시도/실패/전송량/소요시간 카운터 → report()
+"""
+
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 엔드포인트별 기본 타임아웃 (초)
+TIMEOUTS = {
+    'fred': 30,
+    'fred_probe': 10,
+    'finnhub': 10,
+    'gist': 15,
+    'telegram': 10,
+    'daum': 30,
+    'data.go.kr': 30,
+}
+DEFAULT_TIMEOUT = 30
+
+# 재시도 설정
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5     # 0.5, 1, 2초 × 지터
+BACKOFF_MAX = 10
+
+# 호스트별 풀 크기 (FRED 동시 수집 스레드 수 이상)
+POOL_MAXSIZE = 16
+
+# POST/PATCH는 중복 발송 방지를 위해 "처리되지 않았음"이 확실한 경우만 재시도
+_IDEMPOTENT = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def session():
+    """프로세스 공용 Session (최초 호출 시 생성)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=POOL_MAXSIZE)
+                s.mount('https://', adapter)
+                s.mount('http://', adapter)
+                _session = s
+    return _session
+
+
+def _count(host, **delta):
+    with _stats_lock:
+        st = _stats.setdefault(host, {'requests': 0, 'retries': 0, 'errors': 0,
+                                      'bytes': 0, 'seconds': 0.0})
+        for k, v in delta.items():
+            st[k] += v
+
+
+def _backoff(attempt, resp=None):
+    """지터 포함 대기 시간 (Retry-After 헤더가 있으면 우선)"""
+    if resp is not None:
+        retry_after = resp.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    return min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX) * random.uniform(0.5, 1.5)
+
+
+def request(method, url, endpoint=None, timeout=None, retries=MAX_RETRIES, **kwargs):
+    """
+    공용 Session으로 요청 (requests.request와 같은 인자)
+    - endpoint: TIMEOUTS 키 (timeout 미지정 시 기본값 결정)
+    - 재시도 대상 응답/예외가 끝까지 반복되면 마지막 응답 반환 / 예외 전파
+    """
+    method = method.upper()
+    host = urlsplit(url).netloc
+    if timeout is None:
+        timeout = TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+    idempotent = method in _IDEMPOTENT
+
+    for attempt in range(retries + 1):
+        t0 = time.perf_counter()
+        try:
+            resp = session().request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _count(host, requests=1, errors=1, seconds=time.perf_counter() - t0)
+            # POST 읽기 타임아웃은 서버가 처리했을 수 있으므로 재시도하지 않음
+            sent = isinstance(e, requests.ReadTimeout)
+            if attempt >= retries or (sent and not idempotent):
+                raise
+            _count(host, retries=1)
+            time.sleep(_backoff(attempt))
+            continue
+
+        _count(host, requests=1, bytes=len(resp.content), seconds=time.perf_counter() - t0)
+        retryable = resp.status_code == 429 or (idempotent and resp.status_code in RETRY_STATUS)
+        if not retryable or attempt >= retries:
+            if resp.status_code >= 400:
+                _count(host, errors=1)
+            return resp
+        _count(host, retries=1)
+        wait = _backoff(attempt, resp)
+        print(f"[HTTP] {host} {resp.status_code} — {wait:.1f}s 후 재시도 ({attempt + 1}/{retries})")
+        time.sleep(wait)
+
+
+def get(url, endpoint=None, **kwargs):
+    return request('GET', url, endpoint, **kwargs)
+
+
+def post(url, endpoint=None, **kwargs):
+    return request('POST', url, endpoint, **kwargs)
+
+
+def patch(url, endpoint=None, **kwargs):
+    return request('PATCH', url, endpoint, **kwargs)
+
+
+def stats():
+    """호스트별 카운터 사본"""
+    with _stats_lock:
+        return {h: dict(st) for h, st in _stats.items()}
+
+
+def report():
+    """호스트별 사용량 출력 (스크립트 종료 시)"""
+    st = stats()
+    if not st:
+        return
+    print("[HTTP] 호스트별 요약:")
+    for host, s in sorted(st.items(), key=lambda kv: -kv[1]['seconds']):
+        print(f"  {host:<28} 요청 {s['requests']:>3} · 재시도 {s['retries']} · 실패 {s['errors']}"
+              f" · {s['bytes'] / 1024:,.0f}KB · {s['seconds']:.2f}s")
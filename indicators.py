@@ -0,0 +1,397 @@
+"""
+기술적 지표 커널 (NumPy 전용, 선택 의존성 없음)
+- 입력: (종목 × 시간) 2-D 배열 — price_store 뷰는 .T로 복사 없이 전달
+- 종목별 결측(상장 전/거래정지)은 건너뛰고 유효 관측치만 이어서 계산
+  (= 종목별 dropna() 후 pandas_ta로 계산한 것과 같은 값, 결측 위치는 NaN)
+- 재귀식(EMA/RMA)은 시간축 1회 순회, 종목축은 벡터 연산
+- Wilder RSI, MACD(EMA 12/26 + Signal 9), Bollinger Bands, ATR
+- RSI/MACD 재귀 상태 저장 (warm start): 새 봉마다 O(1) 갱신, 공백/수정주가일 때만 전체 재계산
+
+python indicators.py → pandas 기준식(pandas_ta와 같은 정의) 픽스처 대조
+"""
+
+import os
+import json
+
+import numpy as np
+
+# RSI/MACD 재귀 상태 파일 (종목별 EMA12/EMA26/Signal, Wilder 상승/하락 누적, 마지막 확정 봉 날짜)
+STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'indicator_state.json')
+STATE_VERSION = 1
+STATE_PARAMS = {'fast': 12, 'slow': 26, 'signal': 9, 'rsi': 14}
+
+
+# ── 결측 압축 / 복원 ───────────────────────────────────────────────
+
+def _pack(valid):
+    """종목별 유효 관측치를 왼쪽으로 모으는 인덱스 (안정 정렬 → 시간 순서 유지)"""
+    return np.argsort(~valid, axis=1, kind='stable')
+
+
+def _gather(x, order):
+    return np.take_along_axis(x, order, axis=1)
+
+
+def _scatter(y, order, valid):
+    """압축 배열 → 원래 시간 위치 (결측 위치는 NaN)"""
+    out = np.full(y.shape, np.nan)
+    np.put_along_axis(out, order, y, axis=1)
+    out[~valid] = np.nan
+    return out
+
+
+def _as_2d(x):
+    x = np.asarray(x, dtype=np.float64)
+    return x[None, :] if x.ndim == 1 else x
+
+
+def _shift_right(y, k):
+    """압축 배열 앞에 NaN k열 (차분 등으로 잘린 앞부분 복원)"""
+    return np.concatenate([np.full((y.shape[0], k), np.nan), y], axis=1)
+
+
+# ── 압축 배열용 재귀 커널 (앞부분 NaN 없음, 뒤쪽 NaN은 결과에서 버려짐) ──
+
+def _ema(p, length):
+    """SMA 시드 EMA (pandas_ta ema 기본) — 첫 length개 평균에서 출발, alpha = 2/(length+1)"""
+    n, t = p.shape
+    out = np.full((n, t), np.nan)
+    if t < length:
+        return out
+    alpha = 2.0 / (length + 1)
+    e = p[:, :length].mean(axis=1)
+    out[:, length - 1] = e
+    for i in range(length, t):
+        e = alpha * p[:, i] + (1 - alpha) * e
+        out[:, i] = e
+    return out
+
+
+def _rma(p, length):
+    """Wilder 이동평균 (pandas_ta rma = ewm(alpha=1/length, adjust=True, min_periods=length))"""
+    n, t = p.shape
+    out = np.full((n, t), np.nan)
+    decay = 1.0 - 1.0 / length
+    num = np.zeros(n)
+    den = 0.0
+    for i in range(t):
+        num = p[:, i] + decay * num
+        den = 1.0 + decay * den
+        if i >= length - 1:
+            out[:, i] = num / den
+    return out
+
+
+def _rolling(p, length, fn):
+    out = np.full(p.shape, np.nan)
+    if p.shape[1] >= length:
+        win = np.lib.stride_tricks.sliding_window_view(p, length, axis=1)
+        out[:, length - 1:] = fn(win)
+    return out
+
+
+# ── 공개 지표 ──────────────────────────────────────────────────────
+
+def ema(close, length):
+    """EMA (SMA 시드) — (종목 × 시간)"""
+    x = _as_2d(close)
+    valid = np.isfinite(x)
+    order = _pack(valid)
+    return _scatter(_ema(_gather(x, order), length), order, valid)
+
+
+def rsi(close, length=14):
+    """Wilder RSI — 100 × 상승 RMA / (상승 RMA + 하락 RMA)"""
+    x = _as_2d(close)
+    valid = np.isfinite(x)
+    order = _pack(valid)
+    d = np.diff(_gather(x, order), axis=1)
+    up   = _rma(np.clip(d, 0, None), length)
+    down = _rma(np.clip(-d, 0, None), length)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = 100 * up / (up + down)
+    return _scatter(_shift_right(r, 1), order, valid)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD → (macd, signal, histogram) — Signal은 MACD 첫 유효값부터의 EMA"""
+    x = _as_2d(close)
+    valid = np.isfinite(x)
+    order = _pack(valid)
+    p = _gather(x, order)
+    line = _ema(p, fast) - _ema(p, slow)
+    start = max(fast, slow) - 1
+    sig = _shift_right(_ema(line[:, start:], signal), start)
+    return tuple(_scatter(y, order, valid) for y in (line, sig, line - sig))
+
+
+def bollinger(close, length=20, std=2.0):
+    """Bollinger Bands → (lower, mid, upper) — SMA ± std × 모표준편차(ddof=0)"""
+    x = _as_2d(close)
+    valid = np.isfinite(x)
+    order = _pack(valid)
+    p = _gather(x, order)
+    mid = _rolling(p, length, lambda w: w.mean(axis=-1))
+    dev = _rolling(p, length, lambda w: w.std(axis=-1))
+    return tuple(_scatter(y, order, valid) for y in (mid - std * dev, mid, mid + std * dev))
+
+
+def atr(high, low, close, length=14):
+    """ATR — True Range의 Wilder 이동평균 (세 값이 모두 있는 봉만 사용)"""
+    h, l, c = _as_2d(high), _as_2d(low), _as_2d(close)
+    valid = np.isfinite(h) & np.isfinite(l) & np.isfinite(c)
+    order = _pack(valid)
+    h, l, c = (_gather(a, order) for a in (h, l, c))
+    prev = c[:, :-1]
+    tr = np.maximum.reduce([h[:, 1:] - l[:, 1:], np.abs(h[:, 1:] - prev), np.abs(l[:, 1:] - prev)])
+    return _scatter(_shift_right(_rma(tr, length), 1), order, valid)
+
+
+def last(y):
+    """종목별 마지막 유효값 (없으면 NaN) — (종목,)"""
+    y = _as_2d(y)
+    ok = np.isfinite(y)
+    idx = y.shape[1] - 1 - np.argmax(ok[:, ::-1], axis=1)
+    return np.where(ok.any(axis=1), y[np.arange(len(y)), idx], np.nan)
+
+
+# ── 재귀 상태 (warm start) ─────────────────────────────────────────
+# n: 유효 종가 수, close: 마지막 유효 종가
+# ema_fast/ema_slow/signal: 시드 구간(length개 미만)에는 합계, 이후 EMA
+# up/down: Wilder RMA 분자 (adjust=True 가중합, 분모는 상승/하락 공통이라 RSI 계산에 불필요)
+STATE_FIELDS = ('n', 'close', 'ema_fast', 'ema_slow', 'signal', 'up', 'down')
+
+
+def empty_state(n_tickers):
+    st = {f: np.zeros(n_tickers) for f in STATE_FIELDS}
+    st['close'][:] = np.nan
+    return st
+
+
+def _ema_step(e, v, k, length, ok):
+    """k번째(1부터) 입력 v 반영 — k < length: 합계 누적, k == length: SMA 시드, 이후 EMA"""
+    alpha = 2.0 / (length + 1)
+    with np.errstate(invalid='ignore'):
+        new = np.where(k < length, e + v,
+                       np.where(k == length, (e + v) / length, alpha * v + (1 - alpha) * e))
+    return np.where(ok, new, e)
+
+
+def step(st, x, p=STATE_PARAMS):
+    """
+    새 봉 1개 반영 (제자리 갱신) — x: (종목,) 종가, NaN인 종목은 건너뜀
+    rsi()/macd() 커널과 같은 재귀식 → 같은 히스토리면 같은 값
+    """
+    x = np.asarray(x, dtype=np.float64)
+    ok = np.isfinite(x)
+    n = st['n'] + ok
+    v = np.where(ok, x, 0.0)
+
+    # RSI: 두 번째 유효 종가부터 차분
+    has_prev = ok & (st['n'] >= 1)
+    d = np.where(has_prev, v - np.nan_to_num(st['close']), 0.0)
+    decay = 1.0 - 1.0 / p['rsi']
+    st['up']   = np.where(has_prev, np.maximum(d, 0) + decay * st['up'], st['up'])
+    st['down'] = np.where(has_prev, np.maximum(-d, 0) + decay * st['down'], st['down'])
+
+    # MACD: fast/slow EMA → slow 시드 시점부터 Signal 입력
+    st['ema_fast'] = _ema_step(st['ema_fast'], v, n, p['fast'], ok)
+    st['ema_slow'] = _ema_step(st['ema_slow'], v, n, p['slow'], ok)
+    k = n - p['slow'] + 1
+    line = np.where(k >= 1, st['ema_fast'] - st['ema_slow'], 0.0)
+    st['signal'] = _ema_step(st['signal'], line, k, p['signal'], ok & (k >= 1))
+
+    st['close'] = np.where(ok, v, st['close'])
+    st['n'] = n
+    return st
+
+
+def replay(close, st=None, p=STATE_PARAMS):
+    """(종목 × 시간) 히스토리를 처음부터(또는 st에 이어서) 반영한 상태"""
+    x = _as_2d(close)
+    st = st if st is not None else empty_state(x.shape[0])
+    for i in range(x.shape[1]):
+        step(st, x[:, i], p)
+    return st
+
+
+def state_values(st, p=STATE_PARAMS):
+    """상태 → {'rsi', 'macd', 'signal'}: (종목,) — 히스토리 부족 종목은 NaN"""
+    n = st['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi_val = 100 * st['up'] / (st['up'] + st['down'])
+    line = st['ema_fast'] - st['ema_slow']
+    return {
+        'rsi':    np.where(n - 1 >= p['rsi'], rsi_val, np.nan),
+        'macd':   np.where(n >= p['slow'], line, np.nan),
+        'signal': np.where(n >= p['slow'] + p['signal'] - 1, st['signal'], np.nan),
+    }
+
+
+def _subset(st, rows):
+    return {f: v[rows] for f, v in st.items()}
+
+
+def load_state(path=None):
+    try:
+        path = path or STATE_FILE
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('version') != STATE_VERSION or saved.get('params') != STATE_PARAMS:
+            return None
+        return saved
+    except Exception:
+        return None
+
+
+def save_state(st, tickers, date, path=None):
+    """임시 파일 → rename (원자적 교체)"""
+    path = path or STATE_FILE
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': STATE_VERSION, 'params': STATE_PARAMS, 'date': str(date),
+                       'tickers': list(tickers),
+                       'fields': {k: [None if not np.isfinite(v) else float(v) for v in arr]
+                                  for k, arr in st.items()}}, f, separators=(',', ':'))
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[IND] 상태 저장 실패: {e}")
+
+
+def warm_values(dates, close, tickers, path=None):
+    """
+    저장된 상태에 새 봉만 반영해 종목별 최신 RSI/MACD/Signal 산출
+    - dates: (시간,) datetime64, close: (종목 × 시간), tickers: 행 순서
+    - 마지막 봉은 장중 미확정일 수 있어 상태에는 그 직전 봉까지만 확정 저장 (마지막 봉은 사본에 반영)
+    - 저장 날짜가 히스토리에 없으면(공백) 전체, 확정 종가가 저장값과 다르면(수정주가) 해당 종목만 재계산
+    반환: {'rsi', 'macd', 'signal'}: (종목,)
+    """
+    x = _as_2d(close)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    n_tickers, commit = x.shape[0], x.shape[1] - 1
+    st = empty_state(n_tickers)
+    reuse = np.zeros(n_tickers, dtype=bool)
+    start = 0
+
+    saved = load_state(path) if commit > 0 else None
+    if saved:
+        d = np.datetime64(saved['date'], 'D')
+        i = int(np.searchsorted(dates[:commit], d))
+        if i < commit and dates[i] == d:
+            pos = {t: k for k, t in enumerate(saved['tickers'])}
+            rows = np.array([pos.get(t, -1) for t in tickers])
+            have = rows >= 0
+            for f in STATE_FIELDS:
+                vals = np.array(saved['fields'][f], dtype=np.float64)
+                st[f][have] = vals[rows[have]]
+            stored = last(x[:, :i + 1])
+            reuse = have & np.isclose(st['close'], stored, rtol=1e-6, equal_nan=True)
+            start = i + 1
+
+    full = ~reuse
+    if reuse.any():
+        sub = replay(x[reuse, start:commit], _subset(st, reuse))
+        for f in STATE_FIELDS:
+            st[f][reuse] = sub[f]
+    if full.any():
+        sub = replay(x[full, :commit])
+        for f in STATE_FIELDS:
+            st[f][full] = sub[f]
+    print(f"[IND] 상태 재사용 {int(reuse.sum())}종목 (+{max(commit - start, 0) if reuse.any() else 0}봉) · "
+          f"전체 재계산 {int(full.sum())}종목 ({commit}봉)")
+
+    if commit > 0:
+        save_state(st, tickers, dates[commit - 1], path)
+    if commit >= 0 and x.shape[1]:
+        st = step({f: v.copy() for f, v in st.items()}, x[:, -1])
+    return state_values(st)
+
+
+# ── 픽스처 대조 ────────────────────────────────────────────────────
+
+def _reference(s, h, l):
+    """pandas_ta와 같은 정의의 pandas 기준식 (종목 1개, 결측 제거된 Series)"""
+    import pandas as pd
+
+    def p_ema(x, n):
+        x = x.copy()
+        seed = x.iloc[:n].mean()
+        x.iloc[:n - 1] = np.nan
+        x.iloc[n - 1] = seed
+        return x.ewm(span=n, adjust=False).mean()
+
+    def p_rma(x, n):
+        return x.ewm(alpha=1 / n, min_periods=n).mean()
+
+    d = s.diff()
+    r = 100 * p_rma(d.clip(lower=0), 14) / (p_rma(d.clip(lower=0), 14) + p_rma((-d).clip(lower=0), 14))
+    line = p_ema(s, 12) - p_ema(s, 26)
+    sig = p_ema(line.loc[line.first_valid_index():], 9).reindex(s.index)
+    mid = s.rolling(20).mean()
+    dev = s.rolling(20).std(ddof=0)
+    tr = pd.concat([h - l, (h - s.shift()).abs(), (l - s.shift()).abs()], axis=1).max(axis=1)
+    tr.iloc[0] = np.nan
+    return {'rsi': r, 'macd': line, 'signal': sig, 'bb_lower': mid - 2 * dev, 'bb_upper': mid + 2 * dev,
+            'atr': p_rma(tr, 14)}
+
+
+def self_check(n_tickers=6, n_days=300, seed=0):
+    """랜덤 워크 픽스처 (상장 전 결측 + 중간 결측 포함) → 기준식과 최대 오차"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, (n_tickers, n_days)), axis=1)
+    high = close * (1 + rng.uniform(0, 0.02, close.shape))
+    low  = close * (1 - rng.uniform(0, 0.02, close.shape))
+    for i in range(n_tickers):
+        close[i, :rng.integers(0, 120)] = np.nan
+        close[i, rng.integers(150, n_days, 3)] = np.nan
+
+    ours = {'rsi': rsi(close)}
+    ours['macd'], ours['signal'], _ = macd(close)
+    ours['bb_lower'], _, ours['bb_upper'] = bollinger(close)
+    ours['atr'] = atr(high, low, close)
+
+    try:
+        import pandas_ta as ta
+    except ImportError:
+        ta = None
+
+    worst = {}
+    for i in range(n_tickers):
+        ok = np.isfinite(close[i])
+        s, h, l = (pd.Series(a[i][ok]) for a in (close, high, low))
+        ref = _reference(s, h, l)
+        if ta is not None:
+            m = ta.macd(s)
+            bb = ta.bbands(s, length=20, std=2, ddof=0)
+            ref.update({'rsi': ta.rsi(s, 14), 'macd': m.iloc[:, 0], 'signal': m.iloc[:, 2],
+                        'bb_lower': bb.iloc[:, 0], 'bb_upper': bb.iloc[:, 2],
+                        'atr': ta.atr(h, l, s, 14)})
+        for name, expected in ref.items():
+            got = ours[name][i][ok]
+            e = expected.to_numpy(dtype=np.float64)
+            if not np.array_equal(np.isnan(got), np.isnan(e)):
+                worst[name] = np.inf
+                continue
+            both = ~np.isnan(e)
+            worst[name] = max(worst.get(name, 0.0), float(np.max(np.abs(got[both] - e[both]), initial=0.0)))
+
+    # warm start: 전체 재생 / 나눠서 이어 붙인 상태 == 커널 마지막 값
+    full = state_values(replay(close))
+    st = replay(close[:, :n_days // 2])
+    resumed = state_values(replay(close[:, n_days // 2:], st))
+    line = last(ours['macd'])
+    for name, ref in (('rsi', last(ours['rsi'])), ('macd', line), ('signal', last(ours['signal']))):
+        worst[f'warm_{name}'] = max(float(np.nanmax(np.abs(full[name] - ref))),
+                                    float(np.nanmax(np.abs(resumed[name] - ref))))
+    return worst, 'pandas_ta' if ta is not None else 'pandas 기준식'
+
+
+if __name__ == '__main__':
+    worst, source = self_check()
+    print(f"[IND] 픽스처 대조 ({source})")
+    for name, err in worst.items():
+        print(f"  {'✅' if err < 1e-8 else '❌'} {name:<9} 최대 오차 {err:.2e}")
@@ -1,7 +1,7 @@
 import os
 import json
 import re
-import requests
+import http_client
 from datetime import datetime, timezone, timedelta
 from urllib.parse import quote
 
@@ -41,7 +41,7 @@ def search_daum_news(keyword):
     }
     
     try:
-        resp = requests.get(url, headers=headers, timeout=30)
+        resp = http_client.get(url, 'daum', headers=headers)
         resp.raise_for_status()
         html = resp.text
         
@@ -119,7 +119,7 @@ def send_telegram(message):
     }
     
     try:
-        resp = requests.post(url, json=payload, timeout=10)
+        resp = http_client.post(url, 'telegram', json=payload)
         resp.raise_for_status()
         print("[Telegram] Message sent successfully")
         return True
@@ -226,3 +226,4 @@ if __name__ == '__main__':
     import sys
     mode = sys.argv[1] if len(sys.argv) > 1 else 'news'
     main(mode)
+    http_client.report()
@@ -0,0 +1,280 @@
+"""
+로컬 일봉(OHLCV) 저장소 — 필드별 memory-mapped .npy (행: 날짜, 열: 종목)
+- 마지막 저장일 이후 빠진 봉만 배치 다운로드해 append (겹치는 구간은 덮어쓰기)
+- 겹치는 구간 종가가 바뀌면(분할/배당 수정주가) 해당 종목만 전체 재수집
+- 읽기는 행 슬라이스 뷰 (복사 없음) → pandas DataFrame도 같은 메모리를 그대로 사용
+- 행/열 용량을 미리 잡아두고 부족할 때만 두 배로 재할당
+"""
+
+import os
+import json
+import numpy as np
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'prices')
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+_YF_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+# 저장소 시작일 (최초 생성 시점 기준 과거 일수) — 52주/200일 지표 + 여유
+HISTORY_DAYS = 730
+
+# 증분 수집 시 다시 받는 마지막 구간 (달력일) — 수정주가 감지 + 당일 봉 갱신
+OVERLAP_DAYS = 7
+
+# 초기 용량 (부족하면 두 배씩)
+ROW_CAPACITY = 1024
+COL_CAPACITY = 32
+
+
+def _download(tickers, start):
+    """yfinance 배치 다운로드 → {field: DataFrame (날짜 × 종목)}"""
+    import yfinance as yf
+
+    data = yf.download(tickers, start=str(start), auto_adjust=True, progress=False, threads=True)
+    if data is None or data.empty:
+        return {}
+    out = {}
+    for field, col in _YF_COLUMNS.items():
+        df = data[col]
+        if df.ndim == 1:
+            df = df.to_frame(tickers[0])
+        df = df.dropna(how='all')
+        df.index = np.array([d.strftime('%Y-%m-%d') for d in df.index], dtype='datetime64[D]')
+        out[field] = df
+    return out
+
+
+class PriceStore:
+    """
+    필드별 (row_cap × col_cap) float64 memmap + dates (row_cap,) datetime64[D]
+    meta.json: tickers(열 순서), n_rows, row_cap, col_cap, start
+    """
+
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        self.meta = self._load_meta()
+        self._arrays = {}
+        if self.meta:
+            self._open()
+
+    # ── 파일 관리 ───────────────────────────────────────────────────
+    def _file(self, name):
+        return os.path.join(self.path, f'{name}.npy')
+
+    def _load_meta(self):
+        try:
+            with open(os.path.join(self.path, 'meta.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _save_meta(self):
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+    def _open(self):
+        self._arrays = {name: np.load(self._file(name), mmap_mode='r+')
+                        for name in ('dates',) + FIELDS}
+
+    def _allocate(self, row_cap, col_cap):
+        """새 용량으로 재할당 (기존 데이터 복사 → rename)"""
+        os.makedirs(self.path, exist_ok=True)
+        n = self.meta['n_rows'] if self.meta else 0
+        m = len(self.meta['tickers']) if self.meta else 0
+        for name in ('dates',) + FIELDS:
+            tmp = self._file(name) + '.tmp'
+            if name == 'dates':
+                arr = np.lib.format.open_memmap(tmp, mode='w+', dtype='datetime64[D]', shape=(row_cap,))
+                arr[:] = np.datetime64('NaT')
+                if n:
+                    arr[:n] = self._arrays['dates'][:n]
+            else:
+                arr = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float64, shape=(row_cap, col_cap))
+                arr[:] = np.nan
+                if n and m:
+                    arr[:n, :m] = self._arrays[name][:n, :m]
+            arr.flush()
+            del arr
+        self._arrays = {}
+        for name in ('dates',) + FIELDS:
+            os.replace(self._file(name) + '.tmp', self._file(name))
+        self.meta.update({'row_cap': row_cap, 'col_cap': col_cap})
+        self._save_meta()
+        self._open()
+
+    def _ensure_capacity(self, n_rows, n_cols):
+        row_cap, col_cap = self.meta['row_cap'], self.meta['col_cap']
+        if n_rows <= row_cap and n_cols <= col_cap:
+            return
+        while row_cap < n_rows:
+            row_cap *= 2
+        while col_cap < n_cols:
+            col_cap *= 2
+        self._allocate(row_cap, col_cap)
+
+    # ── 조회 ────────────────────────────────────────────────────────
+    @property
+    def tickers(self):
+        return list(self.meta['tickers']) if self.meta else []
+
+    @property
+    def dates(self):
+        """저장된 날짜 (뷰)"""
+        return self._arrays['dates'][:self.meta['n_rows']] if self.meta else np.empty(0, 'datetime64[D]')
+
+    def last_date(self):
+        d = self.dates
+        return d[-1] if len(d) else None
+
+    def _row_start(self, start=None, rows=None):
+        n = self.meta['n_rows']
+        if rows is not None:
+            return max(0, n - rows)
+        if start is not None:
+            return int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        return 0
+
+    def array(self, field='close', start=None, rows=None):
+        """
+        (dates, values) — values: (행, 저장된 전체 종목) memmap 행 슬라이스 뷰
+        start: 시작일 또는 rows: 마지막 n행
+        """
+        if not self.meta:
+            return np.empty(0, 'datetime64[D]'), np.empty((0, 0))
+        i, n, m = self._row_start(start, rows), self.meta['n_rows'], len(self.meta['tickers'])
+        return self._arrays['dates'][i:n], self._arrays[field][i:n, :m]
+
+    def frame(self, field='close', start=None, rows=None):
+        """array()를 복사 없이 감싼 DataFrame (열: 저장된 전체 종목) — 종목 선택은 df[t]"""
+        import pandas as pd
+
+        dates, values = self.array(field, start, rows)
+        return pd.DataFrame(values, index=pd.DatetimeIndex(dates), columns=self.tickers, copy=False)
+
+    # ── 갱신 ────────────────────────────────────────────────────────
+    def _write(self, bars, tickers):
+        """
+        bars: {field: DataFrame} → 해당 종목 열에 기록
+        저장소 시작일 이전/중간에 없는 날짜는 버리고, 마지막 날짜 이후는 append
+        """
+        close = bars['close']
+        incoming = np.asarray(close.index, dtype='datetime64[D]')
+        last = self.last_date()
+        new_dates = np.unique(incoming[incoming > last]) if last is not None else np.unique(incoming)
+
+        n = self.meta['n_rows']
+        cols = {t: i for i, t in enumerate(self.meta['tickers'])}
+        self._ensure_capacity(n + len(new_dates), len(cols))
+        self._arrays['dates'][n:n + len(new_dates)] = new_dates
+        self.meta['n_rows'] = n = n + len(new_dates)
+
+        if not n:
+            return
+        dates = self.dates
+        pos = np.searchsorted(dates, incoming)
+        hit = (pos < n) & (dates[np.minimum(pos, n - 1)] == incoming)
+        rows = pos[hit]
+        for field, df in bars.items():
+            arr = self._arrays[field]
+            for t in tickers:
+                if t in df.columns:
+                    vals = df[t].to_numpy(dtype=np.float64)[hit]
+                    ok = np.isfinite(vals)
+                    arr[rows[ok], cols[t]] = vals[ok]
+
+    def _add_tickers(self, tickers):
+        self.meta['tickers'].extend(tickers)
+        self._ensure_capacity(self.meta['n_rows'], len(self.meta['tickers']))
+
+    def _clear(self, tickers):
+        cols = [self.meta['tickers'].index(t) for t in tickers]
+        for field in FIELDS:
+            self._arrays[field][:, cols] = np.nan
+
+    def update(self, tickers):
+        """
+        tickers의 빠진 봉 수집 (배치 요청 최대 2회: 기존 종목 증분 / 신규·수정주가 종목 전체)
+        반환: 추가된 행 수
+        """
+        if not self.meta:
+            start = np.datetime64('today', 'D') - HISTORY_DAYS
+            self.meta = {'tickers': [], 'n_rows': 0, 'row_cap': 0, 'col_cap': 0, 'start': str(start)}
+            self._allocate(ROW_CAPACITY, COL_CAPACITY)
+
+        n_before = self.meta['n_rows']
+        known = [t for t in tickers if t in self.meta['tickers']]
+        new   = [t for t in tickers if t not in self.meta['tickers']]
+
+        # 1) 기존 종목: 마지막 저장일 - OVERLAP_DAYS 부터
+        refetch = []
+        if known and self.last_date() is not None:
+            since = self.last_date() - OVERLAP_DAYS
+            bars = _download(known, since)
+            if bars:
+                refetch = self._revised(bars['close'], known)
+                self._write(bars, [t for t in known if t not in refetch])
+                print(f"[PRICE] 증분 {len(known)}종목 (since {since})")
+
+        # 2) 신규 종목 + 수정주가 종목: 저장소 시작일부터 전체
+        full = new + refetch
+        if full:
+            self._add_tickers(new)
+            if refetch:
+                print(f"[PRICE] 수정주가 감지 → 전체 재수집: {', '.join(refetch)}")
+                self._clear(refetch)
+            bars = _download(full, self.meta['start'])
+            if bars:
+                self._write(bars, full)
+            print(f"[PRICE] 전체 수집 {len(full)}종목 (since {self.meta['start']})")
+
+        self._save_meta()
+        for arr in self._arrays.values():
+            arr.flush()
+        return self.meta['n_rows'] - n_before
+
+    def _revised(self, close, tickers):
+        """
+        겹치는 구간(마지막 저장 행 제외 — 장중 부분 봉) 종가가 저장값과 다른 종목
+        """
+        dates = self.dates
+        incoming = np.asarray(close.index, dtype='datetime64[D]')
+        pos = np.searchsorted(dates, incoming)
+        check = (incoming < dates[-1]) & (dates[np.minimum(pos, len(dates) - 1)] == incoming)
+        pos = pos[check]
+        cols = {t: i for i, t in enumerate(self.meta['tickers'])}
+        revised = []
+        for t in tickers:
+            if t not in close.columns:
+                continue
+            fresh  = close[t].to_numpy(dtype=np.float64)[check]
+            stored = self._arrays['close'][pos, cols[t]]
+            both = np.isfinite(fresh) & np.isfinite(stored)
+            if np.any(np.abs(fresh[both] / stored[both] - 1) > 1e-6):
+                revised.append(t)
+        return revised
+
+
+_store = None
+
+
+def get_store():
+    """프로세스 공용 저장소"""
+    global _store
+    if _store is None:
+        _store = PriceStore()
+    return _store
+
+
+def load(tickers, field='close', start=None, rows=None):
+    """
+    tickers 갱신 후 필드 DataFrame 반환 (행 슬라이스 뷰, 열은 저장된 전체 종목)
+    네트워크 실패 시 저장된 데이터로 fallback
+    """
+    store = get_store()
+    try:
+        store.update(tickers)
+    except Exception as e:
+        print(f"[PRICE] 갱신 실패: {e} — 저장된 데이터 사용")
+    return store.frame(field, start, rows)
@@ -0,0 +1,397 @@
+"""
+포트폴리오 리스크 엔진 (NumPy 행렬)
+- 종목 × 일 수익률 행렬 R, 평가액 비중 w → 포트폴리오 수익률 = w @ R
+- 롤링 20/60/120/252일 Sharpe, Sortino, 변동성: 누적합(Σr, Σr², Σmin(r,0)²) 1회 → 창별 차분 O(n)
+- 롤링 MDD: 누적 로그자산 창 뷰(복사 없음)에서 running max → 창 내 최대 낙폭
+- 종목별 + 포트폴리오를 한 행렬로 같이 계산 (행 0..k-1 = 종목, 마지막 행 = 포트폴리오)
+- 비중은 (k,) 또는 (계좌 × k) 행렬 — 여러 계좌를 같은 수익률 행렬·난수·공분산으로 한 번에 평가
+- VaR/CVaR: 과거 수익률(1일/10일 중첩 구간) + 몬테카를로 (공분산 Cholesky 상관 경로, 청크 단위 생성)
+- 공분산: 252일 롤링 합(Σxxᵀ, Σ(xxᵀ)²)을 새 날짜만 더하고 빠지는 날짜만 빼서 갱신 → Ledoit-Wolf 수축
+  실행당 1회 계산해 몬테카를로 VaR·위험 기여도가 공유
+"""
+
+import os
+import json
+
+import numpy as np
+
+WINDOWS = (20, 60, 120, 252)
+TRADING_DAYS = 252
+RISK_FREE = 0.04     # 무위험수익률 (연)
+METRICS = ('sharpe', 'sortino', 'volatility', 'mdd')
+
+# VaR/CVaR
+VAR_ALPHA    = 0.95
+VAR_HORIZONS = (1, 10)          # 거래일
+MC_PATHS     = 100_000
+MC_CHUNK_ELEMS = 2_000_000      # 청크당 난수 개수 상한 (경로 × 일 × 종목) ≈ 16MB
+MC_SEED      = 42
+
+# 공분산 (일 수익률 평균 0 가정 — 일간 리스크 모형 관행, Ledoit-Wolf assume_centered와 동일)
+COV_WINDOW  = 252
+COV_REBUILD = 252               # 증분 갱신이 이만큼 누적되면 전체 재계산 (부동소수 누적 오차 정리)
+COV_FILE    = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'risk_cov.json')
+
+
+def returns_matrix(closes):
+    """(종목 × 일) 종가 → (종목 × 일-1) 단순수익률 (결측 구간은 0 = 보유 변동 없음)"""
+    closes = np.asarray(closes, dtype=np.float64)
+    filled = closes.copy()
+    # 종목별 직전 종가로 채움 (앞쪽 결측은 그대로 NaN → 수익률 0)
+    idx = np.where(np.isfinite(filled), np.arange(filled.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = np.take_along_axis(filled, idx, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = filled[:, 1:] / filled[:, :-1] - 1
+    return np.where(np.isfinite(r), r, 0.0)
+
+
+def _normalize(weights):
+    """평가액 → 비중 (행별 합 1, 합이 0인 행은 그대로) — (k,) 또는 (계좌 × k)"""
+    w = np.asarray(weights, dtype=np.float64)
+    s = w.sum(axis=-1, keepdims=True)
+    return np.divide(w, s, out=w.copy(), where=s != 0)
+
+
+def _window_sum(c, w):
+    """누적합 c (행 × T+1, 앞에 0열) → 길이 w 창 합 (행 × T), 창이 안 차면 NaN"""
+    out = np.full((c.shape[0], c.shape[1] - 1), np.nan)
+    if c.shape[1] > w:
+        out[:, w - 1:] = c[:, w:] - c[:, :-w]
+    return out
+
+
+def _cumsum0(x):
+    return np.concatenate([np.zeros((x.shape[0], 1)), np.cumsum(x, axis=1)], axis=1)
+
+
+def rolling_mdd(r, w):
+    """
+    창 w일 최대 낙폭 (음수, 비율) — (행 × T), 창이 안 차면 NaN
+    창 [t-w+1, t] 수익률 → 시작 자산 포함 w+1개 지점의 고점 대비 최저
+    """
+    n, t = r.shape
+    out = np.full((n, t), np.nan)
+    if t < w:
+        return out
+    wealth = _cumsum0(np.log1p(r))                               # (행 × T+1) 로그자산
+    win = np.lib.stride_tricks.sliding_window_view(wealth, w + 1, axis=1)   # (행 × T-w+1 × w+1) 뷰
+    dd = win - np.maximum.accumulate(win, axis=-1)
+    out[:, w - 1:] = np.expm1(dd.min(axis=-1))
+    return out
+
+
+def rolling_stats(r, windows=WINDOWS, rf=RISK_FREE):
+    """
+    r: (행 × T) 일 수익률 → {w: {'sharpe', 'sortino', 'volatility', 'mdd': (행 × T)}}
+    연환산: 평균 × 252, 표준편차(ddof=1) × √252, 하방편차 = √mean(min(r,0)²) × √252
+    """
+    r = np.asarray(r, dtype=np.float64)
+    c1 = _cumsum0(r)
+    c2 = _cumsum0(r * r)
+    cd = _cumsum0(np.minimum(r, 0.0) ** 2)
+    ann = np.sqrt(TRADING_DAYS)
+
+    out = {}
+    for w in windows:
+        s1, s2, sd = _window_sum(c1, w), _window_sum(c2, w), _window_sum(cd, w)
+        mean = s1 / w
+        var = np.maximum(s2 - w * mean * mean, 0.0) / (w - 1)
+        vol = np.sqrt(var) * ann
+        down = np.sqrt(sd / w) * ann
+        excess = mean * TRADING_DAYS - rf
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[w] = {
+                'sharpe':     np.where(vol > 0, excess / vol, np.nan),
+                'sortino':    np.where(down > 0, excess / down, np.nan),
+                'volatility': vol,
+                'mdd':        rolling_mdd(r, w),
+            }
+    return out
+
+
+def portfolio_risk(closes, weights, windows=WINDOWS, rf=RISK_FREE):
+    """
+    closes: (종목 × 일) 종가, weights: (종목,) 또는 (계좌 × 종목) 평가액 (행별 합으로 정규화)
+    반환: {'returns': (종목+계좌 × T) — 종목 행 뒤에 포트폴리오 행, 'rolling': rolling_stats 결과,
+           'full': 전체 구간 {'sharpe', 'sortino', 'volatility', 'mdd'} (행별)}
+    """
+    r = returns_matrix(closes)
+    rows = np.vstack([r, _normalize(weights) @ r])
+    n_days = rows.shape[1]
+    full = rolling_stats(rows, windows=(n_days,), rf=rf)[n_days] if n_days >= 2 else {}
+    return {
+        'returns': rows,
+        'rolling': rolling_stats(rows, windows, rf),
+        'full':    {k: v[:, -1] for k, v in full.items()},
+    }
+
+
+def latest(rolling, row=-1):
+    """rolling_stats 결과 → {w: {지표: 마지막 값 (없으면 None)}} (기본: 포트폴리오 행)"""
+    out = {}
+    for w, stats in rolling.items():
+        out[w] = {}
+        for k, v in stats.items():
+            x = v[row, -1] if v.shape[1] else np.nan
+            out[w][k] = float(x) if np.isfinite(x) else None
+    return out
+
+
+# ── VaR / CVaR ───────────────────────────────────────────────────
+
+def var_cvar(losses, alpha=VAR_ALPHA):
+    """손실(양수 = 손실) 표본 → (VaR, CVaR) — VaR 이상 손실의 평균이 CVaR"""
+    losses = np.asarray(losses, dtype=np.float64)
+    losses = losses[np.isfinite(losses)]
+    if not len(losses):
+        return None, None
+    var = float(np.quantile(losses, alpha))
+    return var, float(losses[losses >= var].mean())
+
+
+def horizon_returns(r, horizon):
+    """일 수익률 (T,) → 중첩 horizon일 누적 수익률 (T-horizon+1,) — 로그 누적합 차분"""
+    wealth = np.concatenate([[0.0], np.cumsum(np.log1p(r))])
+    return np.expm1(wealth[horizon:] - wealth[:-horizon])
+
+
+def historical_var(port_r, horizon=1, alpha=VAR_ALPHA):
+    """과거 포트폴리오 수익률 기반 (VaR, CVaR) — 비율"""
+    if len(port_r) < horizon + 1:
+        return None, None
+    return var_cvar(-horizon_returns(port_r, horizon), alpha)
+
+
+def _cholesky(cov):
+    """공분산 Cholesky (수치적으로 반정부호면 대각에 아주 작은 값을 더해 재시도)"""
+    jitter = 0.0
+    scale = float(np.mean(np.diag(cov))) or 1.0
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, scale * 1e-10)
+    raise np.linalg.LinAlgError('공분산이 양의 정부호가 아님')
+
+
+def monte_carlo_returns(returns, weights, horizon=1, n_paths=MC_PATHS,
+                        chunk_elems=MC_CHUNK_ELEMS, seed=MC_SEED, cov=None):
+    """
+    종목 일 수익률 (k × T) 평균/공분산 → 상관 정규 경로 n_paths개의 포트폴리오 horizon일 누적 수익률
+    일별 종목 수익률 = μ + Z @ Lᵀ (L: Cholesky), 포트폴리오 = w · r (매일 같은 비중), horizon일 복리
+    (w · (μ + Z Lᵀ) = w·μ + Z @ (Lᵀw) → 종목 수익률 행렬을 만들지 않고 포트폴리오로 바로 투영)
+    청크(경로 × 일 × 종목 ≤ chunk_elems)로 나눠 생성 → 작업 메모리는 경로 수와 무관
+    cov: 공유 공분산 (없으면 표본 공분산)
+    weights가 (계좌 × k)면 같은 난수를 계좌별 투영 (k × 계좌)에 한 번에 곱함 → (n_paths × 계좌)
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    w = _normalize(weights)
+    k = r.shape[0]
+    mu = r.mean(axis=1)
+    chol = _cholesky(np.atleast_2d(np.cov(r) if cov is None else cov))
+    drift, load = mu @ w.T, chol.T @ w.T
+    rng = np.random.default_rng(seed)
+
+    out = np.empty((n_paths,) + np.shape(drift))
+    step = max(1, chunk_elems // (horizon * k))
+    for i in range(0, n_paths, step):
+        n = min(step, n_paths - i)
+        z = rng.standard_normal((n, horizon, k))
+        daily = drift + z @ load                      # (n, horizon[, 계좌]) 포트폴리오 일 수익률
+        out[i:i + n] = np.expm1(np.log1p(daily).sum(axis=1))
+    return out
+
+
+def var_summary(returns, weights, value, alpha=VAR_ALPHA, horizons=VAR_HORIZONS, n_paths=MC_PATHS,
+                cov=None):
+    """
+    returns: (종목 × T) 일 수익률, weights: (종목,) 평가액, value: 포트폴리오 평가액 (KRW)
+    cov: 공유 공분산 (몬테카를로용, 없으면 returns 표본 공분산)
+    반환: {'hist_1d'|'mc_10d'|...: {'var', 'cvar' (KRW, 양수 = 손실), 'var_pct', 'cvar_pct'}}
+    weights (계좌 × 종목), value (계좌,)이면 계좌별 반환값 리스트 (몬테카를로 경로는 horizon당 1회 생성)
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    w = _normalize(weights)
+    port = np.atleast_2d(w @ r)
+    values = np.broadcast_to(np.asarray(value, dtype=np.float64), (len(port),))
+
+    def _entry(var, cvar, value):
+        if var is None:
+            return None
+        return {'var': round(var * value), 'cvar': round(cvar * value),
+                'var_pct': round(var * 100, 2), 'cvar_pct': round(cvar * 100, 2)}
+
+    out = [{} for _ in port]
+    for h in horizons:
+        for a, p in enumerate(port):
+            out[a][f'hist_{h}d'] = _entry(*historical_var(p, h, alpha), values[a])
+        if r.shape[1] >= 2:
+            mc = monte_carlo_returns(r, w, h, n_paths, cov=cov).reshape(n_paths, -1)
+            for a in range(len(port)):
+                out[a][f'mc_{h}d'] = _entry(*var_cvar(-mc[:, a], alpha), values[a])
+    return out if w.ndim == 2 else out[0]
+
+
+# ── 공분산 (증분 롤링 합 + Ledoit-Wolf) ───────────────────────────
+
+def ledoit_wolf(s2, s4, n):
+    """
+    롤링 합 → (수축 공분산, 수축 강도)
+    s2 = Σ x xᵀ, s4 = Σ (x xᵀ)² (원소별), n = 일수 — 평균 0 가정 Ledoit-Wolf (2004)
+    """
+    k = len(s2)
+    emp = s2 / n
+    mu = np.trace(emp) / k
+    delta = (np.sum(emp ** 2) - 2 * mu * np.trace(emp) + k * mu ** 2) / k
+    beta = (s4.sum() / n - np.sum(emp ** 2)) / (k * n) if n else 0.0
+    beta = min(max(beta, 0.0), delta)
+    shrink = beta / delta if delta > 0 else 0.0
+    return (1 - shrink) * emp + shrink * mu * np.eye(k), float(shrink)
+
+
+class RollingCovariance:
+    """
+    최근 COV_WINDOW일 일 수익률의 Σxxᵀ, Σ(xxᵀ)² 롤링 합 (디스크 저장)
+    - 새 날짜: 더하기, 창 밖으로 밀린 날짜: 빼기 → 하루 갱신 O(k²)
+    - 종목 구성 변경 / 겹치는 날짜 수익률 불일치(수정주가) / 갱신 누적 COV_REBUILD회 → 전체 재계산
+    """
+
+    def __init__(self, path=None):
+        self.path = path or COV_FILE
+        self.tickers, self.dates, self.returns = [], np.empty(0, 'datetime64[D]'), np.empty((0, 0))
+        self.s2 = self.s4 = None
+        self.updates = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+            self.tickers = saved['tickers']
+            self.dates = np.array(saved['dates'], dtype='datetime64[D]')
+            self.returns = np.array(saved['returns'], dtype=np.float64).reshape(len(self.tickers), len(self.dates))
+            self.s2 = np.array(saved['s2'], dtype=np.float64)
+            self.s4 = np.array(saved['s4'], dtype=np.float64)
+            self.updates = saved.get('updates', 0)
+        except Exception:
+            self.s2 = self.s4 = None
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'tickers': self.tickers, 'dates': [str(d) for d in self.dates],
+                           'returns': self.returns.tolist(), 's2': self.s2.tolist(), 's4': self.s4.tolist(),
+                           'updates': self.updates}, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[RISK] 공분산 상태 저장 실패: {e}")
+
+    def _rebuild(self, dates, returns, tickers):
+        self.tickers = list(tickers)
+        self.dates, self.returns = dates[-COV_WINDOW:], returns[:, -COV_WINDOW:]
+        x = self.returns
+        self.s2 = x @ x.T
+        self.s4 = (x * x) @ (x * x).T
+        self.updates = 0
+
+    def update(self, dates, returns, tickers):
+        """
+        dates: (T,) 수익률 날짜, returns: (종목 × T) — 확정된 날짜만 (장중 미확정 봉 제외)
+        반환: 'rebuild' | 'incremental' | 'unchanged'
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        returns = np.asarray(returns, dtype=np.float64)
+        if self.s2 is None or list(tickers) != self.tickers or not len(self.dates):
+            self._rebuild(dates, returns, tickers)
+            return 'rebuild'
+
+        # 저장된 마지막 날짜가 입력에 있고 수익률이 같아야 이어붙이기 가능
+        last = self.dates[-1]
+        i = int(np.searchsorted(dates, last))
+        if i >= len(dates) or dates[i] != last or \
+                not np.allclose(returns[:, i], self.returns[:, -1], rtol=1e-9, atol=1e-12):
+            self._rebuild(dates, returns, tickers)
+            return 'rebuild'
+
+        new_dates, new = dates[i + 1:], returns[:, i + 1:]
+        if not len(new_dates):
+            return 'unchanged'
+        if self.updates + len(new_dates) >= COV_REBUILD:
+            self._rebuild(dates, returns, tickers)
+            return 'rebuild'
+
+        self.s2 += new @ new.T
+        self.s4 += (new * new) @ (new * new).T
+        self.dates = np.concatenate([self.dates, new_dates])
+        self.returns = np.concatenate([self.returns, new], axis=1)
+        drop = len(self.dates) - COV_WINDOW
+        if drop > 0:
+            old = self.returns[:, :drop]
+            self.s2 -= old @ old.T
+            self.s4 -= (old * old) @ (old * old).T
+            self.dates, self.returns = self.dates[drop:], self.returns[:, drop:]
+        self.updates += len(new_dates)
+        return 'incremental'
+
+    @property
+    def n(self):
+        return len(self.dates)
+
+    def covariance(self):
+        """Ledoit-Wolf 수축 공분산 (일 단위) + 수축 강도"""
+        return ledoit_wolf(self.s2, self.s4, self.n)
+
+
+def correlation(cov):
+    sd = np.sqrt(np.diag(cov))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return cov / np.outer(sd, sd)
+
+
+def risk_contributions(cov, weights, groups=None):
+    """
+    cov: (k × k) 일 공분산, weights: (k,) 평가액 (합으로 정규화)
+    반환: {'vol' (연), 'marginal' (k,) ∂σ/∂w (연), 'component' (k,) w·∂σ/∂w (연, 합 = vol),
+           'share' (k,) 기여 비율, 'groups': {그룹: 기여 비율}}
+    weights (계좌 × k)면 각 값에 계좌 축이 붙고 (vol (계좌,)), groups도 (계좌 × k) 또는 공통 (k,),
+    'groups'는 계좌별 dict 리스트
+    """
+    w = _normalize(weights)
+    W = np.atleast_2d(w)
+    ann = np.sqrt(TRADING_DAYS)
+    wc = W @ cov                                            # (계좌 × k) = (Σw)ᵀ
+    sigma = np.sqrt(np.maximum(np.einsum('ak,ak->a', wc, W), 0.0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        marginal = np.where(sigma[:, None] > 0, wc / sigma[:, None], 0.0)
+    component = W * marginal
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = np.where(sigma[:, None] > 0, component / sigma[:, None], 0.0)
+    out = {'vol': sigma * ann, 'marginal': marginal * ann, 'component': component * ann, 'share': share}
+    if groups is not None:
+        rows = groups if w.ndim == 2 and len(groups) and not isinstance(groups[0], str) else [groups] * len(W)
+        out['groups'] = []
+        for g_row, s_row in zip(rows, share):
+            agg = {}
+            for g, s in zip(g_row, s_row):
+                agg[g] = agg.get(g, 0.0) + float(s)
+            out['groups'].append(agg)
+    if w.ndim == 1:
+        out = {k: (v[0] if k != 'vol' else float(v[0])) for k, v in out.items()}
+    return out
+
+
+def shared_covariance(dates, returns, tickers, path=None):
+    """
+    실행당 1회: 저장된 롤링 합을 새 날짜만큼 갱신 → (Ledoit-Wolf 공분산, 수축 강도)
+    dates/returns는 확정된 날짜까지만 넘길 것 (장중 미확정 봉이 저장되면 다음 실행에서 전체 재계산)
+    """
+    rc = RollingCovariance(path)
+    mode = rc.update(dates, returns, tickers)
+    if mode != 'unchanged':
+        rc.save()
+    cov, shrink = rc.covariance()
+    print(f"[RISK] 공분산 {mode}: {len(tickers)}종목 × {rc.n}일  수축 {shrink:.2f}")
+    return cov, shrink
@@ -0,0 +1,308 @@
+"""
+스트레스 시나리오 재현 (현재 portfolio.json 비중, 매수 후 보유 가정)
+- 과거 충격 구간: 구간 시작 종가 대비 일별 누적 가격비 경로 (2008 GFC, 2018 Q4, 2020.3 코로나, 2022 금리충격)
+- 팩터 충격: 충격 팩터(ETF) 수익률에 대한 조건부 베타(최근 1년 일간 회귀) × 충격 → 1행 경로
+- 구간 이전 상장 종목은 SPY 베타 × SPY 경로로 대체 (proxied)
+- 모든 시나리오 경로를 (행 × 종목) float32 행렬 하나로 `.cache/scenarios.npz`에 저장 (SCENARIO_MAX_AGE_DAYS 주기 재구축)
+- 평가: 경로 행렬 @ 비중ᵀ 1회 → 시나리오 구간별 최저점(minimum.reduceat) = 최악 손실 (계좌 여러 개도 같은 곱)
+
+사용: python scenarios.py [--rebuild] [--shock SPY=-0.2 TLT=-0.1]
+"""
+
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'scenarios.npz')
+SCENARIO_MAX_AGE_DAYS = 30      # 팩터 베타·대체 경로 재추정 주기
+
+# 과거 충격 구간 (키: (이름, 시작일, 종료일)) — 시작일 종가 = 1.0
+HISTORICAL = {
+    'gfc_2008':   ('2008 GFC',      '2008-09-02', '2009-03-09'),
+    'q4_2018':    ('2018 Q4',       '2018-09-20', '2018-12-24'),
+    'covid_2020': ('2020.3 코로나', '2020-02-19', '2020-03-23'),
+    'rate_2022':  ('2022 금리충격', '2022-01-03', '2022-10-12'),
+}
+
+# 팩터 ETF (충격 입력 단위 = ETF 수익률)
+FACTORS = {'SPY': '시장', 'QQQ': '기술주', 'TLT': '장기채', 'UUP': '달러', 'USO': '유가'}
+PROXY_FACTOR = 'SPY'
+
+# 사용자 정의 팩터 충격 (키: (이름, {팩터: 수익률}))
+FACTOR_SHOCKS = {
+    'equity_-20':  ('주식 -20%',            {'SPY': -0.20}),
+    'tech_-25':    ('기술주 -25%',          {'QQQ': -0.25}),
+    'rates_up':    ('금리 급등 (TLT -15%)', {'TLT': -0.15}),
+    'stagflation': ('스태그플레이션',       {'SPY': -0.15, 'TLT': -0.10, 'USO': 0.30}),
+}
+
+FACTOR_LOOKBACK = 252           # 베타 회귀 거래일
+DOWNLOAD_PAD_DAYS = 10          # 첫 구간 시작일 이전 여유 (휴장일)
+
+
+def _download_closes(tickers, start):
+    """yfinance 배치 1회 → 종가 (날짜 × 종목) DataFrame"""
+    import yfinance as yf
+
+    data = yf.download(tickers, start=str(start), auto_adjust=True, progress=False, threads=True)
+    close = data['Close']
+    if close.ndim == 1:
+        close = close.to_frame(tickers[0])
+    return close.reindex(columns=tickers)
+
+
+def _daily_returns(x):
+    """(일 × 종목) 종가 → 일 수익률 (결측은 0)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = x[1:] / x[:-1] - 1
+    return np.where(np.isfinite(r), r, 0.0)
+
+
+def conditional_betas(asset_r, factor_r):
+    """
+    asset_r: (T × k), factor_r: (T × f) 일 수익률 → (f × k) 다변량 회귀 계수 (평균 0 가정)
+    충격 팩터만으로 회귀 = 나머지 팩터를 조건부 기댓값으로 둔 베타 (QQQ/SPY 공선성 회피)
+    """
+    beta, *_ = np.linalg.lstsq(factor_r, asset_r, rcond=None)
+    return beta
+
+
+def factor_shock_row(asset_r, factor_r, factors, shock):
+    """팩터 충격 {ETF: 수익률} → (k,) 가격비 (1 + 조건부 베타 @ 충격)"""
+    idx = [factors.index(f) for f in shock]
+    beta = conditional_betas(asset_r, factor_r[:, idx])
+    return 1.0 + np.array([shock[f] for f in shock]) @ beta
+
+
+def build_book(tickers, shocks=None, close=None):
+    """
+    시나리오 경로 행렬 구축 (다운로드 1회)
+    반환: {'tickers', 'keys', 'names', 'offsets' (S,), 'matrix' (행 × k float32), 'proxied' (S × k bool), 'built',
+           'factors', 'asset_r' / 'factor_r' (최근 1년 일 수익률 float32 — 추가 충격을 다운로드 없이 계산)}
+    close: 테스트/재사용용 종가 프레임 (없으면 다운로드)
+    """
+    shocks = FACTOR_SHOCKS if shocks is None else shocks
+    tickers = list(dict.fromkeys(tickers))
+    factors = list(FACTORS)
+    columns = list(dict.fromkeys(tickers + factors))
+    if close is None:
+        start = min(np.datetime64(s) for _, s, _ in HISTORICAL.values()) - DOWNLOAD_PAD_DAYS
+        close = _download_closes(columns, start)
+    dates = np.asarray(close.index.values, dtype='datetime64[D]')
+    x = close.reindex(columns=columns).to_numpy(dtype=np.float64)
+    col = {t: i for i, t in enumerate(columns)}
+    tk_idx = [col[t] for t in tickers]
+
+    # 최근 1년 일 수익률 → 대체용 시장 베타 + 팩터 충격 회귀
+    recent = _daily_returns(x[-(FACTOR_LOOKBACK + 1):])
+    asset_r = recent[:, tk_idx]
+    factor_r = recent[:, [col[f] for f in factors]]
+    mkt = factor_r[:, factors.index(PROXY_FACTOR)]
+    var_m = float(mkt @ mkt)
+    market_beta = (mkt @ asset_r) / var_m if var_m else np.zeros(len(tickers))
+
+    keys, names, blocks, proxied = [], [], [], []
+    for key, (name, start, end) in HISTORICAL.items():
+        rows = (dates >= np.datetime64(start)) & (dates <= np.datetime64(end))
+        if not rows.any():
+            continue
+        window = x[rows]
+        # 구간 내 결측은 직전 종가로, 시작일 종가가 없으면(미상장) 시장 베타 대체
+        filled = window.copy()
+        idx = np.where(np.isfinite(filled), np.arange(len(filled))[:, None], 0)
+        np.maximum.accumulate(idx, axis=0, out=idx)
+        filled = np.take_along_axis(filled, idx, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            growth = filled / filled[0]
+        spy_path = growth[:, col[PROXY_FACTOR]]
+        g = growth[:, tk_idx]
+        missing = ~np.isfinite(g[0])
+        g[:, missing] = 1.0 + np.outer(spy_path - 1.0, market_beta[missing])
+        keys.append(key)
+        names.append(name)
+        blocks.append(np.where(np.isfinite(g), g, 1.0))
+        proxied.append(missing)
+
+    for key, (name, shock) in shocks.items():
+        keys.append(key)
+        names.append(name)
+        blocks.append(factor_shock_row(asset_r, factor_r, factors, shock)[None, :])
+        proxied.append(np.zeros(len(tickers), dtype=bool))
+
+    lengths = [len(b) for b in blocks]
+    return {
+        'tickers': np.array(tickers),
+        'keys':    np.array(keys),
+        'names':   np.array(names),
+        'offsets': np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64),
+        'matrix':  np.vstack(blocks).astype(np.float32) if blocks else np.ones((0, len(tickers)), np.float32),
+        'proxied': np.array(proxied, dtype=bool).reshape(len(blocks), len(tickers)),
+        'built':   np.array(str(np.datetime64('today', 'D'))),
+        'factors': np.array(factors),
+        'asset_r': asset_r.astype(np.float32),
+        'factor_r': factor_r.astype(np.float32),
+    }
+
+
+def add_shock(book, key, name, shock):
+    """저장된 최근 수익률로 팩터 충격 1행을 덧붙인 새 book (저장본은 그대로)"""
+    row = factor_shock_row(book['asset_r'].astype(np.float64), book['factor_r'].astype(np.float64),
+                           book['factors'].tolist(), shock)
+    return {**book,
+            'keys':    np.append(book['keys'], key),
+            'names':   np.append(book['names'], name),
+            'offsets': np.append(book['offsets'], len(book['matrix'])),
+            'matrix':  np.vstack([book['matrix'], row[None, :].astype(np.float32)]),
+            'proxied': np.vstack([book['proxied'], np.zeros((1, len(book['tickers'])), dtype=bool)])}
+
+
+def save_book(book, path=None):
+    path = path or BOOK_FILE
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, **book)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[STRESS] 시나리오 저장 실패: {e}")
+
+
+def load_book(path=None):
+    try:
+        with np.load(path or BOOK_FILE) as f:
+            return {k: f[k] for k in f.files}
+    except Exception:
+        return None
+
+
+def get_book(tickers, path=None, rebuild=False):
+    """
+    저장된 시나리오 행렬 재사용 — 종목이 빠져 있거나 SCENARIO_MAX_AGE_DAYS 경과 시에만 재구축 (다운로드 1회)
+    재구축 실패 시 저장본이 있으면 그대로 사용 (없는 종목은 stress()에서 제외)
+    """
+    book = None if rebuild else load_book(path)
+    if book is not None:
+        age = (np.datetime64('today', 'D') - np.datetime64(str(book['built']))).astype(int)
+        if set(tickers) <= set(book['tickers'].tolist()) and age <= SCENARIO_MAX_AGE_DAYS:
+            return book
+    try:
+        t0 = time.perf_counter()
+        fresh = build_book(tickers)
+        save_book(fresh, path)
+        print(f"[STRESS] 시나리오 행렬 구축: {len(fresh['keys'])}개 × {len(fresh['tickers'])}종목 "
+              f"({fresh['matrix'].shape[0]}행, {time.perf_counter() - t0:.1f}s)")
+        return fresh
+    except Exception as e:
+        print(f"[STRESS] 시나리오 구축 실패: {e}" + (" — 저장본 사용" if book is not None else ''))
+        return book
+
+
+def stress(book, tickers, weights, value):
+    """
+    book: get_book() 결과, weights: (k,) 또는 (계좌 × k) 평가액 (tickers 순서), value: 평가액 (KRW) 스칼라/(계좌,)
+    반환: {시나리오 키: {'name', 'loss' (KRW, 최저점 손실 양수), 'pct' (최저점 %), 'end_pct' (구간 종료 %),
+           'proxied': [대체 경로 종목]}} — 2-D weights면 계좌별 리스트
+    """
+    w = np.asarray(weights, dtype=np.float64)
+    W = np.atleast_2d(w)
+    col = {t: i for i, t in enumerate(book['tickers'].tolist())}
+    have = np.array([t in col for t in tickers])
+    # 저장본에 없는 종목(구축 실패 시)은 비중에서 제외
+    Wb = np.zeros((len(W), len(col)))
+    Wb[:, [col[t] for t, ok in zip(tickers, have) if ok]] = W[:, have]
+    s = Wb.sum(axis=1, keepdims=True)
+    Wb = np.divide(Wb, s, out=np.zeros_like(Wb), where=s != 0)
+
+    offsets = book['offsets']
+    ends = np.append(offsets[1:], len(book['matrix'])) - 1
+    path = book['matrix'] @ Wb.T.astype(np.float32)            # (행 × 계좌) 포트폴리오 가격비
+    trough = np.minimum(np.minimum.reduceat(path, offsets, axis=0), 1.0) if len(offsets) else path[:0]
+    end = path[ends]
+    values = np.broadcast_to(np.asarray(value, dtype=np.float64), (len(W),))
+
+    out = []
+    for a in range(len(W)):
+        held = Wb[a] > 0
+        res = {}
+        for j, key in enumerate(book['keys'].tolist()):
+            res[key] = {
+                'name':    str(book['names'][j]),
+                'loss':    round(float(1.0 - trough[j, a]) * values[a]),
+                'pct':     round(float(trough[j, a] - 1.0) * 100, 1),
+                'end_pct': round(float(end[j, a] - 1.0) * 100, 1),
+                'proxied': [str(t) for t in book['tickers'][book['proxied'][j] & held]],
+            }
+        out.append(res)
+    return out if w.ndim == 2 else out[0]
+
+
+def worst(result, n=None):
+    """stress() 결과 → 손실 큰 순 [(키, 항목)]"""
+    ranked = sorted(result.items(), key=lambda kv: -kv[1]['loss'])
+    return ranked[:n] if n else ranked
+
+
+def _parse_shock(items):
+    shock = {}
+    for item in items:
+        name, _, val = item.partition('=')
+        if name not in FACTORS:
+            raise SystemExit(f"알 수 없는 팩터 {name} (사용 가능: {', '.join(FACTORS)})")
+        shock[name] = float(val)
+    return shock
+
+
+def main():
+    parser = argparse.ArgumentParser(description='포트폴리오 스트레스 시나리오 재현')
+    parser.add_argument('--rebuild', action='store_true', help='저장된 시나리오 행렬 무시하고 재구축')
+    parser.add_argument('--shock', nargs='+', metavar='ETF=수익률',
+                        help=f"추가 팩터 충격 (예: SPY=-0.2 TLT=-0.1, 팩터: {', '.join(FACTORS)})")
+    args = parser.parse_args()
+
+    import price_store
+    from wdklab_monitor import load_portfolio_accounts, _last_two
+
+    pf_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'portfolio.json')
+    with open(pf_path, encoding='utf-8') as f:
+        pf = json.load(f)
+    accounts = load_portfolio_accounts(pf)
+    usd_krw  = pf.get('usd_krw', 1430)
+    tickers  = list(dict.fromkeys(h['ticker'] for acc in accounts for h in acc['holdings']))
+    if not tickers:
+        print("[STRESS] 보유 종목 없음")
+        return
+    col = {t: i for i, t in enumerate(tickers)}
+    shares = np.zeros((len(accounts), len(tickers)))
+    for a, acc in enumerate(accounts):
+        for h in acc['holdings']:
+            shares[a, col[h['ticker']]] = h['shares']
+
+    closes = price_store.load(tickers, 'close', rows=5)
+    curr, _ = _last_two(closes.reindex(columns=tickers).to_numpy().T)
+    weights = shares * np.where(np.isfinite(curr), curr, 0.0)
+    values = weights.sum(axis=1) * usd_krw
+
+    book = get_book(tickers, rebuild=args.rebuild)
+    if book is None:
+        print("[STRESS] ❌ 시나리오 행렬 없음")
+        return
+    if args.shock:
+        book = add_shock(book, 'custom', '사용자 ' + ' '.join(args.shock), _parse_shock(args.shock))
+
+    t0 = time.perf_counter()
+    results = stress(book, tickers, weights, values)
+    elapsed = (time.perf_counter() - t0) * 1000
+
+    print(f"\n🧯 스트레스 시나리오 ({len(book['keys'])}개 × {len(accounts)}개 계좌, 평가 {elapsed:.2f}ms)")
+    for acc, res, val in zip(accounts, results, values):
+        print(f"\n[{acc['name']}] 평가액 ₩{val:,.0f}")
+        for key, r in worst(res):
+            note = f"  (대체: {', '.join(r['proxied'])})" if r['proxied'] else ''
+            print(f"  {r['name']:<24} 최악 -₩{r['loss']:>12,}  {r['pct']:+6.1f}%  종료 {r['end_pct']:+6.1f}%{note}")
+
+
+if __name__ == '__main__':
+    main()
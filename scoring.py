@@ -0,0 +1,130 @@
+"""
+바텀업 횡단면 점수 엔진 (NumPy 행렬)
+- 입력: 종목 × 원시 지표 행렬
+- 지표별 Min-Max 정규화(-1 ~ +1)·RSI/Beta 구간 점수를 한 번에 계산
+- 모멘텀/펀더멘탈/밸류에이션 = 특징 행렬 @ 가중치 행렬 → clip, 최종 = 그룹 점수 @ WEIGHTS → clip
+"""
+
+import numpy as np
+
+# 원시 지표 컬럼 순서 (metric_matrix 입력)
+METRICS = (
+    'perf_52w', 'perf_5d', 'rsi', 'macd_cross',
+    'eps_growth', 'revenue_growth', 'profit_margin', 'roe', 'fcf_margin',
+    'pe', 'forward_pe', 'peg',
+    'beta',
+)
+_COL = {name: i for i, name in enumerate(METRICS)}
+
+# Min-Max 정규화 대상 (inverse=True: 낮을수록 좋음)
+MINMAX = {
+    'perf_52w': False, 'perf_5d': False,
+    'eps_growth': False, 'revenue_growth': False, 'profit_margin': False,
+    'roe': False, 'fcf_margin': False,
+    'pe': True, 'forward_pe': True, 'peg': True,
+}
+
+GROUPS = ('momentum', 'fundamental', 'valuation')
+
+# 특징(정규화된 지표) → 그룹 가중치
+GROUP_WEIGHTS = {
+    'momentum': {
+        'perf_52w':   0.40,   # 52주 수익률 (장기 추세)
+        'perf_5d':    0.30,   # 5일 수익률  (주간 모멘텀)
+        'rsi':        0.20,   # RSI         (과매수/과매도)
+        'macd_cross': 0.10,   # MACD 크로스 (단기 방향성)
+    },
+    'fundamental': {
+        'eps_growth': 0.25, 'revenue_growth': 0.20, 'profit_margin': 0.20,
+        'roe': 0.20, 'fcf_margin': 0.15,
+    },
+    'valuation': {
+        'forward_pe': 0.40, 'peg': 0.35, 'pe': 0.25,
+    },
+}
+
+
+def _weight_matrix():
+    """(지표 수 × 그룹 수) 가중치 행렬"""
+    w = np.zeros((len(METRICS), len(GROUPS)))
+    for j, group in enumerate(GROUPS):
+        for name, weight in GROUP_WEIGHTS[group].items():
+            w[_COL[name], j] = weight
+    return w
+
+
+W_GROUPS = _weight_matrix()
+
+
+def metric_matrix(metrics):
+    """[{'ticker', 지표...}, ...] → (tickers, (N × len(METRICS)) float64, None은 NaN)"""
+    tickers = [m['ticker'] for m in metrics]
+    x = np.array([[np.nan if m.get(k) is None else m[k] for k in METRICS] for m in metrics],
+                 dtype=np.float64).reshape(len(metrics), len(METRICS))
+    return tickers, x
+
+
+def minmax(x, inverse):
+    """
+    열별 Min-Max → -1 ~ +1 (inverse: bool 배열, True면 뒤집기)
+    NaN은 0, 유효값 2개 미만이거나 max == min인 열은 전부 0
+    """
+    valid = np.isfinite(x)
+    lo = np.nanmin(np.where(valid, x, np.inf), axis=0)
+    hi = np.nanmax(np.where(valid, x, -np.inf), axis=0)
+    span = hi - lo
+    ok = (valid.sum(axis=0) >= 2) & (span > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = (x - lo) / span
+    n = np.where(inverse, 1 - n, n) * 2 - 1
+    return np.where(valid & ok, n, 0.0)
+
+
+def rsi_score(rsi):
+    """70 이상 -0.5 (과매수), 30 이하 +0.5 (과매도), 그 사이 선형"""
+    return np.where(rsi >= 70, -0.5, np.where(rsi <= 30, 0.5, (rsi - 50) / 20 * 0.5))
+
+
+def beta_score(beta):
+    """Beta 0.5 ~ 1.5 → +0.5, 0.5 미만 -0.3, 1.5 초과 -0.5"""
+    return np.where(beta < 0.5, -0.3, np.where(beta <= 1.5, 0.5, -0.5))
+
+
+def features(x):
+    """원시 지표 행렬 → 점수화된 특징 행렬 (같은 열 순서)"""
+    f = x.copy()
+    cols = [_COL[k] for k in MINMAX]
+    f[:, cols] = minmax(x[:, cols], np.array(list(MINMAX.values())))
+    f[:, _COL['rsi']] = rsi_score(x[:, _COL['rsi']])
+    f[:, _COL['beta']] = beta_score(x[:, _COL['beta']])
+    return np.where(np.isfinite(f), f, 0.0)
+
+
+def score_matrix(x, weights):
+    """
+    x: (N × len(METRICS)) 원시 지표, weights: {'momentum', 'fundamental', 'valuation'}
+    반환: {'momentum', 'fundamental', 'valuation', 'risk', 'final': (N,) 배열}
+    """
+    f = features(x)
+    groups = np.clip(f @ W_GROUPS, -1.0, 1.0)
+    out = {g: groups[:, j] for j, g in enumerate(GROUPS)}
+    out['risk'] = f[:, _COL['beta']]
+    out['final'] = blend(out, weights)
+    return out
+
+
+def blend(groups, weights):
+    """그룹 점수 {'momentum', 'fundamental', 'valuation': (N,)} → 최종 점수 (clip)"""
+    g = np.column_stack([np.asarray(groups[k], dtype=np.float64) for k in GROUPS])
+    return np.clip(g @ np.array([weights[k] for k in GROUPS]), -1.0, 1.0)
+
+
+def momentum_scores(x):
+    """
+    모멘텀 블록만 재계산 (장중 가격 갱신용) — score_matrix()['momentum']과 동일
+    x의 모멘텀 외 열은 무시 (NaN이어도 됨)
+    """
+    m = np.full_like(x, np.nan)
+    cols = [_COL[k] for k in GROUP_WEIGHTS['momentum']]
+    m[:, cols] = x[:, cols]
+    return np.clip(features(m) @ W_GROUPS[:, 0], -1.0, 1.0)
@@ -0,0 +1,250 @@
+"""
+탑다운 신호 규칙 (King/Queen/Context → Composite → GREEN/YELLOW/RED + 비대칭 점수)
+- 모든 규칙은 NumPy 배열 입력 → 배열 출력 (스칼라도 그대로 동작)
+- 실시간(calculate_signal)과 히스토리 백필(compute_history)이 같은 규칙을 공유
+- 실시간 결과는 버전 붙은 스냅샷(topdown_snapshot.json)으로 남겨 생성기가 재사용
+"""
+
+import os
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+# 월간 지표 발표 지연 (관측일 → 실제 공개일, 일) — 백필의 look-ahead 방지용
+PUBLICATION_LAG_DAYS = {
+    'PCEPILFE': 60,   # 1월 Core PCE → 2월 말 발표
+    'M2SL': 55,       # 1월 M2 → 2월 말 발표
+}
+
+
+# ===== 개별 규칙 =====
+
+def fed_signal(dgs2_change_bp, king=10):
+    """King: 2Y 20영업일 변화량(bp) ≤ -king → +1, ≥ king → -1"""
+    x = np.asarray(dgs2_change_bp, dtype=float)
+    return np.where(x <= -king, 1, np.where(x >= king, -1, 0))
+
+
+def inflation_signal(pce_yoy, pce_3m_ann, yoy_th=2.6, m3_th=2.2):
+    """Queen: YoY·3개월 연율 둘 다 임계값 이하 → +1, 둘 다 초과 → -1"""
+    yoy = np.asarray(pce_yoy, dtype=float)
+    m3  = np.asarray(pce_3m_ann, dtype=float)
+    return np.where((yoy <= yoy_th) & (m3 <= m3_th), 1,
+                    np.where((yoy > yoy_th) & (m3 > m3_th), -1, 0))
+
+
+def context_signal(vix, spread, baa, vix_th=18):
+    """Context: VIX / 10Y-2Y / BAA 스프레드 3개 점수 평균 → ±0.33 기준"""
+    vix, spread, baa = (np.asarray(a, dtype=float) for a in (vix, spread, baa))
+    vix_s    = np.where(vix <= vix_th, 1, np.where(vix >= 30, -1, 0))
+    spread_s = np.where(spread >= 0.25, 1, np.where(spread <= -0.25, -1, 0))
+    baa_s    = np.where(baa <= 2.0, 1, np.where(baa >= 3.0, -1, 0))
+    mean = (vix_s + spread_s + baa_s) / 3
+    return np.where(mean > 0.33, 1, np.where(mean < -0.33, -1, 0))
+
+
+def composite_score(fed, infl, ctx, weights):
+    """가중 합 (weights: {'fed', 'inflation', 'context'} — % 단위)"""
+    return (
+        (weights['fed'] / 100) * np.asarray(fed) +
+        (weights['inflation'] / 100) * np.asarray(infl) +
+        (weights['context'] / 100) * np.asarray(ctx)
+    )
+
+
+def signal_label(composite):
+    """Composite > 0.2 → GREEN, < -0.2 → RED, 그 외 YELLOW"""
+    c = np.asarray(composite, dtype=float)
+    return np.where(c > 0.2, 'GREEN', np.where(c < -0.2, 'RED', 'YELLOW'))
+
+
+def _bucket(x, hi, lo):
+    """> hi → +2, > 0 → +1, > lo → -1, 그 외 -2, NaN → 0"""
+    x = np.asarray(x, dtype=float)
+    score = np.where(x > hi, 2, np.where(x > 0, 1, np.where(x > lo, -1, -2)))
+    return np.where(np.isnan(x), 0, score)
+
+
+def asym_score(equity_bond_gap, m2_accel, fed, infl):
+    """셋업 비대칭 점수 (드라켄밀러) — 채권갭 + M2 가속도 + King + Queen (없는 지표는 0점)"""
+    return _bucket(equity_bond_gap, 1.0, -1.0) + _bucket(m2_accel, 2.0, -2.0) + \
+        np.asarray(fed) + np.asarray(infl)
+
+
+def asymmetry_grade(score):
+    """≥4 EXTREME, ≥2 HIGH, ≥0 MEDIUM, 그 외 LOW"""
+    s = np.asarray(score)
+    return np.where(s >= 4, 'EXTREME', np.where(s >= 2, 'HIGH', np.where(s >= 0, 'MEDIUM', 'LOW')))
+
+
+def m2_acceleration(m2, when=None):
+    """M2 가속도 (%p) = 최근 6개월 연율 - 그 이전 6개월 연율"""
+    rate_recent = m2.annualized(6, when)
+    rate_prior  = ((m2.months_back(6, when) / m2.months_back(12, when)) ** 2 - 1) * 100
+    return rate_recent - rate_prior
+
+
+# ===== 히스토리 백필 =====
+
+def history_inputs(data, start='2000-01-01'):
+    """
+    매 거래일(DGS2 관측일) 신호 입력값 — 임계값/가중치와 무관 (백테스트는 한 번만 계산)
+    data: {'DGS2', 'DGS10', 'VIXCLS', 'BAMLC0A0CM', 'PCEPILFE', 'M2SL': TimeSeries}
+    - 월간 지표는 PUBLICATION_LAG_DAYS만큼 늦춰 조회 (그날 알 수 있던 값만 사용)
+    - 결측은 실시간 계산과 같은 기본값으로 채움
+    반환: {컬럼명: ndarray} (date 컬럼은 datetime64[D])
+    """
+    grid = data['DGS2'].since(start).dates
+
+    def _lagged(key):
+        return grid - np.timedelta64(PUBLICATION_LAG_DAYS.get(key, 0), 'D')
+
+    def _fill(x, default):
+        return np.where(np.isfinite(x), x, default)
+
+    pce_when = _lagged('PCEPILFE')
+    return {
+        'date': grid,
+        'dgs2_change_bp': _fill(data['DGS2'].change(20, grid), 0) * 100,
+        'pce_yoy':    _fill(data['PCEPILFE'].yoy(pce_when), 2.5),
+        'pce_3m_ann': _fill(data['PCEPILFE'].annualized(3, pce_when), 2.5),
+        'vix':    _fill(data['VIXCLS'].asof(grid), 20),
+        'spread': _fill(data['DGS10'].asof(grid) - data['DGS2'].asof(grid), 0),
+        'baa':    _fill(data['BAMLC0A0CM'].asof(grid), 2),
+        'm2_accel': m2_acceleration(data['M2SL'], _lagged('M2SL')),
+    }
+
+
+def compute_history(data, thresholds, weights, start='2000-01-01'):
+    """
+    전체 시계열로 매 거래일 신호를 한 번에 계산 (벡터화, history_inputs 참고)
+    - SPY PE 히스토리가 없으므로 asym_score는 채권갭 없이 계산 (실시간에서 갭 실패 시와 동일)
+    반환: history_inputs 컬럼 + 신호 컬럼
+    """
+    hist = history_inputs(data, start)
+
+    fed  = fed_signal(hist['dgs2_change_bp'], thresholds['king'])
+    infl = inflation_signal(hist['pce_yoy'], hist['pce_3m_ann'],
+                            thresholds['pce_yoy'], thresholds['pce_3m'])
+    ctx  = context_signal(hist['vix'], hist['spread'], hist['baa'], thresholds['vix'])
+    comp = composite_score(fed, infl, ctx, weights)
+
+    hist.update({
+        'fed_signal': fed,
+        'inflation_signal': infl,
+        'context_signal': ctx,
+        'composite': comp,
+        'signal': signal_label(comp),
+        'asym_score': asym_score(np.full(len(comp), np.nan), hist['m2_accel'], fed, infl),
+    })
+    return hist
+
+
+def history_to_json(hist):
+    """
+    백필 결과 → 컬럼형 압축 JSON (chart.html 로드용)
+    signal은 'G'/'Y'/'R' 한 글자씩 이어붙인 문자열
+    """
+    def _r(a, n):
+        return [None if not np.isfinite(v) else round(float(v), n) for v in a]
+
+    return {
+        'version': 1,
+        'start': str(hist['date'][0]) if len(hist['date']) else None,
+        'end': str(hist['date'][-1]) if len(hist['date']) else None,
+        'count': int(len(hist['date'])),
+        'columns': {
+            'd':    [str(d) for d in hist['date']],
+            'comp': _r(hist['composite'], 2),
+            'fed':  hist['fed_signal'].tolist(),
+            'infl': hist['inflation_signal'].tolist(),
+            'ctx':  hist['context_signal'].tolist(),
+            'sig':  ''.join(s[0] for s in hist['signal']),
+            'asym': hist['asym_score'].tolist(),
+            'vix':  _r(hist['vix'], 1),
+            'sp':   _r(hist['spread'], 3),
+            'pce':  _r(hist['pce_yoy'], 2),
+            'bp':   _r(hist['dgs2_change_bp'], 1),
+            'm2a':  _r(hist['m2_accel'], 2),
+        }
+    }
+
+
+# ===== 탑다운 스냅샷 (monitor → generator 공유) =====
+
+SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topdown_snapshot.json')
+SNAPSHOT_VERSION = 1
+
+# 이보다 오래된 스냅샷은 생성기가 무시하고 FRED에서 직접 계산
+SNAPSHOT_MAX_AGE_HOURS = 12
+
+_SNAPSHOT_INPUTS  = ('dgs2_change_bp', 'pce_yoy', 'pce_3m_ann', 'vix', 'spread', 'baa',
+                     'm2_accel', 'equity_bond_gap')
+_SNAPSHOT_OUTPUTS = ('signal', 'composite', 'fed_signal', 'inflation_signal', 'context_signal',
+                     'asym_score', 'asymmetry_grade')
+
+
+def build_snapshot(result, thresholds, weights, observations=None, source='wdklab_monitor'):
+    """
+    calculate_signal 결과 → 스냅샷 dict
+    observations: {series_id: 마지막 관측일} — 어떤 데이터로 계산했는지 기록
+    """
+    return {
+        'version': SNAPSHOT_VERSION,
+        'source': source,
+        'computed_at': result.get('timestamp') or datetime.now(timezone.utc).isoformat(),
+        'thresholds': dict(thresholds),
+        'weights': dict(weights),
+        'inputs': {k: result.get(k) for k in _SNAPSHOT_INPUTS},
+        'outputs': {k: result.get(k) for k in _SNAPSHOT_OUTPUTS},
+        'observations': dict(observations or {}),
+    }
+
+
+def save_snapshot(snapshot, path=SNAPSHOT_FILE):
+    """written_at 갱신 후 원자적 저장"""
+    try:
+        snapshot = dict(snapshot, written_at=datetime.now(timezone.utc).isoformat())
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        print(f"[SNAPSHOT] ✅ {os.path.basename(path)} 저장")
+    except Exception as e:
+        print(f"[SNAPSHOT] 저장 실패: {e}")
+
+
+def load_snapshot(path=SNAPSHOT_FILE, max_age_hours=SNAPSHOT_MAX_AGE_HOURS):
+    """버전이 맞고 max_age_hours 이내에 기록된 스냅샷 (아니면 None)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            snap = json.load(f)
+        if snap.get('version') != SNAPSHOT_VERSION:
+            print(f"[SNAPSHOT] 버전 불일치 ({snap.get('version')}) — 무시")
+            return None
+        age_h = (datetime.now(timezone.utc) - datetime.fromisoformat(snap['written_at'])).total_seconds() / 3600
+        if age_h > max_age_hours:
+            print(f"[SNAPSHOT] {age_h:.1f}시간 경과 — 무시")
+            return None
+        return snap
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[SNAPSHOT] 읽기 실패: {e}")
+        return None
+
+
+def snapshot_to_td(snap):
+    """스냅샷 → Gist td 필드 (chart.html 형식)"""
+    inputs, outputs = snap['inputs'], snap['outputs']
+    return {
+        'comp': round(outputs['composite'], 3),
+        'vix':  round(inputs['vix'], 1),
+        'sp':   round(inputs['spread'], 3),
+        'pce':  round(inputs['pce_yoy'], 2),
+        'fed':  outputs['fed_signal'],
+        'infl': outputs['inflation_signal'],
+        'ctx':  outputs['context_signal'],
+    }
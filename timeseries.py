@@ -0,0 +1,137 @@
+"""
+FRED 시계열 컬럼형 표현 — NumPy datetime64[D] 날짜 + float64 값
+- 관측치별 dict 할당 없이 보관/슬라이스 (긴 히스토리도 가볍게)
+- 날짜 기준 lookback (N 영업일 전, N개월 전), YoY, 연환산 변화율, 월말 리샘플
+- when 인자에 날짜 배열을 넘기면 모든 헬퍼가 배열로 벡터화 계산
+"""
+
+import numpy as np
+
+
+def finite_or(x, default):
+    """NaN/None이면 default (스칼라 전용)"""
+    if x is None:
+        return default
+    x = float(x)
+    return x if np.isfinite(x) else default
+
+
+def months_before(dates, n):
+    """
+    날짜(배열)에서 n개월 전 같은 날짜 (말일 보정: 3/31 → 2/29)
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    month = dates.astype('datetime64[M]')
+    day   = dates - month.astype('datetime64[D]')          # 0-based 일자
+    target = month - n
+    month_len = (target + 1).astype('datetime64[D]') - target.astype('datetime64[D]')
+    return target.astype('datetime64[D]') + np.minimum(day, month_len - 1)
+
+
+class TimeSeries:
+    """날짜 오름차순 시계열 (dates: datetime64[D], values: float64)"""
+
+    __slots__ = ('dates', 'values')
+
+    def __init__(self, dates, values):
+        self.dates  = np.asarray(dates, dtype='datetime64[D]')
+        self.values = np.asarray(values, dtype=np.float64)
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """[[date_str, value], ...] (fred_store 형식) → TimeSeries"""
+        if not pairs:
+            return cls(np.empty(0, 'datetime64[D]'), np.empty(0))
+        dates, values = zip(*pairs)
+        return cls(np.array(dates, dtype='datetime64[D]'), np.array(values, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, key):
+        """슬라이스 → TimeSeries (뷰, 복사 없음)"""
+        if isinstance(key, slice):
+            return TimeSeries(self.dates[key], self.values[key])
+        return self.values[key]
+
+    def __repr__(self):
+        if not len(self):
+            return 'TimeSeries([])'
+        return f'TimeSeries({len(self)} obs, {self.dates[0]} ~ {self.dates[-1]}, last={self.values[-1]:g})'
+
+    # ── 기본 조회 ────────────────────────────────────────────────────
+    def last(self, default=None):
+        return float(self.values[-1]) if len(self) else default
+
+    def last_date(self):
+        return str(self.dates[-1]) if len(self) else None
+
+    def since(self, start):
+        """start 이후 구간 (뷰)"""
+        i = np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left')
+        return self[i:]
+
+    def _lookup(self, when):
+        """when(스칼라/배열) 시점까지의 마지막 관측치 인덱스 + 유효 마스크"""
+        when  = np.asarray(when, dtype='datetime64[D]')
+        idx   = np.searchsorted(self.dates, when, side='right') - 1
+        valid = (idx >= 0) & ~np.isnat(when)
+        return np.maximum(idx, 0), valid
+
+    def asof(self, when=None):
+        """when 시점 기준 마지막 관측값 (관측 전/NaT이면 NaN)"""
+        if when is None:
+            return self.last(np.nan)
+        idx, valid = self._lookup(when)
+        if not len(self):
+            out = np.full(valid.shape, np.nan)
+        else:
+            out = np.where(valid, self.values[idx], np.nan)
+        return out if out.ndim else float(out)
+
+    def _anchor(self, when):
+        """lookback 기준일 = when 시점의 실제 관측 날짜 (없으면 NaT)"""
+        nat = np.datetime64('NaT', 'D')
+        if when is None:
+            return self.dates[-1] if len(self) else nat
+        idx, valid = self._lookup(when)
+        if not len(self):
+            return np.full(valid.shape, nat)
+        return np.where(valid, self.dates[idx], nat)
+
+    # ── lookback ────────────────────────────────────────────────────
+    def bdays_back(self, n, when=None):
+        """기준일에서 n 영업일 전 시점의 값 (휴일 결측은 직전 관측값)"""
+        target = np.busday_offset(self._anchor(when), -n, roll='backward')
+        return self.asof(target)
+
+    def months_back(self, n, when=None):
+        """기준일에서 n개월 전 시점의 값"""
+        return self.asof(months_before(self._anchor(when), n))
+
+    # ── 변화율 ──────────────────────────────────────────────────────
+    def change(self, n_bdays, when=None):
+        """n 영업일 변화량 (값 단위)"""
+        return self.asof(self._anchor(when)) - self.bdays_back(n_bdays, when)
+
+    def pct_change_months(self, months, when=None):
+        """n개월 변화율 (%)"""
+        return (self.asof(self._anchor(when)) / self.months_back(months, when) - 1) * 100
+
+    def yoy(self, when=None):
+        """전년 동월 대비 (%)"""
+        return self.pct_change_months(12, when)
+
+    def annualized(self, months=3, when=None):
+        """n개월 변화율 연환산 (%) — annualized(3) = 3개월 연율"""
+        ratio = self.asof(self._anchor(when)) / self.months_back(months, when)
+        return (ratio ** (12 / months) - 1) * 100
+
+    # ── 리샘플 ──────────────────────────────────────────────────────
+    def resample_month_end(self):
+        """월별 마지막 관측치만 남긴 TimeSeries"""
+        if not len(self):
+            return self
+        month = self.dates.astype('datetime64[M]')
+        last  = np.append(month[1:] != month[:-1], True)
+        return TimeSeries(self.dates[last], self.values[last])
@@ -0,0 +1,60 @@
+"""
+바텀업 유니버스 정의 로더
+- universes/<이름>.txt: 한 줄에 한 종목 ('#' 주석 허용)
+- universes/<이름>.csv: Symbol / Ticker 열 (S&P 500 구성종목 CSV 등 그대로 사용)
+- 이름 대신 파일 경로도 허용, 선택 순서: 인자 → BOTTOMUP_UNIVERSE 환경변수 → default
+"""
+
+import os
+import csv
+
+UNIVERSE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'universes')
+DEFAULT_UNIVERSE = 'default'
+
+
+def _resolve(name):
+    if os.path.isfile(name):
+        return name
+    for ext in ('.txt', '.csv'):
+        path = os.path.join(UNIVERSE_DIR, name + ext)
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(f"유니버스 '{name}' 없음 (universes/{name}.txt|.csv 또는 파일 경로)")
+
+
+def _normalize(symbol):
+    """Yahoo 표기로 정규화 (BRK.B → BRK-B)"""
+    return symbol.strip().upper().replace('.', '-')
+
+
+def _read(path):
+    if path.endswith('.csv'):
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            col = next((c for c in reader.fieldnames or []
+                        if c.strip().lower() in ('symbol', 'ticker')), None)
+            if col is None:
+                raise ValueError(f"{path}: Symbol/Ticker 열 없음")
+            return [row[col] for row in reader if row.get(col)]
+    with open(path, encoding='utf-8') as f:
+        return [line.split('#', 1)[0] for line in f]
+
+
+def load_universe(name=None):
+    """
+    반환: (유니버스 이름, 종목 리스트 — 중복 제거, 파일 순서 유지)
+    """
+    name = name or os.environ.get('BOTTOMUP_UNIVERSE') or DEFAULT_UNIVERSE
+    path = _resolve(name)
+    tickers = list(dict.fromkeys(_normalize(s) for s in _read(path) if s.strip()))
+    label = os.path.splitext(os.path.basename(path))[0]
+    return label, tickers
+
+
+def available():
+    """universes/ 안의 유니버스 이름 목록"""
+    try:
+        return sorted({os.path.splitext(f)[0] for f in os.listdir(UNIVERSE_DIR)
+                       if f.endswith(('.txt', '.csv'))})
+    except FileNotFoundError:
+        return []
@@ -1,27 +1,48 @@
 """
 WDK LAB Signal Monitor - GitHub Actions용 스크립트
 FRED 데이터 수집 → 신호등 계산 → 바텀업 분석 → 텔레그램 발송
+
+모듈 로드: 모든 모드 공통(FRED/Telegram/신호 규칙)만 시작 시 import,
+yfinance·pandas·가격 저장소·지표·바텀업 생성기는 필요한 모드(daily/report)에서만 지연 import
+→ 종료 시 [STARTUP] 모듈별 로드 시간 리포트
 """
 
 import os
 import json
 import sys
-import requests
 import time
+import importlib
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone, timedelta
 
+_T_START = time.perf_counter()
+_IMPORT_TIMES = {}   # 모듈 → 첫 로드 소요초 (하위 의존성 포함, 이미 로드돼 있던 모듈은 제외)
+
+
+def _timed_import(name):
+    """import + 첫 로드 시간 기록 (지연 import도 이 함수로)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    _IMPORT_TIMES[name] = time.perf_counter() - t0
+    return module
+
+
+# 모든 모드 공통
+np            = _timed_import('numpy')
+http_client   = _timed_import('http_client')     # requests
+fred_store    = _timed_import('fred_store')
+signal_engine = _timed_import('signal_engine')
+_timeseries   = _timed_import('timeseries')
+TimeSeries, finite_or = _timeseries.TimeSeries, _timeseries.finite_or
+_T_IMPORTED = time.perf_counter()
+
 # Windows cp949 인코딩 이모지 출력 에러 방지
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
-# pandas_ta 사용 가능 여부 (없으면 RSI/MACD graceful skip)
-try:
-    import pandas_ta  # noqa: F401
-    HAS_PANDAS_TA = True
-except ImportError:
-    HAS_PANDAS_TA = False
-
 # ===== 설정 =====
 FRED_API_KEY = os.environ.get('FRED_API_KEY', 'bd2f35437a05410f3f72fa653ab8935c')
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '8209005017:AAH1IOr7h49dI3lX2TSBNOrvMsQEIcHCouM')
@@ -40,19 +61,9 @@ FRED_SERIES = {
     'M2SL': 'M2SL',           # M2 통화량 (월별)
 }
 
-# 바텀업 티커
-TICKERS = [
-    'MSFT', 'AAPL', 'GOOGL', 'AMZN', 'META', 'TSLA',  # Big Tech
-    'NVDA', 'TSM', 'ASML',                             # Semiconductors
-    'LLY',                                             # Healthcare
-    'JPM', 'V',                                        # Financials
-    'XOM',                                             # Energy
-    'WMT', 'COST',                                     # Consumer Staples
-    'GE', 'CAT'                                        # Industrials
-]
-
-# 바텀업 가중치
-BOTTOMUP_WEIGHTS = {'momentum': 0.45, 'fundamental': 0.35, 'valuation': 0.20}
+# 바텀업 랭킹 (generate_bottomup_data.py 산출물) — 이 시간 이내면 재사용, 아니면 같은 프로세스에서 재생성
+BOTTOMUP_FILE = 'bottomup_data.json'
+BOTTOMUP_MAX_AGE_MIN = 60
 
 # 탑다운 가중치
 WEIGHTS = {'fed': 50, 'inflation': 30, 'context': 20}
@@ -65,340 +76,253 @@ THRESHOLDS = {
     'vix': 18,
 }
 
+# FRED 시리즈별 데드라인 (초) — 동시 수집이라 전체 소요 ≈ 가장 느린 시리즈 1개
+FRED_TIMEOUT = 30
+
 # 상태 저장 파일
 STATE_FILE = 'signal_state.json'
 
+# Morning Digest 모드 (바텀업 랭킹·포트폴리오·주식-채권 갭 — 무거운 모듈은 이 모드에서만 로드)
+DIGEST_MODES = ('daily', 'report')
+
+# portfolio.json에 'accounts'가 없을 때 최상위 holdings 계좌 이름 (Digest 섹션 제목)
+DEFAULT_ACCOUNT = 'US주식'
+
+# Morning Digest 스트레스 시나리오 줄에 보여줄 개수 (최악 손실 큰 순)
+STRESS_DIGEST_TOP = 3
+
+# 탑다운 신호 히스토리 백필 (backfill 모드 → chart.html)
+HISTORY_FILE   = 'signal_history.json'
+BACKFILL_START = '2000-01-01'
 
-def fetch_fred_series(series_id, limit=252):
-    """FRED API에서 데이터 가져오기"""
-    url = f"https://api.stlouisfed.org/fred/series/observations"
-    params = {
-        'series_id': series_id,
-        'api_key': FRED_API_KEY,
-        'file_type': 'json',
-        'sort_order': 'desc',
-        'limit': limit
-    }
-    
-    try:
-        resp = requests.get(url, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        
-        observations = data.get('observations', [])
-        result = []
-        for obs in observations:
-            if obs['value'] not in ['.', '']:
-                result.append({
-                    'date': obs['date'],
-                    'value': float(obs['value'])
-                })
-        
-        return list(reversed(result))  # oldest first
-    except Exception as e:
-        print(f"[FRED] Error fetching {series_id}: {e}")
-        return []
 
+def fetch_fred_series(series_id, limit=252, timeout=FRED_TIMEOUT, last_updated=None, start=None):
+    """FRED 데이터 가져오기 (로컬 저장소 + 증분 수집, fred_store 참고) → TimeSeries"""
+    observations = fred_store.sync(series_id, FRED_API_KEY, limit=limit, timeout=timeout,
+                                   last_updated=last_updated, start=start)
+    return TimeSeries.from_pairs(observations)  # oldest first
 
-def fetch_yahoo_data(ticker):
-    """yfinance 라이브러리로 주식 데이터 가져오기 (GitHub Actions 호환!)"""
+
+def _run_concurrent(jobs, deadline):
+    """
+    {key: 인자 없는 함수} 동시 실행 (스레드 풀)
+    - 데드라인 초과/예외 키는 결과에서 빠짐 (부분 결과)
+    반환: {key: (result, elapsed_sec)}
+    """
+    def _timed(fn):
+        t0 = time.perf_counter()
+        return fn(), time.perf_counter() - t0
+
+    results = {}
+    pool = ThreadPoolExecutor(max_workers=len(jobs) or 1)
     try:
-        import yfinance as yf
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        if not info or 'regularMarketPrice' not in info:
-            print(f"[yfinance] No data for {ticker}")
-            return None
-        
-        # yfinance 형식으로 반환 (기존 코드와 호환)
-        return {
-            'price': {
-                'regularMarketPrice': {'raw': info.get('regularMarketPrice', 0)}
-            },
-            'summaryDetail': {
-                'twoHundredDayAverage': {'raw': info.get('twoHundredDayAverage', 0)},
-                'trailingPE': {'raw': info.get('trailingPE', 50)},
-                'forwardPE': {'raw': info.get('forwardPE', 50)}
-            },
-            'defaultKeyStatistics': {
-                'fiftyTwoWeekChange': {'raw': info.get('fiftyTwoWeekChange', 0)},
-                'earningsQuarterlyGrowth': {'raw': info.get('earningsQuarterlyGrowth', 0)},
-                'pegRatio': {'raw': info.get('pegRatio', 2)}
-            },
-            'financialData': {
-                'profitMargins': {'raw': info.get('profitMargins', 0)},
-                'returnOnEquity': {'raw': info.get('returnOnEquity', 0)}
-            }
-        }
-    except Exception as e:
-        print(f"[yfinance] Error fetching {ticker}: {e}")
-        return None
+        futures = {pool.submit(_timed, fn): key for key, fn in jobs.items()}
+        done, not_done = wait(futures, timeout=deadline)
 
+        for fut, key in futures.items():
+            if fut in not_done:
+                print(f"  - {key}: ⏱ {deadline}s 데드라인 초과 — 건너뜀")
+                continue
+            try:
+                results[key] = fut.result()
+            except Exception as e:
+                print(f"  - {key}: ❌ {e}")
+    finally:
+        # 데드라인 넘긴 요청은 기다리지 않음
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
 
-def safe_get(data, *keys, default=None):
-    """중첩 딕셔너리에서 안전하게 값 가져오기"""
-    for key in keys:
-        if isinstance(data, dict):
-            data = data.get(key, {})
-        else:
-            return default
-    if isinstance(data, dict):
-        return data.get('raw', data.get('fmt', default))
-    return data if data else default
 
+def fetch_fred_all(series_map, limit=252, deadline=FRED_TIMEOUT, last_updated=None, start=None):
+    """
+    FRED 시리즈 동시 수집 (스레드 풀)
+    - 시리즈별 데드라인: 초과/실패한 시리즈는 [] (부분 결과 반환)
+    - 시리즈별 소요 시간 로그
+    - last_updated: probe_fred_updates() 결과 (변경 없는 시리즈는 요청 생략)
+    - start: 지정 시 limit 대신 start 이후 전체 히스토리 (백필용)
+    반환: {key: TimeSeries}
+    """
+    last_updated = last_updated or {}
+    t_start = time.perf_counter()
+    jobs = {
+        key: (lambda sid=sid, lu=last_updated.get(key):
+              fetch_fred_series(sid, limit=limit, timeout=deadline, last_updated=lu, start=start))
+        for key, sid in series_map.items()
+    }
+    results = _run_concurrent(jobs, deadline)
 
-def calculate_bottomup_scores():
-    """바텀업 점수 계산"""
-    print("[BOTTOMUP] Fetching stock data...")
-    scores = []
-    
-    for ticker in TICKERS:
-        print(f"  - {ticker}...", end=" ")
-        data = fetch_yahoo_data(ticker)
-        
-        if not data:
-            print("❌ Failed")
-            scores.append({'ticker': ticker, 'score': None, 'error': True})
-            time.sleep(0.5)
-            continue
-        
+    data = {key: TimeSeries.from_pairs([]) for key in series_map}
+    for key in series_map:
+        if key in results:
+            values, elapsed = results[key]
+            data[key] = values
+            print(f"  - {key}: {len(values)} points ({elapsed:.2f}s)")
+
+    print(f"[DATA] FRED {len(series_map)}개 시리즈 수집 완료 ({time.perf_counter() - t_start:.2f}s)")
+    return data
+
+
+def probe_fred_updates(series_map, deadline=10):
+    """
+    FRED 시리즈 메타데이터(last_updated)만 동시 조회 — 관측치 다운로드 전 변경 여부 확인용
+    반환: {key: last_updated 문자열 또는 None(실패)}
+    """
+    jobs = {
+        key: (lambda sid=sid: fred_store.probe(sid, FRED_API_KEY, timeout=deadline))
+        for key, sid in series_map.items()
+    }
+    results = _run_concurrent(jobs, deadline)
+    return {key: results[key][0] if key in results else None for key in series_map}
+
+
+def load_bottomup_ranking(max_age_min=BOTTOMUP_MAX_AGE_MIN):
+    """
+    바텀업 TOP 랭킹 — generate_bottomup_data.py 점수 엔진 결과를 그대로 사용
+    - bottomup_data.json이 max_age_min 이내면 재사용
+      (증분 실행이 "변화 없음"으로 파일을 그대로 둔 경우도 마지막 확인 시각 기준으로 재사용)
+    - 오래됐거나 없으면 생성기를 같은 프로세스에서 증분 모드로 실행 (가격만 갱신, 필요 시 전체 실행)
+    반환: [{'ticker', 'score', 'momentum', 'fundamental', 'valuation'}, ...] (순위순)
+    """
+    generate_bottomup_data = _timed_import('generate_bottomup_data')
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), BOTTOMUP_FILE)
+    output = None
+    try:
+        with open(path, encoding='utf-8') as f:
+            output = json.load(f)
+        fresh = datetime.fromisoformat(output['updated'])
+        checked = generate_bottomup_data.last_checked()
+        if checked and checked > fresh:
+            fresh = checked
+        age_min = (datetime.now(timezone.utc) - fresh).total_seconds() / 60
+        if age_min > max_age_min:
+            print(f"[BOTTOMUP] {BOTTOMUP_FILE} {age_min:.0f}분 경과 — 재생성")
+            output = None
+        else:
+            print(f"[BOTTOMUP] {BOTTOMUP_FILE} 재사용 ({age_min:.0f}분 전)")
+    except Exception as e:
+        print(f"[BOTTOMUP] {BOTTOMUP_FILE} 읽기 실패: {e} — 재생성")
+        output = None
+
+    if output is None:
         try:
-            price = data.get('price', {})
-            summary = data.get('summaryDetail', {})
-            keyStats = data.get('defaultKeyStatistics', {})
-            financial = data.get('financialData', {})
-            
-            # 모멘텀 지표
-            perf_52w = safe_get(keyStats, 'fiftyTwoWeekChange', default=0) or 0
-            current_price = safe_get(price, 'regularMarketPrice', default=0) or 0
-            sma200 = safe_get(summary, 'twoHundredDayAverage', default=current_price) or current_price
-            above_sma200 = 1 if current_price > sma200 else -1
-            
-            # 펀더멘탈 지표
-            eps_growth = safe_get(keyStats, 'earningsQuarterlyGrowth', default=0) or 0
-            profit_margin = safe_get(financial, 'profitMargins', default=0) or 0
-            roe = safe_get(financial, 'returnOnEquity', default=0) or 0
-            
-            # 밸류에이션 지표
-            pe = safe_get(summary, 'trailingPE', default=50) or 50
-            forward_pe = safe_get(summary, 'forwardPE', default=50) or 50
-            peg = safe_get(keyStats, 'pegRatio', default=2) or 2
-            
-            # 정규화 (간단한 버전)
-            momentum_score = (perf_52w * 2) + (above_sma200 * 0.3)
-            fundamental_score = (eps_growth * 2) + (profit_margin * 3) + (roe * 2)
-            
-            # PE가 낮을수록 좋음 (역수 사용)
-            valuation_score = 1 - min(pe / 100, 1)  # PE 100 이상이면 0
-            
-            # 최종 점수
-            final_score = (
-                BOTTOMUP_WEIGHTS['momentum'] * momentum_score +
-                BOTTOMUP_WEIGHTS['fundamental'] * fundamental_score +
-                BOTTOMUP_WEIGHTS['valuation'] * valuation_score
-            )
-            
-            scores.append({
-                'ticker': ticker,
-                'score': round(final_score, 2),
-                'momentum': round(momentum_score, 2),
-                'fundamental': round(fundamental_score, 2),
-                'valuation': round(valuation_score, 2),
-                'error': False
-            })
-            print(f"✅ {final_score:.2f}")
-            
+            output = generate_bottomup_data.main(incremental=True)
         except Exception as e:
-            print(f"❌ Error: {e}")
-            scores.append({'ticker': ticker, 'score': None, 'error': True})
-        
-        time.sleep(0.3)  # Rate limit 방지
-    
-    # 점수로 정렬
-    valid_scores = [s for s in scores if s['score'] is not None]
-    valid_scores.sort(key=lambda x: x['score'], reverse=True)
-    
-    return valid_scores
+            print(f"[BOTTOMUP] ❌ 생성 실패: {e}")
+            return []
+
+    ranked = sorted((r for r in output.get('data', []) if not r.get('error') and r.get('scores')),
+                    key=lambda r: r['rank'])
+    return [{
+        'ticker':      r['ticker'],
+        'score':       r['scores']['final'],
+        'momentum':    r['scores']['momentum'],
+        'fundamental': r['scores']['fundamental'],
+        'valuation':   r['scores']['valuation'],
+    } for r in ranked]
+
+
+def fetch_equity_bond_gap(dgs10_val):
+    """주식-채권 수익률 갭: S&P500 이익수익률 - 10년물 금리 (SPY .info — yfinance 지연 import)"""
+    try:
+        yf = _timed_import('yfinance')
+        spy = yf.Ticker('SPY')
+        spy_pe = spy.info.get('trailingPE') or spy.info.get('forwardPE')
+        if spy_pe and spy_pe > 0 and dgs10_val:
+            earnings_yield = (1 / spy_pe) * 100  # EY = 1/PE * 100
+            gap = round(earnings_yield - dgs10_val, 2)
+            print(f"[ASYM] EY={earnings_yield:.2f}% - 10Y={dgs10_val:.2f}% = Gap={gap:+.2f}%")
+            return gap
+    except Exception as e:
+        print(f"[ASYM] equity_bond_gap 오류: {e}")
+    return None
 
 
-def calculate_signal():
-    """신호등 계산"""
-    data = {}
-    
-    # 데이터 수집
+def apply_asymmetry(result, equity_bond_gap):
+    """셋업 비대칭성 등급 (Druckenmiller "pig" 판정) — 채권갭 + M2 가속도 + King/Queen → result 갱신"""
+    m2_accel = result.get('m2_accel')
+    asym_score = int(signal_engine.asym_score(
+        np.nan if equity_bond_gap is None else equity_bond_gap,
+        np.nan if m2_accel is None else m2_accel,
+        result['fed_signal'], result['inflation_signal']))
+    asymmetry_grade = str(signal_engine.asymmetry_grade(asym_score))
+    print(f"[ASYM] 비대칭 점수={asym_score} 등급={asymmetry_grade}")
+    result.update({'equity_bond_gap': equity_bond_gap, 'asym_score': asym_score,
+                   'asymmetry_grade': asymmetry_grade})
+    return result
+
+
+def calculate_signal(state=None, with_asym=True):
+    """
+    신호등 계산
+    state가 주어지면: FRED last_updated 프로브 → 입력이 전부 그대로면 state의 이전 결과 재사용
+    (관측치 다운로드 + SPY .info 조회 생략), 새로 계산하면 결과를 state['signal_cache']에 기록
+    with_asym=False: 주식-채권 갭(SPY .info, yfinance import) 생략 — Morning Digest가 없는 모드용
+    """
+    # 변경 여부 프로브 (시리즈당 메타데이터 1회)
+    print("[DATA] Probing FRED last_updated...")
+    probes = probe_fred_updates(FRED_SERIES)
+    all_probed = all(probes.values())
+    cache = (state or {}).get('signal_cache') or {}
+    if all_probed and cache.get('last_updated') == probes and cache.get('result'):
+        print("[DATA] FRED 입력 변화 없음 — 이전 신호 재사용")
+        result = dict(cache['result'])
+        result['timestamp'] = datetime.now(timezone.utc).isoformat()
+        if with_asym and not cache.get('asym', True):
+            # 갭 없이 캐시된 결과 (check/midcheck) → 갭만 보충
+            apply_asymmetry(result, fetch_equity_bond_gap(result.get('dgs10')))
+            cache.update({'result': dict(result), 'asym': True})
+        if cache.get('snapshot'):
+            signal_engine.save_snapshot(cache['snapshot'])
+        return result
+
+    # 데이터 수집 (동시)
     print("[DATA] Fetching FRED data...")
-    for key, series_id in FRED_SERIES.items():
-        data[key] = fetch_fred_series(series_id)
-        print(f"  - {key}: {len(data[key])} points")
+    data = fetch_fred_all(FRED_SERIES, last_updated=probes)
     
     # 최신 값 추출
-    latest = {}
-    for key, values in data.items():
-        if values:
-            latest[key] = values[-1]['value']
-        else:
-            latest[key] = 0
-    
+    latest = {key: series.last(default=0) for key, series in data.items()}
+
     # === King (연준) 계산 ===
-    dgs2_data = data.get('DGS2', [])
-    if len(dgs2_data) >= 21:
-        dgs2_now = dgs2_data[-1]['value']
-        dgs2_20d_ago = dgs2_data[-21]['value']
-        dgs2_change_bp = (dgs2_now - dgs2_20d_ago) * 100
-    else:
-        dgs2_change_bp = 0
-    
-    if dgs2_change_bp <= -THRESHOLDS['king']:
-        fed_signal = 1
-    elif dgs2_change_bp >= THRESHOLDS['king']:
-        fed_signal = -1
-    else:
-        fed_signal = 0
+    # 2Y 금리 20영업일 변화량 (bp)
+    dgs2_change_bp = finite_or(data['DGS2'].change(20), 0) * 100
+    fed_signal = int(signal_engine.fed_signal(dgs2_change_bp, THRESHOLDS['king']))
     
     # === Queen (인플레이션) 계산 ===
-    pce_data = data.get('PCEPILFE', [])
-    if len(pce_data) >= 12:
-        pce_now = pce_data[-1]['value']
-        pce_12m_ago = pce_data[-12]['value']
-        pce_yoy = ((pce_now / pce_12m_ago) - 1) * 100
-    else:
-        pce_yoy = 2.5
-    
-    if len(pce_data) >= 3:
-        pce_3m_ago = pce_data[-3]['value']
-        pce_3m_ann = ((pce_now / pce_3m_ago) ** 4 - 1) * 100
-    else:
-        pce_3m_ann = 2.5
-    
-    if pce_yoy <= THRESHOLDS['pce_yoy'] and pce_3m_ann <= THRESHOLDS['pce_3m']:
-        inflation_signal = 1
-    elif pce_yoy > THRESHOLDS['pce_yoy'] and pce_3m_ann > THRESHOLDS['pce_3m']:
-        inflation_signal = -1
-    else:
-        inflation_signal = 0
-    
-    # === Context (리스크) 계산 ===
-    context_scores = []
+    pce = data['PCEPILFE']
+    pce_yoy    = finite_or(pce.yoy(), 2.5)            # 전년 동월 대비
+    pce_3m_ann = finite_or(pce.annualized(3), 2.5)    # 3개월 연율
+    inflation_signal = int(signal_engine.inflation_signal(
+        pce_yoy, pce_3m_ann, THRESHOLDS['pce_yoy'], THRESHOLDS['pce_3m']))
     
-    # VIX
-    vix = latest.get('VIXCLS', 20)
-    if vix <= THRESHOLDS['vix']:
-        context_scores.append(1)
-    elif vix >= 30:
-        context_scores.append(-1)
-    else:
-        context_scores.append(0)
-    
-    # 10Y-2Y 스프레드
+    # === Context (리스크) 계산 === VIX + 10Y-2Y 스프레드 + BAA 스프레드
+    vix    = latest.get('VIXCLS', 20)
     spread = latest.get('DGS10', 0) - latest.get('DGS2', 0)
-    if spread >= 0.25:
-        context_scores.append(1)
-    elif spread <= -0.25:
-        context_scores.append(-1)
-    else:
-        context_scores.append(0)
-    
-    # BAA 스프레드
-    baa = latest.get('BAMLC0A0CM', 2)
-    if baa <= 2.0:
-        context_scores.append(1)
-    elif baa >= 3.0:
-        context_scores.append(-1)
-    else:
-        context_scores.append(0)
-    
-    context_mean = sum(context_scores) / len(context_scores) if context_scores else 0
-    if context_mean > 0.33:
-        context_signal = 1
-    elif context_mean < -0.33:
-        context_signal = -1
-    else:
-        context_signal = 0
+    baa    = latest.get('BAMLC0A0CM', 2)
+    context_signal = int(signal_engine.context_signal(vix, spread, baa, THRESHOLDS['vix']))
     
     # === 종합 점수 ===
-    composite = (
-        (WEIGHTS['fed'] / 100) * fed_signal +
-        (WEIGHTS['inflation'] / 100) * inflation_signal +
-        (WEIGHTS['context'] / 100) * context_signal
-    )
+    composite = float(signal_engine.composite_score(
+        fed_signal, inflation_signal, context_signal, WEIGHTS))
     
     # 최종 신호
-    if composite > 0.2:
-        final_signal = 'GREEN'
-    elif composite < -0.2:
-        final_signal = 'RED'
-    else:
-        final_signal = 'YELLOW'
+    final_signal = str(signal_engine.signal_label(composite))
     
     # === 비대칭 손익비 지표 (드라켄밀러 프레임워크) ===
-    # 1) 주식-채권 수익률 갭: S&P500 이익수익률 - 10년물 금리
-    equity_bond_gap = None
-    try:
-        import yfinance as yf
-        spy = yf.Ticker('SPY')
-        spy_pe = spy.info.get('trailingPE') or spy.info.get('forwardPE')
-        dgs10_val = latest.get('DGS10', 0)
-        if spy_pe and spy_pe > 0 and dgs10_val:
-            earnings_yield = (1 / spy_pe) * 100  # EY = 1/PE * 100
-            equity_bond_gap = round(earnings_yield - dgs10_val, 2)
-            print(f"[ASYM] EY={earnings_yield:.2f}% - 10Y={dgs10_val:.2f}% = Gap={equity_bond_gap:+.2f}%")
-    except Exception as e:
-        print(f"[ASYM] equity_bond_gap 오류: {e}")
+    # 1) 주식-채권 수익률 갭: S&P500 이익수익률 - 10년물 금리 (Digest 모드만)
+    equity_bond_gap = fetch_equity_bond_gap(latest.get('DGS10', 0)) if with_asym else None
 
     # 2) M2 가속도 (2차 미분) — 최근 6개월 변화율의 변화
     m2_accel = None
-    m2_data = data.get('M2SL', [])
-    if len(m2_data) >= 12:
-        try:
-            # 최근 6개월 YoY 변화율
-            m2_now = m2_data[-1]['value']
-            m2_6m  = m2_data[-6]['value']
-            m2_12m = m2_data[-12]['value']
-            if m2_12m > 0 and m2_6m > 0:
-                rate_recent = ((m2_now / m2_6m) - 1) * 100 * 2   # 연환산
-                rate_prior  = ((m2_6m / m2_12m) - 1) * 100 * 2   # 연환산
-                m2_accel = round(rate_recent - rate_prior, 2)
-                print(f"[ASYM] M2 최근={rate_recent:.1f}%/yr 이전={rate_prior:.1f}%/yr 가속도={m2_accel:+.2f}%p")
-        except Exception as e:
-            print(f"[ASYM] M2 가속도 오류: {e}")
-
-    # 3) 셋업 비대칭성 등급 (Druckenmiller "pig" 판정)
-    asym_score = 0
-    # 채권갭: +면 주식 유리
-    if equity_bond_gap is not None:
-        if equity_bond_gap > 1.0:
-            asym_score += 2   # 주식 매우 유리
-        elif equity_bond_gap > 0:
-            asym_score += 1
-        elif equity_bond_gap > -1.0:
-            asym_score -= 1
-        else:
-            asym_score -= 2   # 주식 매우 불리 (2002 이후 최저 수준)
-    # M2 가속도: +면 유동성 확장
-    if m2_accel is not None:
-        if m2_accel > 2.0:
-            asym_score += 2
-        elif m2_accel > 0:
-            asym_score += 1
-        elif m2_accel > -2.0:
-            asym_score -= 1
-        else:
-            asym_score -= 2
-    # 탑다운 신호 반영
-    asym_score += fed_signal + inflation_signal
-
-    if asym_score >= 4:
-        asymmetry_grade = 'EXTREME'
-    elif asym_score >= 2:
-        asymmetry_grade = 'HIGH'
-    elif asym_score >= 0:
-        asymmetry_grade = 'MEDIUM'
-    else:
-        asymmetry_grade = 'LOW'
-    print(f"[ASYM] 비대칭 점수={asym_score} 등급={asymmetry_grade}")
+    try:
+        accel = finite_or(signal_engine.m2_acceleration(data['M2SL']), None)
+        if accel is not None:
+            m2_accel = round(accel, 2)
+            print(f"[ASYM] M2 가속도={m2_accel:+.2f}%p")
+    except Exception as e:
+        print(f"[ASYM] M2 가속도 오류: {e}")
 
-    return {
+    result = {
         'signal': final_signal,
         'composite': composite,
         'fed_signal': fed_signal,
@@ -409,13 +333,59 @@ def calculate_signal():
         'pce_3m_ann': pce_3m_ann,
         'vix': vix,
         'spread': spread,
-        'equity_bond_gap': equity_bond_gap,
+        'baa': baa,
+        'dgs10': latest.get('DGS10', 0),
         'm2_accel': m2_accel,
-        'asymmetry_grade': asymmetry_grade,
-        'asym_score': asym_score,
         'timestamp': datetime.now(timezone.utc).isoformat()
     }
 
+    # 3) 셋업 비대칭성 등급
+    apply_asymmetry(result, equity_bond_gap)
+
+    # 탑다운 스냅샷 (generate_bottomup_data.py의 Gist td가 재사용)
+    snapshot = signal_engine.build_snapshot(
+        result, THRESHOLDS, WEIGHTS,
+        observations={FRED_SERIES[k]: series.last_date() for k, series in data.items()})
+    signal_engine.save_snapshot(snapshot)
+
+    # 프로브가 전부 성공했을 때만 캐시 (일부 실패면 다음 실행에서 다시 계산)
+    if state is not None and all_probed:
+        state['signal_cache'] = {'last_updated': probes, 'result': result, 'snapshot': snapshot,
+                                 'asym': with_asym}
+    return result
+
+
+def run_backfill(start=BACKFILL_START):
+    """
+    🕰 탑다운 신호 히스토리 백필 — 전체 FRED 시계열로 매 거래일 신호를 한 번에 계산
+    결과: HISTORY_FILE (컬럼형 JSON, chart.html이 Gist 이전 구간으로 사용)
+    """
+    t0 = time.perf_counter()
+    # YoY(12개월) + 발표 지연만큼 앞선 관측치부터 수집
+    fred_start = str(np.datetime64(start, 'Y') - 2) + '-01-01'
+    keys = ['DGS2', 'DGS10', 'VIXCLS', 'BAMLC0A0CM', 'PCEPILFE', 'M2SL']
+    print(f"[BACKFILL] FRED 히스토리 수집 (since {fred_start})...")
+    data = fetch_fred_all({k: FRED_SERIES[k] for k in keys}, deadline=FRED_TIMEOUT * 2,
+                          start=fred_start)
+    if not len(data['DGS2']):
+        print("[BACKFILL] ❌ DGS2 없음 — 중단")
+        return None
+
+    t1 = time.perf_counter()
+    hist = signal_engine.compute_history(data, THRESHOLDS, WEIGHTS, start=start)
+    t2 = time.perf_counter()
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(signal_engine.history_to_json(hist), f, separators=(',', ':'))
+
+    labels = hist['signal']
+    print(f"[BACKFILL] ✅ {len(labels)}거래일 ({hist['date'][0]} ~ {hist['date'][-1]}) → {HISTORY_FILE}")
+    print(f"[BACKFILL] GREEN {int((labels == 'GREEN').sum())} / YELLOW {int((labels == 'YELLOW').sum())}"
+          f" / RED {int((labels == 'RED').sum())}")
+    print(f"[BACKFILL] 수집 {t1 - t0:.2f}s · 계산 {t2 - t1:.3f}s · 저장 {time.perf_counter() - t2:.2f}s")
+    return hist
+
 
 def send_telegram(message):
     """텔레그램 메시지 발송"""
@@ -427,7 +397,7 @@ def send_telegram(message):
     }
     
     try:
-        resp = requests.post(url, json=payload, timeout=10)
+        resp = http_client.post(url, 'telegram', json=payload)
         resp.raise_for_status()
         print("[Telegram] Message sent successfully")
         return True
@@ -532,11 +502,57 @@ def format_signal_message(result, is_change=False):
     return msg
 
 
-def fetch_portfolio_summary():
+def load_portfolio_accounts(pf):
+    """
+    portfolio.json → [{'name', 'holdings', 'scout_drop_threshold_pct'}]
+    'accounts' 목록이 있으면 계좌별, 없으면 최상위 'holdings'가 기본 계좌 하나
+    같은 계좌에 같은 종목이 두 번 나오면 주수 합산 (type은 처음 것)
+    """
+    threshold = pf.get('scout_drop_threshold_pct', 3.0)
+    raw = pf.get('accounts') or [{'name': pf.get('name', DEFAULT_ACCOUNT), 'holdings': pf.get('holdings', [])}]
+    accounts = []
+    for acc in raw:
+        merged = {}
+        for h in acc.get('holdings', []):
+            if not h.get('ticker'):
+                continue
+            if h['ticker'] in merged:
+                merged[h['ticker']]['shares'] += h.get('shares', 0)
+            else:
+                merged[h['ticker']] = {**h, 'shares': h.get('shares', 0)}
+        if merged:
+            accounts.append({'name': acc.get('name') or f"계좌{len(accounts) + 1}",
+                             'holdings': list(merged.values()),
+                             'scout_drop_threshold_pct': acc.get('scout_drop_threshold_pct', threshold)})
+    return accounts
+
+
+def _last_two(x):
+    """(종목 × 일) → 종목별 마지막 유효값, 그 직전 유효값 (없으면 NaN)"""
+    rows = np.arange(x.shape[0])
+    pos = np.where(np.isfinite(x), np.arange(x.shape[1]), -1)
+    i1 = pos.max(axis=1)
+    pos[rows, np.maximum(i1, 0)] = -1
+    i2 = pos.max(axis=1)
+    curr = np.where(i1 >= 0, x[rows, np.maximum(i1, 0)], np.nan)
+    prev = np.where(i2 >= 0, x[rows, np.maximum(i2, 0)], np.nan)
+    return curr, prev
+
+
+def fetch_portfolio_summaries():
     """
-    portfolio.json → yfinance 1년치 데이터 → 당일손익 + Sharpe/MDD/Volatility + RSI/MACD
-    반환: {'total_krw', 'day_pnl', 'day_pct', 'sharpe', 'mdd', 'volatility',
-           'top_movers', 'scout_alerts', 'rsi_signals'}
+    portfolio.json 전 계좌 → 종목 합집합 1년치 종가 1회 로드 → 계좌 × 종목 주수 행렬로 한 번에 평가
+    계좌별 반환 (리스트): {'name', 'holdings', 'total_krw', 'day_pnl', 'day_pct', 'sharpe', 'mdd', 'volatility',
+           'risk_rolling', 'risk_holdings', 'var', 'risk_contrib', 'stress', 'results', 'top_movers', 'scout_alerts',
+           'rsi_signals'}
+    holdings: [(ticker, type)] portfolio.json 순서
+    risk_rolling: {창(일): {'sharpe', 'sortino', 'volatility', 'mdd'}} 포트폴리오 최신값 (risk.WINDOWS)
+    risk_holdings: {ticker: 같은 형식} 종목별
+    var: {'hist_1d', 'hist_10d', 'mc_1d', 'mc_10d': {'var', 'cvar' (KRW 손실), 'var_pct', 'cvar_pct'}} (95%)
+    risk_contrib: {'vol' (%/yr), 'shrinkage', 'groups': {type: 기여 %}, 'holdings': [{'ticker', 'type', 'weight',
+                   'marginal', 'component', 'share'}] 기여 큰 순} (Ledoit-Wolf 공분산 기준)
+    stress: {시나리오 키: {'name', 'loss' (KRW, 구간 최저점), 'pct', 'end_pct', 'proxied'}} (scenarios.py)
+    계좌가 늘어도 네트워크 호출·종목 지표 계산은 그대로 (행렬 행만 추가)
     """
     pf_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'portfolio.json')
     if not os.path.exists(pf_path):
@@ -544,27 +560,36 @@ def fetch_portfolio_summary():
         return None
 
     try:
-        import numpy as np
-        import yfinance as yf
-
         with open(pf_path, encoding='utf-8') as f:
             pf = json.load(f)
 
-        holdings        = pf.get('holdings', [])
-        usd_krw         = pf.get('usd_krw', 1430)
-        scout_threshold = pf.get('scout_drop_threshold_pct', 3.0)
-        tickers         = [h['ticker'] for h in holdings]
-        shares_map      = {h['ticker']: h['shares'] for h in holdings}
-        type_map        = {h['ticker']: h.get('type', 'core') for h in holdings}
+        accounts = load_portfolio_accounts(pf)
+        usd_krw  = pf.get('usd_krw', 1430)
+        # 종목 합집합 (처음 등장 순서) + 계좌 × 종목 주수 / type
+        tickers = list(dict.fromkeys(h['ticker'] for acc in accounts for h in acc['holdings']))
+        col     = {t: i for i, t in enumerate(tickers)}
 
         if not tickers:
             return None
 
-        # ── 1년치 데이터 다운로드 (Sharpe/MDD/RSI/MACD 모두 여기서 계산) ──
-        data   = yf.download(tickers, period='1y', progress=False, auto_adjust=True)
-        closes = data['Close'] if len(tickers) > 1 else data[['Close']]
-        if len(tickers) == 1:
-            closes.columns = tickers
+        n_acc, n_tk = len(accounts), len(tickers)
+        shares  = np.zeros((n_acc, n_tk))
+        member  = np.zeros((n_acc, n_tk), dtype=bool)
+        types   = [['core'] * n_tk for _ in accounts]
+        for a, acc in enumerate(accounts):
+            for h in acc['holdings']:
+                i = col[h['ticker']]
+                shares[a, i] = h['shares']
+                member[a, i] = True
+                types[a][i]  = h.get('type', 'core')
+
+        price_store = _timed_import('price_store')      # pandas/yfinance는 갱신·조회 시점에 로드
+        indicators  = _timed_import('indicators')
+        risk        = _timed_import('risk')
+
+        # ── 1년치 종가 (합집합 1회, 로컬 저장소 증분 갱신 → 뷰, Sharpe/MDD/RSI/MACD 모두 여기서 계산) ──
+        closes = price_store.load(tickers, 'close', start=np.datetime64('today', 'D') - 365)
+        print(f"[PF] {n_acc}개 계좌 · 종목 합집합 {n_tk}개")
         # ── closes 실제 가격 디버그 (비중 버그 원인 추적) ──────────────
         for _t in tickers[:3]:  # 첫 3종목만 출력
             try:
@@ -573,122 +598,167 @@ def fetch_portfolio_summary():
             except Exception as _e:
                 print(f"[PF-DEBUG] {_t} 오류: {_e}")
 
-        # ── 현재 평가액 기준 비중 계산 ────────────────────────────────────
-        weights   = {}
-        total_val = 0.0
-        for t in tickers:
-            try:
-                curr = float(closes[t].dropna().iloc[-1])
-                val  = curr * shares_map[t]
-                weights[t] = val
-                total_val += val
-            except Exception:
-                weights[t] = 0.0
-
-        # ── 당일 손익 + 평가액 계산 ───────────────────────────────────────
-        daily_returns_list = []
-        results   = []
-        total_krw = 0.0
-        day_pnl   = 0.0
-
-        for h in holdings:
-            t      = h['ticker']
-            shares = h['shares']
-            try:
-                prices = closes[t].dropna()
-                if len(prices) < 2:
-                    continue
-                prev     = float(prices.iloc[-2])
-                curr     = float(prices.iloc[-1])
-                val_krw  = curr * shares * usd_krw
-                pnl_krw  = (curr - prev) * shares * usd_krw
-                pct      = (curr / prev - 1) * 100
-                total_krw += val_krw
-                day_pnl   += pnl_krw
-                results.append({'ticker': t, 'val_krw': round(val_krw),
-                                'pnl_krw': round(pnl_krw), 'pct': round(pct, 2),
-                                'type': type_map.get(t, 'core')})
-                # 비중 반영 일일 수익률
-                w = weights.get(t, 0) / total_val if total_val else 0
-                daily_returns_list.append(prices.pct_change().dropna() * w)
-            except Exception:
-                continue
-
-        # ── 리스크 지표 (risk-metrics-calculation 스킬 적용) ──────────────
-        sharpe = mdd = volatility = None
+        x = closes.reindex(columns=tickers).to_numpy().T   # (종목 × 일, 미수집 종목은 NaN)
+
+        # ── 평가액 비중 / 당일 손익: 계좌 × 종목 행렬 ──────────────────────
+        curr, prev = _last_two(x)
+        has_curr   = np.isfinite(curr)
+        has_day    = has_curr & np.isfinite(prev)            # 종가 2개 이상 → 손익 계산 가능
+        weights    = np.where(has_curr, shares * np.where(has_curr, curr, 0.0), 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pct = np.where(has_day, (curr / prev - 1) * 100, np.nan)
+        counted   = member & has_day
+        val_krw   = np.where(counted, shares * np.where(has_day, curr, 0.0) * usd_krw, 0.0)
+        pnl_krw   = np.where(counted, shares * np.where(has_day, curr - prev, 0.0) * usd_krw, 0.0)
+        total_krw = val_krw.sum(axis=1)
+        day_pnl   = pnl_krw.sum(axis=1)
+
+        # ── 리스크 지표: 종목 × 일 수익률 행렬 @ (계좌 × 종목) 비중 → 전체 구간 + 롤링 창 ──
+        # 행 0..n_tk-1 = 종목, n_tk + a = 계좌 a
+        full, rolling_acc, risk_holdings_all, pr = [{}] * n_acc, [{}] * n_acc, {}, None
         try:
-            if daily_returns_list:
-                port_returns = sum(daily_returns_list)
-                ann_ret  = float(port_returns.mean() * 252)
-                ann_vol  = float(port_returns.std() * np.sqrt(252))
-                rf       = 0.04                              # 무위험수익률 4%
-                sharpe     = round((ann_ret - rf) / ann_vol, 2) if ann_vol else None
-                volatility = round(ann_vol * 100, 1)        # %/yr
-                cum  = (1 + port_returns).cumprod()
-                peak = cum.cummax()
-                mdd  = round(float(((cum - peak) / peak).min()) * 100, 1)  # %
-                print(f"[PF] 📐 Sharpe:{sharpe}  MDD:{mdd}%  Volatility:{volatility}%/yr")
+            pr = risk.portfolio_risk(x, weights)
+            full = [{k: finite_or(v[n_tk + a], None) for k, v in pr['full'].items()} for a in range(n_acc)]
+            rolling_acc = [risk.latest(pr['rolling'], row=n_tk + a) for a in range(n_acc)]
+            risk_holdings_all = {t: risk.latest(pr['rolling'], row=i) for i, t in enumerate(tickers)}
         except Exception as e:
             print(f"[PF] 리스크 계산 실패: {e}")
 
-        # ── RSI/MACD 직접 계산 (1y 데이터로 계산, bottomup_data.json 불필요) ─
-        rsi_signals = {'overbought': [], 'oversold': [], 'macd_buy': [], 'macd_sell': []}
+        # ── 공분산 (실행당 1회, 새 날짜만 증분 갱신 + Ledoit-Wolf) → 위험 기여도·몬테카를로 VaR 공유 ──
+        cov, rc, shrink = None, None, None
+        try:
+            if pr is not None and pr['returns'].shape[1] >= 30:
+                dates = np.asarray(closes.index.values, dtype='datetime64[D]')[1:]
+                # 마지막 봉은 장중 미확정일 수 있어 제외
+                cov, shrink = risk.shared_covariance(dates[:-1], pr['returns'][:n_tk, :-1], tickers)
+                rc = risk.risk_contributions(cov, weights, types)
+        except Exception as e:
+            print(f"[PF] 공분산/위험기여 계산 실패: {e}")
+
+        # ── VaR/CVaR 95% (과거 1일/10일 + 몬테카를로 상관 경로 — 난수는 전 계좌 공유, 평가액 KRW 기준) ──
+        var_acc = [{}] * n_acc
+        try:
+            if pr is not None and total_krw.any() and pr['returns'].shape[1] >= 30:
+                t0 = time.perf_counter()
+                var_acc = risk.var_summary(pr['returns'][:n_tk], weights, total_krw, cov=cov)
+                print(f"[PF] ⚠️ VaR95 {n_acc}개 계좌 ({time.perf_counter() - t0:.2f}s)")
+        except Exception as e:
+            print(f"[PF] VaR 계산 실패: {e}")
+
+        # ── 스트레스 시나리오 (저장된 시나리오 경로 행렬 @ 계좌 비중 1회, 종목 추가·30일 경과 시에만 재구축) ──
+        stress_acc = [{}] * n_acc
         try:
-            if HAS_PANDAS_TA:
-                import pandas_ta as ta
-                for t in tickers:
-                    try:
-                        s = closes[t].dropna()
-                        if len(s) < 30:
-                            continue
-                        rsi_val = float(ta.rsi(s, length=14).iloc[-1])
-                        macd_df = ta.macd(s)
-                        cross   = 0
-                        if macd_df is not None and len(macd_df.columns) >= 2:
-                            cross = 1 if float(macd_df.iloc[-1, 0]) > float(macd_df.iloc[-1, 1]) else -1
-                        if rsi_val >= 65:
-                            rsi_signals['overbought'].append(f"{t}({rsi_val:.0f})")
-                        elif rsi_val <= 35:
-                            rsi_signals['oversold'].append(f"{t}({rsi_val:.0f})")
-                        if cross == 1:
-                            rsi_signals['macd_buy'].append(t)
-                        elif cross == -1:
-                            rsi_signals['macd_sell'].append(t)
-                    except Exception:
-                        continue
-                print(f"[PF] RSI 과매수:{rsi_signals['overbought']} 과매도:{rsi_signals['oversold']}")
+            scenarios = _timed_import('scenarios')
+            book = scenarios.get_book(tickers)
+            if book is not None and total_krw.any():
+                t0 = time.perf_counter()
+                stress_acc = scenarios.stress(book, tickers, weights, total_krw)
+                print(f"[PF] 🧯 스트레스 {len(book['keys'])}개 시나리오 × {n_acc}개 계좌 "
+                      f"({(time.perf_counter() - t0) * 1000:.2f}ms)")
+        except Exception as e:
+            print(f"[PF] 스트레스 시나리오 실패: {e}")
+
+        # ── RSI/MACD 직접 계산 (종목 합집합 1회, bottomup_data.json 불필요) ─
+        rsi_by_ticker, cross_by_ticker = {}, {}
+        try:
+            counts = np.isfinite(x).sum(axis=1)
+            rsi_last = indicators.last(indicators.rsi(x))
+            macd_line, macd_signal, _ = indicators.macd(x)
+            macd_last, signal_last = indicators.last(macd_line), indicators.last(macd_signal)
+            for i, t in enumerate(tickers):
+                if counts[i] < 30 or not np.isfinite(rsi_last[i]):
+                    continue
+                rsi_by_ticker[t] = float(rsi_last[i])
+                cross = 0
+                if np.isfinite(signal_last[i]):
+                    cross = 1 if macd_last[i] > signal_last[i] else -1
+                cross_by_ticker[t] = cross
         except Exception as e:
             print(f"[PF] RSI/MACD 계산 실패: {e}")
 
-        # ── scout/core 분리 ───────────────────────────────────────────────
-        scout_alerts, core_results = [], []
-        for r in results:
-            t = r['ticker']
-            if type_map.get(t) == 'scout' and r['pct'] <= -scout_threshold:
-                scout_alerts.append(r)
-            if type_map.get(t) == 'core':
-                core_results.append(r)
-
-        core_sorted         = sorted(core_results, key=lambda x: x['pct'], reverse=True)
-        top_movers          = core_sorted[:3] + core_sorted[-3:]
-        scout_alerts_sorted = sorted(scout_alerts, key=lambda x: x['pct'])
-
-        print(f"[PF] ✅ 총 {len(results)}종목  ₩{total_krw:,.0f}  당일 {day_pnl:+,.0f}원")
-        if scout_alerts:
-            print(f"[PF] 🎯 선발대: {[a['ticker'] for a in scout_alerts]}")
-
-        return {
-            'total_krw':    round(total_krw),
-            'day_pnl':      round(day_pnl),
-            'day_pct':      round(day_pnl / (total_krw - day_pnl) * 100, 2) if total_krw else 0,
-            'sharpe':       sharpe,
-            'mdd':          mdd,
-            'volatility':   volatility,
-            'results':      results,           # 전체 보유 종목 (ai_block + action_hint용)
-            'top_movers':   top_movers,
-            'scout_alerts': scout_alerts_sorted,
-            'rsi_signals':  rsi_signals
-        }
+        # ── 계좌별 결과 조립 ───────────────────────────────────────────────
+        summaries = []
+        for a, acc in enumerate(accounts):
+            name, held = acc['name'], [h['ticker'] for h in acc['holdings']]
+            type_map = {t: types[a][col[t]] for t in held}
+            results = [{'ticker': t, 'val_krw': round(val_krw[a, col[t]]),
+                        'pnl_krw': round(pnl_krw[a, col[t]]), 'pct': round(float(pct[col[t]]), 2),
+                        'type': type_map[t]}
+                       for t in held if has_day[col[t]]]
+
+            sharpe = mdd = volatility = None
+            if full[a].get('volatility'):
+                sharpe     = round(full[a]['sharpe'], 2)
+                volatility = round(full[a]['volatility'] * 100, 1)     # %/yr
+                mdd        = round(full[a]['mdd'] * 100, 1)            # %
+            print(f"[PF] 📐 [{name}] Sharpe:{sharpe}  MDD:{mdd}%  Volatility:{volatility}%/yr")
+            if var_acc[a]:
+                print(f"[PF] ⚠️ [{name}] VaR95 " + '  '.join(
+                    f"{k}: ₩{v['var']:,} (CVaR ₩{v['cvar']:,})" for k, v in var_acc[a].items() if v))
+
+            risk_contrib = {}
+            if rc is not None:
+                w_sum = weights[a].sum() or 1.0
+                risk_contrib = {
+                    'vol':       round(float(rc['vol'][a]) * 100, 1),
+                    'shrinkage': round(shrink, 3),
+                    'groups':    {g: round(v * 100, 1) for g, v in rc['groups'][a].items()
+                                  if g in type_map.values()},
+                    'holdings':  sorted(({'ticker': t, 'type': type_map[t],
+                                         'weight':    round(float(weights[a, col[t]] / w_sum) * 100, 1),
+                                         'marginal':  round(float(rc['marginal'][a, col[t]]) * 100, 2),
+                                         'component': round(float(rc['component'][a, col[t]]) * 100, 2),
+                                         'share':     round(float(rc['share'][a, col[t]]) * 100, 1)}
+                                        for t in held),
+                                        key=lambda h: -h['share']),
+                }
+                print(f"[PF] 🧩 [{name}] 위험기여 " + ' / '.join(f"{g} {v}%" for g, v in risk_contrib['groups'].items())
+                      + "  상위 " + ' '.join(f"{h['ticker']} {h['share']}%" for h in risk_contrib['holdings'][:3]))
+
+            rsi_signals = {'overbought': [], 'oversold': [], 'macd_buy': [], 'macd_sell': []}
+            for t in held:
+                if t not in rsi_by_ticker:
+                    continue
+                rsi_val = rsi_by_ticker[t]
+                if rsi_val >= 65:
+                    rsi_signals['overbought'].append(f"{t}({rsi_val:.0f})")
+                elif rsi_val <= 35:
+                    rsi_signals['oversold'].append(f"{t}({rsi_val:.0f})")
+                if cross_by_ticker[t] == 1:
+                    rsi_signals['macd_buy'].append(t)
+                elif cross_by_ticker[t] == -1:
+                    rsi_signals['macd_sell'].append(t)
+
+            # ── scout/core 분리 ───────────────────────────────────────────
+            scout_threshold = acc['scout_drop_threshold_pct']
+            scout_alerts = [r for r in results if r['type'] == 'scout' and r['pct'] <= -scout_threshold]
+            core_sorted  = sorted((r for r in results if r['type'] == 'core'), key=lambda x: x['pct'], reverse=True)
+
+            total, pnl = float(total_krw[a]), float(day_pnl[a])
+            print(f"[PF] ✅ [{name}] {len(results)}종목  ₩{total:,.0f}  당일 {pnl:+,.0f}원")
+            if scout_alerts:
+                print(f"[PF] 🎯 [{name}] 선발대: {[s['ticker'] for s in scout_alerts]}")
+
+            summaries.append({
+                'name':         name,
+                'holdings':     [(t, type_map[t]) for t in held],
+                'total_krw':    round(total),
+                'day_pnl':      round(pnl),
+                'day_pct':      round(pnl / (total - pnl) * 100, 2) if total else 0,
+                'sharpe':       sharpe,
+                'mdd':          mdd,
+                'volatility':   volatility,
+                'risk_rolling':  rolling_acc[a],
+                'risk_holdings': {t: risk_holdings_all[t] for t in held if t in risk_holdings_all},
+                'var':          var_acc[a],
+                'risk_contrib': risk_contrib,
+                'stress':       stress_acc[a],
+                'results':      results,           # 계좌 보유 종목 (ai_block + action_hint용)
+                'top_movers':   core_sorted[:3] + core_sorted[-3:],
+                'scout_alerts': sorted(scout_alerts, key=lambda x: x['pct']),
+                'rsi_signals':  rsi_signals
+            })
+        return summaries
 
     except Exception as e:
         print(f"[PF] ❌ 실패: {e}")
@@ -710,10 +780,9 @@ def get_economic_calendar():
         try:
             from_date = today.strftime('%Y-%m-%d')
             to_date   = (today + timedelta(days=30)).strftime('%Y-%m-%d')
-            r = requests.get(
-                'https://finnhub.io/api/v1/calendar/economic',
-                params={'token': FINNHUB_TOKEN, 'from': from_date, 'to': to_date},
-                timeout=10
+            r = http_client.get(
+                'https://finnhub.io/api/v1/calendar/economic', 'finnhub',
+                params={'token': FINNHUB_TOKEN, 'from': from_date, 'to': to_date}
             )
             data = r.json().get('economicCalendar', [])
             keywords = ['FOMC', 'Federal Reserve', 'CPI', 'PCE', 'Nonfarm', 'GDP', 'Unemployment']
@@ -751,8 +820,72 @@ def get_economic_calendar():
     return events[:4]
 
 
-def format_morning_digest(result, bottomup_scores=None, state=None, pf_summary=None):
-    """🌅 Morning Digest: Composite Δ, 탑다운, 바텀업 TOP5, 경제캘린더, 포트폴리오"""
+def format_portfolio_section(pf_summary):
+    """계좌 하나의 Morning Digest 섹션 (평가액·손익·리스크·VaR·위험기여·급등락·선발대·RSI/MACD)"""
+    sign = '+' if pf_summary['day_pnl'] >= 0 else ''
+    pf_lines = f"\n\n💼 <b>포트폴리오 ({pf_summary.get('name', DEFAULT_ACCOUNT)}):</b>"
+    pf_lines += f"\n• 평가액: ₩{pf_summary['total_krw']:,}"
+    pf_lines += f"\n• 당일 손익: {sign}₩{pf_summary['day_pnl']:,} ({sign}{pf_summary['day_pct']:.2f}%)"
+    # 리스크 지표
+    r_parts = []
+    if pf_summary.get('sharpe') is not None:
+        r_parts.append(f"Sharpe {pf_summary['sharpe']:.2f}")
+    if pf_summary.get('mdd') is not None:
+        r_parts.append(f"MDD {pf_summary['mdd']}%")
+    if pf_summary.get('volatility') is not None:
+        r_parts.append(f"변동성 {pf_summary['volatility']}%/yr")
+    if r_parts:
+        pf_lines += '\n• 📐 ' + '  |  '.join(r_parts)
+    # 롤링 Sharpe / MDD 추세 (짧은 창 → 긴 창)
+    rolling = pf_summary.get('risk_rolling') or {}
+    trend = [f"{w}d {v['sharpe']:+.1f}/{v['mdd'] * 100:.0f}%" for w, v in rolling.items()
+             if v.get('sharpe') is not None and v.get('mdd') is not None]
+    if trend:
+        pf_lines += '\n• 📈 Sharpe/MDD ' + '  '.join(trend)
+    var = pf_summary.get('var') or {}
+    var_parts = [f"{label} ₩{var[k]['var']:,} (CVaR ₩{var[k]['cvar']:,})"
+                 for k, label in (('hist_1d', '1일'), ('hist_10d', '10일')) if var.get(k)]
+    if var_parts:
+        mc = var.get('mc_10d')
+        pf_lines += '\n• ⚠️ VaR95 ' + '  '.join(var_parts) + (f"  · MC 10일 ₩{mc['var']:,}" if mc else '')
+    contrib = pf_summary.get('risk_contrib') or {}
+    if contrib.get('groups'):
+        pf_lines += ('\n• 🧩 위험기여 ' + ' / '.join(f"{g} {v:.0f}%" for g, v in contrib['groups'].items())
+                     + '  · ' + ' '.join(f"{h['ticker']} {h['share']:.0f}%" for h in contrib['holdings'][:3]))
+    # 스트레스 시나리오 (최악 손실 큰 순 STRESS_DIGEST_TOP개)
+    stress = pf_summary.get('stress') or {}
+    if stress:
+        top = sorted(stress.values(), key=lambda r: -r['loss'])[:STRESS_DIGEST_TOP]
+        pf_lines += '\n• 🧯 스트레스 ' + '  '.join(f"{r['name']} -₩{r['loss']:,} ({r['pct']:+.0f}%)" for r in top)
+    movers = pf_summary.get('top_movers', [])
+    if movers:
+        winners = [m for m in movers if m['pct'] >= 0][:3]
+        losers  = [m for m in movers if m['pct'] <  0][-3:]
+        if winners:
+            pf_lines += '\n🔺 ' + '  '.join(f"{m['ticker']}({m['pct']:+.1f}%)" for m in winners)
+        if losers:
+            pf_lines += '\n🔻 ' + '  '.join(f"{m['ticker']}({m['pct']:+.1f}%)" for m in losers)
+    # 선발대 매수 기회
+    scouts = pf_summary.get('scout_alerts', [])
+    if scouts:
+        pf_lines += '\n\n🎯 <b>선발대 매수 기회:</b>'
+        for s in scouts:
+            pf_lines += f"\n• {s['ticker']} ({s['pct']:+.1f}%) — 추가매수 검토!"
+    # RSI/MACD 신호 (bottomup_data.json 재사용)
+    sig = pf_summary.get('rsi_signals', {})
+    if sig.get('oversold'):
+        pf_lines += '\n📉 <b>RSI 과매도(매수기회):</b> ' + '  '.join(sig['oversold'])
+    if sig.get('overbought'):
+        pf_lines += '\n📈 <b>RSI 과매수(주의):</b> ' + '  '.join(sig['overbought'])
+    if sig.get('macd_buy'):
+        pf_lines += '\n🟢 <b>MACD 골든:</b> ' + '  '.join(sig['macd_buy'])
+    if sig.get('macd_sell'):
+        pf_lines += '\n🔴 <b>MACD 데드:</b> ' + '  '.join(sig['macd_sell'])
+    return pf_lines
+
+
+def format_morning_digest(result, bottomup_scores=None, state=None, pf_summaries=None):
+    """🌅 Morning Digest: Composite Δ, 탑다운, 바텀업 TOP5, 경제캘린더, 포트폴리오 (계좌별)"""
     signal_emoji = {'GREEN': '🟢 GREEN — 비중 확대',
                     'YELLOW': '🟡 YELLOW — 비중 유지',
                     'RED': '🔴 RED — 비중 축소'}
@@ -829,17 +962,13 @@ def format_morning_digest(result, bottomup_scores=None, state=None, pf_summary=N
         top_ticker = top5[0]['ticker'] if bottomup_scores else ''
         # 당일 급락 중인지 체크 (-3% 이상이면 경고)
         crash_pct = None
-        if pf_summary:
+        for pf_summary in pf_summaries or []:
             for r in pf_summary.get('results', []):
                 if r['ticker'] == top_ticker:
                     crash_pct = r['pct']
                     break
-        # results에서 못 찾으면 top_movers에서 fallback
-        if crash_pct is None and pf_summary:
-            for r in pf_summary.get('top_movers', []):
-                if r['ticker'] == top_ticker:
-                    crash_pct = r['pct']
-                    break
+            if crash_pct is not None:
+                break
         if crash_pct is not None and crash_pct <= -3.0:
             action_hint = f'\n\n💡 <b>행동:</b> {top_ticker} 비중 확대 검토 ⚠️ 급락 중({crash_pct:.1f}%) — 분할 접근'
         else:
@@ -849,47 +978,17 @@ def format_morning_digest(result, bottomup_scores=None, state=None, pf_summary=N
     else:
         action_hint = '\n\n💡 <b>행동:</b> 관망, 분할매수 검토'
 
-    # 포트폴리오 요약
+    # 포트폴리오 요약 (계좌별 섹션, 2개 이상이면 합계 한 줄 먼저)
     pf_lines = ''
-    if pf_summary:
-        sign = '+' if pf_summary['day_pnl'] >= 0 else ''
-        pf_lines = f"\n\n💼 <b>포트폴리오 (US주식):</b>"
-        pf_lines += f"\n• 평가액: ₩{pf_summary['total_krw']:,}"
-        pf_lines += f"\n• 당일 손익: {sign}₩{pf_summary['day_pnl']:,} ({sign}{pf_summary['day_pct']:.2f}%)"
-        # 리스크 지표
-        r_parts = []
-        if pf_summary.get('sharpe') is not None:
-            r_parts.append(f"Sharpe {pf_summary['sharpe']:.2f}")
-        if pf_summary.get('mdd') is not None:
-            r_parts.append(f"MDD {pf_summary['mdd']}%")
-        if pf_summary.get('volatility') is not None:
-            r_parts.append(f"변동성 {pf_summary['volatility']}%/yr")
-        if r_parts:
-            pf_lines += '\n• 📐 ' + '  |  '.join(r_parts)
-        movers = pf_summary.get('top_movers', [])
-        if movers:
-            winners = [m for m in movers if m['pct'] >= 0][:3]
-            losers  = [m for m in movers if m['pct'] <  0][-3:]
-            if winners:
-                pf_lines += '\n🔺 ' + '  '.join(f"{m['ticker']}({m['pct']:+.1f}%)" for m in winners)
-            if losers:
-                pf_lines += '\n🔻 ' + '  '.join(f"{m['ticker']}({m['pct']:+.1f}%)" for m in losers)
-        # 선발대 매수 기회
-        scouts = pf_summary.get('scout_alerts', [])
-        if scouts:
-            pf_lines += '\n\n🎯 <b>선발대 매수 기회:</b>'
-            for s in scouts:
-                pf_lines += f"\n• {s['ticker']} ({s['pct']:+.1f}%) — 추가매수 검토!"
-        # RSI/MACD 신호 (bottomup_data.json 재사용)
-        sig = pf_summary.get('rsi_signals', {})
-        if sig.get('oversold'):
-            pf_lines += '\n📉 <b>RSI 과매도(매수기회):</b> ' + '  '.join(sig['oversold'])
-        if sig.get('overbought'):
-            pf_lines += '\n📈 <b>RSI 과매수(주의):</b> ' + '  '.join(sig['overbought'])
-        if sig.get('macd_buy'):
-            pf_lines += '\n🟢 <b>MACD 골든:</b> ' + '  '.join(sig['macd_buy'])
-        if sig.get('macd_sell'):
-            pf_lines += '\n🔴 <b>MACD 데드:</b> ' + '  '.join(sig['macd_sell'])
+    if pf_summaries:
+        if len(pf_summaries) > 1:
+            total = sum(p['total_krw'] for p in pf_summaries)
+            pnl   = sum(p['day_pnl'] for p in pf_summaries)
+            pct   = pnl / (total - pnl) * 100 if total else 0
+            sign  = '+' if pnl >= 0 else ''
+            pf_lines += (f"\n\n💼 <b>전체 {len(pf_summaries)}개 계좌:</b> ₩{total:,}"
+                         f"  당일 {sign}₩{pnl:,} ({sign}{pct:.2f}%)")
+        pf_lines += ''.join(format_portfolio_section(p) for p in pf_summaries)
 
     # ── 비대칭 손익비 섹션 (드라켄밀러 프레임워크) ────────────────────
     asym_lines = ''
@@ -921,26 +1020,19 @@ def format_morning_digest(result, bottomup_scores=None, state=None, pf_summary=N
 
     # ── AI 분석용 데이터 블록 (복붙 → AI에 던지면 100점 분석) ─────────
     ai_block = '\n\n<b>📋 AI 분석 데이터 (복붙용):</b>'
-    if pf_summary:
+    for pf_summary in pf_summaries or []:
         all_results = pf_summary.get('results', [])
         total_val   = pf_summary.get('total_krw', 0)
-        # portfolio.json에서 전체 holding 목록 읽기 (순서 보장 + type 정보)
-        try:
-            _pf_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'portfolio.json')
-            with open(_pf_path, encoding='utf-8') as _f:
-                _pf_data = json.load(_f)
-            _holdings_raw = _pf_data.get('holdings', [])
-        except Exception:
-            _holdings_raw = []
+        # 계좌가 여러 개면 항목 이름에 계좌 표시
+        tag = f"[{pf_summary.get('name')}]" if len(pf_summaries) > 1 else ''
 
         # results를 ticker → dict 맵으로 변환
         results_map = {r['ticker']: r for r in all_results}
 
-        if _holdings_raw and total_val:
+        # holdings: portfolio.json 순서 + type (결과가 없는 종목도 N/A로 표시)
+        if pf_summary.get('holdings') and total_val:
             parts = []
-            for _h in _holdings_raw:
-                _t  = _h['ticker']
-                _tp = _h.get('type', 'core')
+            for _t, _tp in pf_summary['holdings']:
                 _r  = results_map.get(_t)
                 if _r and _r.get('val_krw', 0) > 0:
                     _pct = round(_r['val_krw'] / total_val * 100, 1)
@@ -948,7 +1040,7 @@ def format_morning_digest(result, bottomup_scores=None, state=None, pf_summary=N
                 else:
                     parts.append(f"{_t}({_tp},N/A%)")
             if parts:
-                ai_block += '\n• 종목: ' + '  '.join(parts)
+                ai_block += f'\n• 종목{tag}: ' + '  '.join(parts)
         r_str = ''
         if pf_summary.get('sharpe') is not None:
             r_str += f"Sharpe {pf_summary['sharpe']}"
@@ -957,7 +1049,7 @@ def format_morning_digest(result, bottomup_scores=None, state=None, pf_summary=N
         if pf_summary.get('volatility') is not None:
             r_str += f"  변동성 {pf_summary['volatility']}%/yr"
         if r_str:
-            ai_block += f'\n• 리스크: {r_str}'
+            ai_block += f'\n• 리스크{tag}: {r_str}'
     ai_block += f'\n• 시그널: Composite {result["composite"]:+.2f} / VIX {result["vix"]:.1f} / Spread {result["spread"]:+.2f}%'
     # 비대칭 지표 추가
     _gap = result.get('equity_bond_gap')
@@ -1024,28 +1116,33 @@ def main(mode='check'):
     """메인 함수"""
     print(f"[WDK LAB] Running in {mode} mode...")
 
+    if mode == 'backfill':
+        # 🕰 히스토리 백필 (알림/상태 없음)
+        run_backfill()
+        return
+
     state = load_state()
     kst = timezone(timedelta(hours=9))
     now_kst = datetime.now(kst)
     current_hour = now_kst.strftime('%Y-%m-%d-%H')
 
     last_sent = state.get('last_sent', {})
-    if mode in ['daily', 'report'] and last_sent.get(mode) == current_hour:
+    if mode in DIGEST_MODES and last_sent.get(mode) == current_hour:
         print(f"[SKIP] Already sent {mode} at {current_hour}")
         return
 
-    # 신호 계산
-    result = calculate_signal()
+    # 신호 계산 (주식-채권 갭은 Morning Digest 모드만)
+    result = calculate_signal(state, with_asym=mode in DIGEST_MODES)
     print(f"[Signal] {result['signal']} (score: {result['composite']:.2f})")
     previous_signal = state.get('previous_signal')
 
     # ===== 향상된 3단계 알람 =====
 
-    if mode in ['daily', 'report']:
+    if mode in DIGEST_MODES:
         # 🌅 1단계: Morning Digest
-        bottomup_scores = calculate_bottomup_scores()
-        pf_summary = fetch_portfolio_summary()
-        msg = format_morning_digest(result, bottomup_scores, state, pf_summary)
+        bottomup_scores = load_bottomup_ranking()
+        pf_summaries = fetch_portfolio_summaries()
+        msg = format_morning_digest(result, bottomup_scores, state, pf_summaries)
         send_telegram(msg)
         if 'last_sent' not in state: state['last_sent'] = {}
         state['last_sent'][mode] = current_hour
@@ -1116,7 +1213,18 @@ def main(mode='check'):
     save_state(state)
 
 
+def startup_report():
+    """시작 시 import 시간 + 실행 중 지연 import 모듈별 로드 시간"""
+    print(f"[STARTUP] 공통 모듈 로드 {(_T_IMPORTED - _T_START) * 1000:.0f}ms")
+    for name, sec in sorted(_IMPORT_TIMES.items(), key=lambda kv: -kv[1]):
+        print(f"  {name:<24} {sec * 1000:7.1f}ms")
+    for name in ('pandas', 'yfinance'):
+        if name not in sys.modules:
+            print(f"  {name:<24}   (미로드)")
+
+
 if __name__ == '__main__':
-    import sys
     mode = sys.argv[1] if len(sys.argv) > 1 else 'check'
     main(mode)
+    http_client.report()
+    startup_report()